@@ -11,11 +11,17 @@ from applications.auto_setup.backend.setup_utils import (
     STATUS_ERROR_VALUE,
 )
 from utils.sc_linac import linac_utils
+from utils.sc_linac.calibration_ledger import CalibrationPolicy
 from utils.sc_linac.cavity import Cavity
 from utils.sc_linac.linac_utils import RF_MODE_SELA
+from utils.sc_linac.pipeline import Stage
 
 
 class SetupCavity(Cavity, SetupLinacObject):
+    # Skip characterizations and SSA calibrations that are recent and still in
+    # use, unless the operator asked for them
+    calibration_policy = CalibrationPolicy()
+
     def __init__(
         self,
         cavity_num,
@@ -106,6 +112,8 @@ class SetupCavity(Cavity, SetupLinacObject):
         if self.abort_requested:
             self.clear_abort()
             raise linac_utils.CavityAbortError(f"Abort requested for {self}")
+        # Aborts requested from within the process i.e. a parallel run timeout
+        super().check_abort()
 
     def shut_down(self):
         if self.script_is_running:
@@ -130,6 +138,20 @@ class SetupCavity(Cavity, SetupLinacObject):
             self.clear_abort()
             self.status_message = str(e)
 
+    def ssa_cal_stage_done(self) -> bool:
+        """
+        @return: whether setup can skip the SSA calibration stage, never when
+                 the operator asked for a calibration
+        """
+        return not self.ssa_cal_requested and self.ssa_calibration_done()
+
+    def characterization_stage_done(self) -> bool:
+        """
+        @return: whether setup can skip the characterization stage, never
+                 when the operator asked for a characterization
+        """
+        return not self.cav_char_requested and self.characterization_done()
+
     def setup(self):
         try:
             if self.script_is_running:
@@ -160,10 +182,35 @@ class SetupCavity(Cavity, SetupLinacObject):
             self.reset_interlocks()
             self.progress = 15
 
-            self.request_ssa_cal()
-            self.request_auto_tune()
-            self.request_characterization()
-            self.request_ramp()
+            self.setup_pipeline(
+                [
+                    Stage(
+                        "SSA calibration",
+                        self.request_ssa_cal,
+                        postcondition=self.ssa_cal_stage_done,
+                        # requested, but already done by the run being resumed
+                        resume_check=self.ssa_calibration_done,
+                    ),
+                    Stage(
+                        "tuning",
+                        self.request_auto_tune,
+                        postcondition=self.tuning_done,
+                        # RF is off by now, so the detune can't be measured
+                        resume_check=self.tuner_at_resonance,
+                    ),
+                    Stage(
+                        "characterization",
+                        self.request_characterization,
+                        postcondition=self.characterization_stage_done,
+                        resume_check=self.characterization_done,
+                    ),
+                    Stage(
+                        "ramp",
+                        self.request_ramp,
+                        postcondition=lambda: self.ramp_done(self.acon),
+                    ),
+                ]
+            ).run()
 
             self.progress = 100
             self.status = STATUS_READY_VALUE
@@ -182,6 +229,7 @@ class SetupCavity(Cavity, SetupLinacObject):
             linac_utils.CavityAbortError,
             CASeverityException,
             linac_utils.CavityCharacterizationError,
+            linac_utils.SetupStageError,
         ) as e:
             self.status = STATUS_ERROR_VALUE
             self.clear_abort()
@@ -224,7 +272,7 @@ class SetupCavity(Cavity, SetupLinacObject):
     def request_characterization(self):
         if self.cav_char_requested:
             self.status_message = f"Running {self} Cavity Characterization"
-            self.characterize()
+            self.characterize(force=True)
             self.progress = 60
             self.calc_probe_q_pv_obj.put(1)
             self.progress = 70
@@ -245,7 +293,7 @@ class SetupCavity(Cavity, SetupLinacObject):
             self.status_message = f"Running {self} SSA Calibration"
             self.turn_off()
             self.progress = 20
-            self.ssa.calibrate(self.ssa.drive_max, attempt=2)
+            self.ssa.calibrate(self.ssa.drive_max, attempt=2, force=True)
             self.status_message = f"{self} SSA Calibrated"
         self.progress = 25
         self.check_abort()
@@ -1,3 +1,5 @@
+from functools import lru_cache
+
 from applications.auto_setup.backend.setup_cavity import SetupCavity
 from applications.auto_setup.backend.setup_cryomodule import SetupCryomodule
 from applications.auto_setup.backend.setup_linac import SetupLinac
@@ -24,4 +26,13 @@ class SetupMachine(Machine, SetupLinacObject):
             cm.clear_abort()
 
 
-SETUP_MACHINE = SetupMachine()
+@lru_cache(maxsize=None)
+def get_setup_machine() -> SetupMachine:
+    return SetupMachine()
+
+
+def __getattr__(name):
+    # Builds SETUP_MACHINE on first use instead of at import time
+    if name == "SETUP_MACHINE":
+        return get_setup_machine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
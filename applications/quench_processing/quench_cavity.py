@@ -54,7 +54,7 @@ class QuenchCavity(Cavity):
     @property
     def quench_latch_pv_obj(self) -> PV:
         if not self._quench_latch_pv_obj:
-            self._quench_latch_pv_obj = PV(self.quench_latch_pv)
+            self._quench_latch_pv_obj = self.make_pv_obj("quench_latch")
         return self._quench_latch_pv_obj
 
     @property
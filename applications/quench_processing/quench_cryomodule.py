@@ -1,6 +1,7 @@
 import logging
 import os
 import sys
+from functools import lru_cache
 
 from lcls_tools.common.logger import logger
 
@@ -34,4 +35,13 @@ class QuenchCryomodule(Cryomodule):
         self.logger.addHandler(self.console_handler)
 
 
-QUENCH_MACHINE = Machine(cavity_class=QuenchCavity, cryomodule_class=QuenchCryomodule)
+@lru_cache(maxsize=None)
+def get_quench_machine() -> Machine:
+    return Machine(cavity_class=QuenchCavity, cryomodule_class=QuenchCryomodule)
+
+
+def __getattr__(name):
+    # Builds QUENCH_MACHINE on first use instead of at import time
+    if name == "QUENCH_MACHINE":
+        return get_quench_machine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
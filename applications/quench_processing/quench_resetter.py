@@ -50,6 +50,7 @@ def check_cavities(cavity_list: List[QuenchCavity], watcher_pv: PV):
 if __name__ == "__main__":
     WATCHER_PV: PV = PV("PHYS:SYS0:1:SC_CAV_QNCH_RESET_HEARTBEAT")
     WATCHER_PV.put(0)
+    QUENCH_MACHINE.enable_pv_cache()
     cavities: List[QuenchCavity] = list(QUENCH_MACHINE.all_iterator)
     while True:
         check_cavities(cavities, WATCHER_PV)
@@ -1,6 +1,7 @@
 import logging
 import os
 import pathlib
+from functools import lru_cache
 from typing import Optional
 
 import numpy as np
@@ -139,4 +140,13 @@ class SELCavity(Cavity):
             return 0
 
 
-SEL_MACHINE: Machine = Machine(cavity_class=SELCavity)
+@lru_cache(maxsize=None)
+def get_sel_machine() -> Machine:
+    return Machine(cavity_class=SELCavity)
+
+
+def __getattr__(name):
+    # Builds SEL_MACHINE on first use instead of at import time
+    if name == "SEL_MACHINE":
+        return get_sel_machine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -16,6 +16,10 @@ from applications.sel_phase_optimizer.sel_phase_linac import (  # noqa: E402
     SELCavity,
     MAX_STEP,
 )
+from utils.sc_linac.linac_utils import (  # noqa: E402
+    HW_MODE_ONLINE_VALUE,
+    RF_MODE_SELAP,
+)
 
 HEARTBEAT_PV = PV("PHYS:SYS0:1:SC_SEL_PHAS_OPT_HEARTBEAT")
 
@@ -33,11 +37,28 @@ def update_heartbeat(time_to_wait: int):
 cavities: List[SELCavity] = list(SEL_MACHINE.all_iterator)
 
 
+def straightenable_cavities() -> List[SELCavity]:
+    """
+    Reads the state of every cavity in one batch to pre-filter the ones that
+    can_be_straightened so we don't query offline or off cavities one by one
+    """
+    snapshot = SEL_MACHINE.snapshot(
+        fields=["hw_mode", "rf_state", "rf_mode", "aact"], cavities=cavities
+    )
+    mask = (
+        (snapshot["hw_mode"] == HW_MODE_ONLINE_VALUE)
+        & (snapshot["rf_state"] == 1)
+        & (snapshot["rf_mode"] == RF_MODE_SELAP)
+        & (snapshot["aact"] > 1)
+    )
+    return [cavity for cavity, straightenable in zip(cavities, mask) if straightenable]
+
+
 def run():
     while True:
         num_large_steps = 0
 
-        for cavity in cavities:
+        for cavity in straightenable_cavities():
             try:
                 num_large_steps += 1 if cavity.straighten_iq_plot() >= MAX_STEP else 0
                 HEARTBEAT_PV.put(HEARTBEAT_PV.get() + 1)
@@ -1,16 +1,15 @@
 from collections import OrderedDict, defaultdict
 from datetime import datetime
-from typing import DefaultDict, Optional
+from typing import DefaultDict, Optional, Dict
 
 from lcls_tools.common.controls.pyepics.utils import PV
 
 from displays.cavity_display.backend.fault import Fault, FaultCounter, PVInvalidError
-from displays.cavity_display.utils import utils
+from displays.cavity_display.backend.fault_rules import get_fault_rule_table
 from displays.cavity_display.utils.utils import (
     STATUS_SUFFIX,
     DESCRIPTION_SUFFIX,
     SEVERITY_SUFFIX,
-    SpreadsheetError,
     display_hash,
 )
 from utils.sc_linac.cavity import Cavity
@@ -49,73 +48,30 @@ class BackendCavity(Cavity):
             self._description_pv_obj = PV(self.description_pv)
         return self._description_pv_obj
 
+    def pv_attributes(self) -> Dict[str, str]:
+        attributes = super().pv_attributes()
+        for fault_hash, fault in self.faults.items():
+            attributes[f"faults[{fault_hash}]"] = fault.pv
+        return attributes
+
     def create_faults(self):
-        for csv_fault_dict in utils.parse_csv():
-            level: str = csv_fault_dict["Level"]
-            suffix: str = csv_fault_dict["PV Suffix"]
-            rack: str = csv_fault_dict["Rack"]
-
-            if level == "RACK":
-                # Rack A cavities don't care about faults for Rack B and vice versa
-                if rack != self.rack.rack_name:
-                    # Takes us to the next iteration of the for loop
-                    continue
-
-                # tested in the python console that strings without one of these
-                # formatting keys just ignores them and moves on
-                prefix = csv_fault_dict["PV Prefix"].format(
-                    LINAC=self.linac.name,
-                    CRYOMODULE=self.cryomodule.name,
-                    RACK=self.rack.rack_name,
-                    CAVITY=self.number,
-                )
-                pv: str = prefix + suffix
-
-            elif level == "CRYO":
-                prefix = csv_fault_dict["PV Prefix"].format(
-                    CRYOMODULE=self.cryomodule.name, CAVITY=self.number
-                )
-                pv: str = prefix + suffix
-
-            elif level == "SSA":
-                pv: str = self.ssa.pv_addr(suffix)
-
-            elif level == "CAV":
-                pv: str = self.pv_addr(suffix)
-
-            elif level == "CM":
-                cm_type = csv_fault_dict["CM Type"]
-                prefix = csv_fault_dict["PV Prefix"].format(
-                    LINAC=self.linac.name,
-                    CRYOMODULE=self.cryomodule.name,
-                    CAVITY=self.number,
-                )
-
-                if (cm_type == "1.3" and self.cryomodule.is_harmonic_linearizer) or (
-                    cm_type == "3.9" and not self.cryomodule.is_harmonic_linearizer
-                ):
-                    continue
-                pv: str = prefix + suffix
-
-            elif level == "ALL":
-                prefix = csv_fault_dict["PV Prefix"]
-                pv: str = prefix + suffix
-
-            else:
-                raise (SpreadsheetError("Unexpected fault level in fault spreadsheet"))
+        for rule in get_fault_rule_table():
+            pv: Optional[str] = rule.pv_name(self)
+            if pv is None:
+                continue
 
+            csv_fault_dict = rule.row
             tlc: str = csv_fault_dict["Three Letter Code"]
             ok_condition: str = csv_fault_dict["OK If Equal To"]
             fault_condition: str = csv_fault_dict["Faulted If Equal To"]
-            csv_prefix: str = csv_fault_dict["PV Prefix"]
 
             key: int = display_hash(
-                rack=rack,
+                rack=csv_fault_dict["Rack"],
                 fault_condition=fault_condition,
                 ok_condition=ok_condition,
                 tlc=tlc,
-                suffix=suffix,
-                prefix=csv_prefix,
+                suffix=rule.suffix,
+                prefix=rule.prefix,
             )
 
             # setting key of faults dictionary to be row number b/c it's unique (i.e. not repeated)
@@ -134,6 +90,8 @@ class BackendCavity(Cavity):
                 button_macro=csv_fault_dict["Button Macros"],
                 action=csv_fault_dict["Recommended Corrective Actions"],
                 lazy_pv=self.rack.cryomodule.linac.machine.lazy_fault_pvs,
+                pv_registry=self.rack.cryomodule.linac.machine.fault_pv_registry,
+                rule_index=rule.index,
             )
 
     def get_fault_counts(
@@ -172,14 +130,25 @@ class BackendCavity(Cavity):
                 invalid = True
                 break
 
-        if is_okay:
-            self.status_pv_obj.put(str(self.number))
-            self.severity_pv_obj.put(0)
-            self.description_pv_obj.put(" ")
+        self.publish_status(None if is_okay else fault, invalid=invalid)
+
+    def publish_status(self, fault: Optional[Fault], invalid: bool = False):
+        """
+        Queues the status on the machine's status publisher if it has one,
+        otherwise writes it right away
+        @param fault: the first active fault, None if the cavity is OK
+        @param invalid: whether that fault's PV is invalid/disconnected
+        """
+        if not fault:
+            status, severity, description = str(self.number), 0, " "
+        else:
+            status, description = fault.tlc, fault.short_description
+            severity = 3 if invalid else fault.severity
+
+        publisher = self.rack.cryomodule.linac.machine.status_publisher
+        if publisher is not None:
+            publisher.queue(self, status, severity, description)
         else:
-            self.status_pv_obj.put(fault.tlc)
-            self.description_pv_obj.put(fault.short_description)
-            if not invalid:
-                self.severity_pv_obj.put(fault.severity)
-            else:
-                self.severity_pv_obj.put(3)
+            self.status_pv_obj.put(status)
+            self.severity_pv_obj.put(severity)
+            self.description_pv_obj.put(description)
@@ -1,8 +1,19 @@
+from typing import Optional
+
 from displays.cavity_display.backend.backend_cavity import BackendCavity
+from displays.cavity_display.backend.fault import FaultPVRegistry
+from displays.cavity_display.backend.status_publisher import StatusPublisher
 from utils.sc_linac.linac import Machine
 
 
 class BackendMachine(Machine):
-    def __init__(self, lazy_fault_pvs=True):
+    def __init__(
+        self,
+        lazy_fault_pvs=True,
+        status_publisher: Optional[StatusPublisher] = None,
+    ):
         self.lazy_fault_pvs = lazy_fault_pvs
+        # Cavities write their status straight to their PVs without one
+        self.status_publisher: Optional[StatusPublisher] = status_publisher
+        self.fault_pv_registry: FaultPVRegistry = FaultPVRegistry()
         super().__init__(cavity_class=BackendCavity)
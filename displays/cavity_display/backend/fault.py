@@ -1,4 +1,5 @@
 import dataclasses
+import threading
 from datetime import datetime
 from typing import Union, Optional, Dict
 
@@ -39,6 +40,28 @@ class FaultCounter:
         return self.sum_fault_count == other.sum_fault_count
 
 
+class FaultPVRegistry:
+    """
+    Shared fault PV objects keyed by resolved PV name. Most fault PVs are
+    shared by several cavities (every cavity in a rack, cryomodule, or even
+    the whole machine for ALL level faults), so each one is only connected
+    and monitored once
+    """
+
+    def __init__(self):
+        self._pv_objs: Dict[str, PV] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._pv_objs)
+
+    def pv_obj(self, pvname: str) -> PV:
+        with self._lock:
+            if pvname not in self._pv_objs:
+                self._pv_objs[pvname] = PV(pvname)
+            return self._pv_objs[pvname]
+
+
 class Fault:
     def __init__(
         self,
@@ -56,6 +79,8 @@ class Fault:
         button_macro=None,
         action=None,
         lazy_pv=True,
+        pv_registry: Optional[FaultPVRegistry] = None,
+        rule_index: Optional[int] = None,
     ):
         self.tlc = tlc
         self.severity = int(severity)
@@ -69,16 +94,28 @@ class Fault:
         self.button_text = button_text
         self.button_macro = button_macro
         self.action = action
+        # Row in the compiled fault rule table this fault came from
+        self.rule_index: Optional[int] = rule_index
 
         # Storing PV name as a string instead of making a PV obj
         self.pv: str = pv
+        # PV objects are shared with other cavities' faults on the same PV
+        # when a registry is given
+        self.pv_registry: Optional[FaultPVRegistry] = pv_registry
+        self._pv_obj: Optional[PV] = None
         # TODO figure out why lazy generation breaks the backend runner
-        self._pv_obj: Optional[PV] = PV(self.pv) if not lazy_pv else None
+        if not lazy_pv:
+            self._pv_obj = self.make_pv_obj()
+
+    def make_pv_obj(self) -> PV:
+        if self.pv_registry is not None:
+            return self.pv_registry.pv_obj(self.pv)
+        return PV(self.pv)
 
     @property
     def pv_obj(self) -> PV:
         if not self._pv_obj:
-            self._pv_obj = PV(self.pv)
+            self._pv_obj = self.make_pv_obj()
         return self._pv_obj
 
     def is_currently_faulted(self) -> bool:
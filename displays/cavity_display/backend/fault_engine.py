@@ -0,0 +1,130 @@
+import threading
+import time
+from collections import defaultdict
+from functools import partial
+from typing import (
+    Callable,
+    DefaultDict,
+    Iterable,
+    List,
+    Optional,
+    Set,
+    TYPE_CHECKING,
+)
+
+from displays.cavity_display.utils.utils import (
+    BACKEND_BATCH_WINDOW,
+    BACKEND_FULL_SWEEP_PERIOD,
+)
+
+if TYPE_CHECKING:
+    from displays.cavity_display.backend.backend_cavity import BackendCavity
+
+
+class FaultEngine:
+    """
+    Event driven fault evaluation: every unique fault PV is subscribed to
+    once, and a monitor update (or connection change) only marks the
+    cavities that depend on it as dirty. Dirty cavities are re-evaluated from the monitored
+    values by process_pending, so a change shows up on the display right away
+    instead of after a sweep over the whole machine. Evaluation happens
+    outside of the CA callback thread since it writes the status PVs
+    """
+
+    def __init__(
+        self,
+        cavities: Iterable["BackendCavity"],
+        full_sweep_period: float = BACKEND_FULL_SWEEP_PERIOD,
+        publish: Optional[Callable[[List["BackendCavity"]], None]] = None,
+        batch_window: float = BACKEND_BATCH_WINDOW,
+    ):
+        """
+        @param cavities: cavities to keep the status of
+        @param full_sweep_period: seconds between re-evaluating every cavity
+                                  regardless of monitors
+        @param publish: evaluates and writes the status of a list of cavities
+                        in one go (i.e. CompiledFaults.publish), each cavity
+                        runs through its own faults if None
+        @param batch_window: seconds to keep collecting updates after the
+                             first one so that a burst gets published together
+        """
+        self.cavities: List["BackendCavity"] = list(cavities)
+        self.full_sweep_period: float = full_sweep_period
+        self.publish = publish
+        self.batch_window: float = batch_window
+
+        # fault PV name -> cavities with a fault on it
+        self.dependents: DefaultDict[str, Set["BackendCavity"]] = defaultdict(set)
+
+        self._dirty: Set["BackendCavity"] = set()
+        self._lock = threading.Lock()
+        self._updated = threading.Event()
+        self._last_full_sweep: float = 0
+        self._started: bool = False
+
+    def start(self):
+        """
+        Subscribes to every fault PV and marks every cavity dirty so that the
+        first process_pending call evaluates the whole machine
+        """
+        if self._started:
+            return
+
+        pv_objs = {}
+        for cavity in self.cavities:
+            for fault in cavity.faults.values():
+                self.dependents[fault.pv].add(cavity)
+                if fault.pv not in pv_objs:
+                    pv_objs[fault.pv] = fault.pv_obj
+
+        for fault_pv, pv_obj in pv_objs.items():
+            callback = partial(self.mark_dependents_dirty, fault_pv)
+            pv_obj.add_callback(callback)
+            pv_obj.connection_callbacks.append(callback)
+
+        self._started = True
+        self.mark_all_dirty()
+
+    def mark_dependents_dirty(self, fault_pv: str, **kwargs):
+        """
+        Monitor and connection callback, only flags the cavities since no CA
+        calls should be made from the callback thread
+        """
+        with self._lock:
+            self._dirty.update(self.dependents[fault_pv])
+        self._updated.set()
+
+    def mark_all_dirty(self):
+        with self._lock:
+            self._dirty.update(self.cavities)
+        self._last_full_sweep = time.monotonic()
+        self._updated.set()
+
+    def process_pending(self, timeout: float = 0) -> int:
+        """
+        Waits for an update (up to timeout) and re-evaluates every cavity that
+        changed since the last call
+        @param timeout: max seconds to wait when nothing is pending
+        @return: number of cavities evaluated
+        """
+        if time.monotonic() - self._last_full_sweep >= self.full_sweep_period:
+            self.mark_all_dirty()
+
+        if self._updated.wait(timeout) and self.batch_window:
+            time.sleep(self.batch_window)
+
+        with self._lock:
+            self._updated.clear()
+            dirty = self._dirty
+            self._dirty = set()
+
+        # keep the machine order so upstream cavities are published first
+        ordered = [cavity for cavity in self.cavities if cavity in dirty]
+        if self.publish:
+            if ordered:
+                self.publish(ordered)
+        else:
+            for cavity in ordered:
+                cavity.run_through_faults()
+
+        return len(dirty)
@@ -0,0 +1,342 @@
+import dataclasses
+import time
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple, TYPE_CHECKING
+
+import numpy as np
+from lcls_tools.common.controls.pyepics.utils import PV, EPICS_INVALID_VAL
+
+from displays.cavity_display.utils import utils
+from displays.cavity_display.utils.utils import SpreadsheetError
+
+if TYPE_CHECKING:
+    from displays.cavity_display.backend.backend_cavity import BackendCavity
+
+# Comparison kinds, faulted when the value doesn't match an OK value or when
+# it matches a fault value
+OK_IF_EQUAL = 0
+FAULT_IF_EQUAL = 1
+
+
+@dataclasses.dataclass(frozen=True)
+class FaultRule:
+    """
+    One row of faults.csv with its PV name template worked out up front
+    """
+
+    index: int
+    row: Mapping[str, str]
+    level: str
+    prefix: str
+    suffix: str
+
+    def pv_name(self, cavity: "BackendCavity") -> Optional[str]:
+        """
+        @return: the fault PV for this cavity, None if the rule doesn't apply
+                 to it (i.e. a rack B fault for a rack A cavity)
+        """
+        if self.level == "RACK":
+            # Rack A cavities don't care about faults for Rack B and vice versa
+            if self.row["Rack"] != cavity.rack.rack_name:
+                return None
+            return self._format(cavity, RACK=cavity.rack.rack_name)
+
+        if self.level == "CM":
+            cm_type = self.row["CM Type"]
+            if (cm_type == "1.3" and cavity.cryomodule.is_harmonic_linearizer) or (
+                cm_type == "3.9" and not cavity.cryomodule.is_harmonic_linearizer
+            ):
+                return None
+            return self._format(cavity)
+
+        if self.level == "CRYO":
+            return self._format(cavity)
+
+        if self.level == "SSA":
+            return cavity.ssa.pv_addr(self.suffix)
+
+        if self.level == "CAV":
+            return cavity.pv_addr(self.suffix)
+
+        # ALL level PVs are the same for every cavity
+        return self.prefix + self.suffix
+
+    def _format(self, cavity: "BackendCavity", **kwargs) -> str:
+        # strings without one of these formatting keys just ignore them
+        return (
+            self.prefix.format(
+                LINAC=cavity.linac.name,
+                CRYOMODULE=cavity.cryomodule.name,
+                CAVITY=cavity.number,
+                **kwargs,
+            )
+            + self.suffix
+        )
+
+
+class FaultRuleTable:
+    """
+    faults.csv compiled into read only columns (TLC, severity, comparison kind
+    and threshold, one entry per rule) so that any number of fault readings
+    can be evaluated with a few array operations
+    """
+
+    def __init__(self, rows: Iterable[Dict[str, str]]):
+        rules: List[FaultRule] = []
+        kinds: List[int] = []
+        thresholds: List[float] = []
+
+        for index, row in enumerate(rows):
+            level = row["Level"]
+            if level not in ["RACK", "CRYO", "SSA", "CAV", "CM", "ALL"]:
+                raise SpreadsheetError("Unexpected fault level in fault spreadsheet")
+
+            ok_condition = row["OK If Equal To"]
+            fault_condition = row["Faulted If Equal To"]
+            if ok_condition:
+                kinds.append(OK_IF_EQUAL)
+                thresholds.append(float(ok_condition))
+            elif fault_condition:
+                kinds.append(FAULT_IF_EQUAL)
+                thresholds.append(float(fault_condition))
+            else:
+                raise SpreadsheetError(
+                    f"Fault for {row['PV Suffix']} has neither 'Fault if equal to'"
+                    f" nor 'OK if equal to' parameter"
+                )
+
+            rules.append(
+                FaultRule(
+                    index=index,
+                    row=MappingProxyType(dict(row)),
+                    level=level,
+                    prefix=row["PV Prefix"],
+                    suffix=row["PV Suffix"],
+                )
+            )
+
+        self.rules: Tuple[FaultRule, ...] = tuple(rules)
+        self.tlc: np.ndarray = self._frozen(
+            [rule.row["Three Letter Code"] for rule in rules], dtype="U3"
+        )
+        self.severity: np.ndarray = self._frozen(
+            [int(rule.row["Severity"]) for rule in rules], dtype="i4"
+        )
+        self.kind: np.ndarray = self._frozen(kinds, dtype="i1")
+        self.threshold: np.ndarray = self._frozen(thresholds, dtype="f8")
+
+    @staticmethod
+    def _frozen(values: List, dtype: str) -> np.ndarray:
+        array = np.array(values, dtype=dtype)
+        array.setflags(write=False)
+        return array
+
+    def __len__(self):
+        return len(self.rules)
+
+    def __iter__(self):
+        return iter(self.rules)
+
+    def evaluate(
+        self, rule_indices: np.ndarray, values: np.ndarray, severities: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        @param rule_indices: rule for each reading
+        @param values: reading values, NaN if the PV couldn't be read
+        @param severities: reading alarm severities
+        @return: (faulted, invalid) boolean arrays, one entry per reading.
+                 Invalid readings are never reported as faulted
+        """
+        invalid = (severities == EPICS_INVALID_VAL) | np.isnan(values)
+        equal = values == self.threshold[rule_indices]
+        faulted = np.where(self.kind[rule_indices] == OK_IF_EQUAL, ~equal, equal)
+        return faulted & ~invalid, invalid
+
+
+@lru_cache(maxsize=None)
+def get_fault_rule_table() -> FaultRuleTable:
+    """
+    @return: faults.csv compiled once per process
+    """
+    return FaultRuleTable(utils.parse_csv())
+
+
+class CompiledFaults:
+    """
+    Every fault of a group of cavities flattened into arrays, one entry per
+    cavity fault in each cavity's fault order. Readings are taken once per
+    unique PV and the whole group, or just the entries of the cavities that
+    changed, is evaluated in one go
+    """
+
+    def __init__(
+        self,
+        cavities: Iterable["BackendCavity"],
+        table: Optional[FaultRuleTable] = None,
+    ):
+        self.cavities: List["BackendCavity"] = list(cavities)
+        self.table: FaultRuleTable = table or get_fault_rule_table()
+        self.cavity_index: Dict["BackendCavity", int] = {
+            cavity: idx for idx, cavity in enumerate(self.cavities)
+        }
+
+        pv_index: Dict[str, int] = {}
+        self.pv_objs: List[PV] = []
+        self.faults = []
+        rule_indices: List[int] = []
+        cavity_indices: List[int] = []
+        pv_indices: List[int] = []
+
+        for cavity_idx, cavity in enumerate(self.cavities):
+            for fault in cavity.faults.values():
+                if fault.pv not in pv_index:
+                    pv_index[fault.pv] = len(self.pv_objs)
+                    self.pv_objs.append(fault.pv_obj)
+                self.faults.append(fault)
+                rule_indices.append(fault.rule_index)
+                cavity_indices.append(cavity_idx)
+                pv_indices.append(pv_index[fault.pv])
+
+        self.rule_indices: np.ndarray = np.array(rule_indices, dtype=int)
+        self.cavity_indices: np.ndarray = np.array(cavity_indices, dtype=int)
+        self.pv_indices: np.ndarray = np.array(pv_indices, dtype=int)
+
+        # For telemetry: the timestamp of the last update seen from each PV,
+        # how old each PV's update was when the last read first saw it (0 if
+        # it hadn't updated or wasn't read) and whether it was disconnected
+        # the last time it was read
+        self.update_timestamps: np.ndarray = np.zeros(len(self.pv_objs))
+        self.update_latencies: np.ndarray = np.zeros(len(self.pv_objs))
+        self.pv_disconnected: np.ndarray = np.zeros(len(self.pv_objs), dtype=bool)
+
+    @property
+    def disconnected(self) -> int:
+        return int(self.pv_disconnected.sum())
+
+    def entries(self, cavities: Iterable["BackendCavity"]) -> np.ndarray:
+        """
+        @return: indices of the given cavities' fault entries, in entry order
+        """
+        cavity_idxs = [self.cavity_index[cavity] for cavity in cavities]
+        return np.flatnonzero(np.isin(self.cavity_indices, cavity_idxs))
+
+    def read(
+        self, pv_idxs: Optional[np.ndarray] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        @param pv_idxs: unique PVs to read, every one if None
+        @return: (values, severities) for every unique PV from the PV objects'
+                 monitored values, NaN and INVALID for disconnected PVs and
+                 the ones not read
+        """
+        values = np.full(len(self.pv_objs), np.nan)
+        severities = np.full(len(self.pv_objs), EPICS_INVALID_VAL)
+        latencies = np.zeros(len(self.pv_objs))
+        now = time.time()
+        if pv_idxs is None:
+            pv_idxs = range(len(self.pv_objs))
+
+        for idx in pv_idxs:
+            pv_obj = self.pv_objs[idx]
+            self.pv_disconnected[idx] = pv_obj.status is None
+            if self.pv_disconnected[idx]:
+                continue
+            try:
+                values[idx] = pv_obj.val
+                severities[idx] = pv_obj.severity
+            except (TypeError, ValueError):
+                values[idx] = np.nan
+
+            timestamp = pv_obj.timestamp
+            if timestamp and timestamp > self.update_timestamps[idx]:
+                latencies[idx] = max(now - timestamp, 0)
+                self.update_timestamps[idx] = timestamp
+
+        self.update_latencies = latencies
+        return values, severities
+
+    def slowest(
+        self, count: int
+    ) -> Tuple[List[Tuple[str, float]], List[Tuple[str, float]]]:
+        """
+        @param count: max entries to return of each
+        @return: ([(cavity, seconds)], [(fault PV, seconds)]) with the longest
+                 delays between a fault PV update and the last read picking it
+                 up, slowest first. A cavity's delay is its slowest fault's
+        """
+        cavity_latencies = np.zeros(len(self.cavities))
+        np.maximum.at(
+            cavity_latencies,
+            self.cavity_indices,
+            self.update_latencies[self.pv_indices],
+        )
+        slowest_cavities = np.argsort(cavity_latencies)[::-1][:count]
+        slowest_pvs = np.argsort(self.update_latencies)[::-1][:count]
+        return (
+            [
+                (str(self.cavities[idx]), cavity_latencies[idx])
+                for idx in slowest_cavities
+                if cavity_latencies[idx] > 0
+            ],
+            [
+                (self.pv_objs[idx].pvname, self.update_latencies[idx])
+                for idx in slowest_pvs
+                if self.update_latencies[idx] > 0
+            ],
+        )
+
+    def evaluate(
+        self,
+        values: Optional[np.ndarray] = None,
+        severities: Optional[np.ndarray] = None,
+        entries: Optional[np.ndarray] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        @param values: per unique PV, read from the PV objects if None
+        @param severities: per unique PV, read from the PV objects if None
+        @param entries: fault entries to evaluate (see entries), every one if
+                        None. Only the PVs they use are read
+        @return: (first, invalid) per cavity: the entry index of its first
+                 faulted or invalid fault (-1 if it's OK or wasn't evaluated)
+                 and whether that fault is invalid
+        """
+        if entries is None:
+            entries = np.arange(len(self.faults))
+        pv_indices = self.pv_indices[entries]
+        if values is None or severities is None:
+            values, severities = self.read(np.unique(pv_indices))
+
+        faulted, invalid = self.table.evaluate(
+            self.rule_indices[entries], values[pv_indices], severities[pv_indices]
+        )
+
+        # entries are grouped by cavity in order, so the first hit per cavity
+        # is its first fault
+        hits = np.flatnonzero(faulted | invalid)
+        cavities_hit, first_hits = np.unique(
+            self.cavity_indices[entries[hits]], return_index=True
+        )
+        first = np.full(len(self.cavities), -1)
+        first[cavities_hit] = entries[hits[first_hits]]
+        first_invalid = np.zeros(len(self.cavities), dtype=bool)
+        first_invalid[cavities_hit] = invalid[hits[first_hits]]
+        return first, first_invalid
+
+    def publish(self, cavities: Optional[Iterable["BackendCavity"]] = None):
+        """
+        Evaluates and writes the status of the given cavities, only reading
+        and evaluating their own faults
+        @param cavities: cavities to publish, every cavity if None
+        """
+        if cavities is None:
+            cavities = self.cavities
+            first, invalid = self.evaluate()
+        else:
+            cavities = list(cavities)
+            first, invalid = self.evaluate(entries=self.entries(cavities))
+
+        for cavity in cavities:
+            idx = self.cavity_index[cavity]
+            fault = self.faults[first[idx]] if first[idx] >= 0 else None
+            cavity.publish_status(fault, invalid=bool(invalid[idx]))
@@ -1,4 +1,5 @@
 import sys
+import time
 from datetime import datetime
 from time import sleep
 from typing import List, Optional
@@ -8,15 +9,38 @@ from lcls_tools.common.controls.pyepics.utils import PV
 sys.path.append("/home/physics/srf/sc_linac_physics")
 from displays.cavity_display.backend.backend_machine import BackendMachine  # noqa: E402
 from displays.cavity_display.backend.backend_cavity import BackendCavity  # noqa: E402
-from displays.cavity_display.utils.utils import DEBUG, BACKEND_SLEEP_TIME  # noqa: E402
+from displays.cavity_display.backend.fault_engine import FaultEngine  # noqa: E402
+from displays.cavity_display.backend.fault_rules import CompiledFaults  # noqa: E402
+from displays.cavity_display.backend.runner_telemetry import (  # noqa: E402
+    CycleStats,
+    RunnerTelemetry,
+)
+from displays.cavity_display.backend.status_publisher import (  # noqa: E402
+    StatusPublisher,
+)
+from displays.cavity_display.utils.utils import (  # noqa: E402
+    DEBUG,
+    BACKEND_SLEEP_TIME,
+    BACKEND_HEARTBEAT_PERIOD,
+    BACKEND_TELEMETRY_SLOWEST,
+)
 
 
 class Runner:
     def __init__(self, lazy_fault_pvs=False):
         self.watcher_pv = "PHYS:SYS0:1:SC_CAV_FAULT_HEARTBEAT"
         self._watcher_pv_obj: Optional[PV] = None
-        self.backend_cavities: List[BackendCavity] = list(
-            BackendMachine(lazy_fault_pvs=lazy_fault_pvs).all_iterator
+        self.status_publisher: StatusPublisher = StatusPublisher()
+        self.machine: BackendMachine = BackendMachine(
+            lazy_fault_pvs=lazy_fault_pvs, status_publisher=self.status_publisher
+        )
+        self.backend_cavities: List[BackendCavity] = list(self.machine.all_iterator)
+        self._compiled_faults: Optional[CompiledFaults] = None
+        self.telemetry: RunnerTelemetry = RunnerTelemetry()
+        self._last_heartbeat: float = 0
+        self.engine: FaultEngine = FaultEngine(
+            self.backend_cavities,
+            publish=self.publish_statuses,
         )
 
     @property
@@ -25,21 +49,76 @@ class Runner:
             self._watcher_pv_obj = PV(self.watcher_pv)
         return self._watcher_pv_obj
 
+    @property
+    def compiled_faults(self) -> CompiledFaults:
+        if not self._compiled_faults:
+            self._compiled_faults = CompiledFaults(self.backend_cavities)
+        return self._compiled_faults
+
+    def publish_statuses(self, cavities: Optional[List[BackendCavity]] = None):
+        """
+        Evaluates the faults of the given cavities (all of them if None) at
+        once, writes the statuses that changed and records the cycle's
+        telemetry
+        """
+        start = time.perf_counter()
+        self.compiled_faults.publish(cavities)
+        self.status_publisher.flush()
+        duration = time.perf_counter() - start
+
+        slowest_cavities, slowest_faults = self.compiled_faults.slowest(
+            BACKEND_TELEMETRY_SLOWEST
+        )
+        self.telemetry.record(
+            CycleStats(
+                timestamp=time.time(),
+                duration=duration,
+                evaluated=len(self.backend_cavities if cavities is None else cavities),
+                disconnected=self.compiled_faults.disconnected,
+                slowest_cavities=slowest_cavities,
+                slowest_faults=slowest_faults,
+            )
+        )
+
     def check_faults(self):
         start = datetime.now()
-        for cavity in self.backend_cavities:
-            cavity.run_through_faults()
+        self.publish_statuses()
         if DEBUG:
             delta = (datetime.now() - start).total_seconds()
             sleep(BACKEND_SLEEP_TIME - delta if delta < BACKEND_SLEEP_TIME else 0)
+        self.update_heartbeat()
+
+    def update_heartbeat(self):
+        try:
+            self.telemetry.publish()
+        except Exception as e:
+            # telemetry is best effort and never holds up the heartbeat
+            print(f"Telemetry publish failed with error: {e}")
         try:
             self.watcher_pv_obj.put(self.watcher_pv_obj.get() + 1)
         except TypeError as e:
             print(f"Write to watcher PV failed with error: {e}")
 
+    def process_updates(self):
+        """
+        One pass of the monitor driven loop: publishes every cavity whose
+        faults changed (waiting until the next heartbeat is due for one to)
+        in one flush of the status writes that changed, then the telemetry
+        and the heartbeat at most once per heartbeat period
+        """
+        self.engine.start()
+        # never wait past when the next heartbeat is due
+        next_heartbeat = self._last_heartbeat + BACKEND_HEARTBEAT_PERIOD
+        self.engine.process_pending(timeout=max(next_heartbeat - time.monotonic(), 0))
+
+        now = time.monotonic()
+        if now - self._last_heartbeat >= BACKEND_HEARTBEAT_PERIOD:
+            self._last_heartbeat = now
+            self.update_heartbeat()
+
 
 if __name__ == "__main__":
     runner = Runner(lazy_fault_pvs=False)
     runner.watcher_pv_obj.put(0)
     while True:
-        runner.check_faults()
+        runner.process_updates()
@@ -0,0 +1,170 @@
+import dataclasses
+import json
+import logging
+import os
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+import numpy as np
+from lcls_tools.common.controls.pyepics.utils import PV
+
+from displays.cavity_display.utils.utils import (
+    BACKEND_METRICS_LOG,
+    BACKEND_METRICS_LOG_PERIOD,
+    BACKEND_TELEMETRY_WINDOW,
+)
+from utils.sc_linac.pv_batch import write_pvs
+
+TELEMETRY_PREFIX = "PHYS:SYS0:1:SC_CAV_FAULT_"
+
+# Telemetry PV suffixes
+CYCLE_TIME_SUFFIX = "CYCLE_TIME"
+CYCLE_P50_SUFFIX = "CYCLE_P50"
+CYCLE_P95_SUFFIX = "CYCLE_P95"
+CYCLE_MAX_SUFFIX = "CYCLE_MAX"
+EVAL_RATE_SUFFIX = "EVAL_RATE"
+DISCONNECTED_SUFFIX = "DISCONNECTED"
+SLOWEST_CAVITY_SUFFIX = "SLOWEST_CAV"
+SLOWEST_FAULT_SUFFIX = "SLOWEST_FAULT"
+
+
+@dataclasses.dataclass
+class CycleStats:
+    timestamp: float
+    # Seconds spent evaluating and publishing statuses
+    duration: float
+    # Number of cavities evaluated
+    evaluated: int
+    disconnected: int
+    # (name, seconds) between a fault PV update and the cycle that used it
+    slowest_cavities: List[Tuple[str, float]] = dataclasses.field(default_factory=list)
+    slowest_faults: List[Tuple[str, float]] = dataclasses.field(default_factory=list)
+
+
+class RunnerTelemetry:
+    """
+    Rolling stats over the fault runner's last cycles (cycle time percentiles,
+    cavities evaluated per second, disconnected fault PVs and the cavities and
+    faults whose updates took longest to be picked up), published to PVs next
+    to the heartbeat and periodically appended to a local metrics log as JSON
+    lines. Only the telemetry PVs that are connected get written, so an IOC
+    without them doesn't cost the runner anything
+    """
+
+    def __init__(
+        self,
+        prefix: str = TELEMETRY_PREFIX,
+        window: int = BACKEND_TELEMETRY_WINDOW,
+        log_path: Optional[str] = BACKEND_METRICS_LOG,
+        log_period: float = BACKEND_METRICS_LOG_PERIOD,
+    ):
+        """
+        @param prefix: PV prefix for the telemetry PVs
+        @param window: number of cycles the rolling stats are taken over
+        @param log_path: metrics log file, no log if None
+        @param log_period: seconds between metrics log entries
+        """
+        self.prefix: str = prefix
+        self.cycles: Deque[CycleStats] = deque(maxlen=window)
+        self.log_path: Optional[str] = log_path
+        self.log_period: float = log_period
+
+        self._pv_objs: Dict[str, PV] = {}
+        self._logger: Optional[logging.Logger] = None
+        self._last_log: float = 0
+
+    def pv_obj(self, suffix: str) -> PV:
+        if suffix not in self._pv_objs:
+            self._pv_objs[suffix] = PV(self.prefix + suffix)
+        return self._pv_objs[suffix]
+
+    @property
+    def logger(self) -> logging.Logger:
+        if not self._logger:
+            os.makedirs(os.path.dirname(self.log_path) or ".", exist_ok=True)
+            handler = logging.FileHandler(self.log_path, mode="a")
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            self._logger = logging.getLogger(f"{__name__}.{self.log_path}")
+            self._logger.setLevel(logging.INFO)
+            self._logger.propagate = False
+            self._logger.addHandler(handler)
+        return self._logger
+
+    def record(self, stats: CycleStats):
+        self.cycles.append(stats)
+
+    @property
+    def latest(self) -> Optional[CycleStats]:
+        return self.cycles[-1] if self.cycles else None
+
+    def percentile(self, percent: float) -> float:
+        """
+        @param percent: 0-100
+        @return: cycle duration percentile over the window, 0 with no cycles
+        """
+        if not self.cycles:
+            return 0
+        return float(np.percentile([c.duration for c in self.cycles], percent))
+
+    @property
+    def evaluation_rate(self) -> float:
+        """
+        @return: cavities evaluated per second of wall time over the window
+        """
+        if len(self.cycles) < 2:
+            return 0
+        elapsed = self.cycles[-1].timestamp - self.cycles[0].timestamp
+        if elapsed <= 0:
+            return 0
+        # the first cycle's evaluations happened before the window started
+        return sum(c.evaluated for c in list(self.cycles)[1:]) / elapsed
+
+    def summary(self) -> Dict:
+        latest = self.latest
+        return {
+            "timestamp": latest.timestamp if latest else time.time(),
+            "cycles": len(self.cycles),
+            "cycle_time": latest.duration if latest else 0,
+            "cycle_p50": self.percentile(50),
+            "cycle_p95": self.percentile(95),
+            "cycle_max": self.percentile(100),
+            "evaluation_rate": self.evaluation_rate,
+            "disconnected": latest.disconnected if latest else 0,
+            "slowest_cavities": latest.slowest_cavities if latest else [],
+            "slowest_faults": latest.slowest_faults if latest else [],
+        }
+
+    def publish(self):
+        """
+        Writes the current stats to the connected telemetry PVs, and to the
+        metrics log if it's been log_period seconds since the last entry
+        """
+        if not self.cycles:
+            return
+
+        summary = self.summary()
+        slowest_cavity = summary["slowest_cavities"][:1]
+        slowest_fault = summary["slowest_faults"][:1]
+        writes = [
+            (self.pv_obj(CYCLE_TIME_SUFFIX), summary["cycle_time"]),
+            (self.pv_obj(CYCLE_P50_SUFFIX), summary["cycle_p50"]),
+            (self.pv_obj(CYCLE_P95_SUFFIX), summary["cycle_p95"]),
+            (self.pv_obj(CYCLE_MAX_SUFFIX), summary["cycle_max"]),
+            (self.pv_obj(EVAL_RATE_SUFFIX), summary["evaluation_rate"]),
+            (self.pv_obj(DISCONNECTED_SUFFIX), summary["disconnected"]),
+            (self.pv_obj(SLOWEST_CAVITY_SUFFIX), self.describe(slowest_cavity)),
+            (self.pv_obj(SLOWEST_FAULT_SUFFIX), self.describe(slowest_fault)),
+        ]
+        write_pvs([(pv_obj, value) for pv_obj, value in writes if pv_obj.connected])
+
+        now = time.monotonic()
+        if self.log_path and now - self._last_log >= self.log_period:
+            self._last_log = now
+            self.logger.info(json.dumps(summary))
+
+    @staticmethod
+    def describe(entries: List[Tuple[str, float]]) -> str:
+        description = ", ".join(f"{name} {secs * 1000:.1f}ms" for name, secs in entries)
+        # String PVs are limited to 40 characters
+        return description[:40]
@@ -0,0 +1,95 @@
+import threading
+from functools import partial
+from typing import Dict, List, Set, Tuple, TYPE_CHECKING
+
+from lcls_tools.common.controls.pyepics.utils import PV
+
+from utils.sc_linac.pv_batch import write_pvs
+
+if TYPE_CHECKING:
+    from displays.cavity_display.backend.backend_cavity import BackendCavity
+
+# (status, severity, description) as written to CUDSTATUS, CUDSEVR and CUDDESC
+StatusTriple = Tuple[str, int, str]
+
+
+class StatusPublisher:
+    """
+    Keeps the last status published for every cavity and only writes the
+    fields that changed. Statuses queued during a cycle are coalesced (the
+    latest one per cavity wins) and written together by flush, so the number
+    of puts, and the display clients woken by them, follows the number of
+    changes instead of the number of cavities. A cavity's last status is
+    forgotten whenever one of its status PVs disconnects or reconnects (i.e.
+    an IOC restart that reset the records), so the next status queued for it
+    is written in full
+    """
+
+    def __init__(self):
+        self.published: Dict["BackendCavity", StatusTriple] = {}
+        self._pending: Dict["BackendCavity", StatusTriple] = {}
+        self._watched: Set["BackendCavity"] = set()
+        self._lock = threading.Lock()
+
+        # Individual PV writes made and skipped since the publisher was created
+        self.sent: int = 0
+        self.suppressed: int = 0
+
+    def queue(
+        self, cavity: "BackendCavity", status: str, severity: int, description: str
+    ):
+        with self._lock:
+            if cavity in self._pending:
+                # never got written, superseded within the same cycle
+                self.suppressed += len(self._pending[cavity])
+            self._pending[cavity] = (status, severity, description)
+
+    def forget(self, cavity: "BackendCavity", **kwargs):
+        """
+        Connection callback for the cavity's status PVs, only drops the last
+        published status since no CA calls should be made from the callback
+        thread
+        """
+        with self._lock:
+            self.published.pop(cavity, None)
+
+    def watch(self, cavity: "BackendCavity", pv_objs: Tuple[PV, PV, PV]):
+        if cavity in self._watched:
+            return
+        self._watched.add(cavity)
+        for pv_obj in pv_objs:
+            pv_obj.connection_callbacks.append(partial(self.forget, cavity))
+
+    def flush(self) -> int:
+        """
+        Writes every queued status field that differs from what was last
+        published for its cavity
+        @return: number of PV writes made
+        """
+        with self._lock:
+            pending = self._pending
+            self._pending = {}
+
+        writes: List[Tuple[PV, object]] = []
+        skipped = 0
+        for cavity, triple in pending.items():
+            pv_objs = (
+                cavity.status_pv_obj,
+                cavity.severity_pv_obj,
+                cavity.description_pv_obj,
+            )
+            self.watch(cavity, pv_objs)
+            with self._lock:
+                last = self.published.get(cavity)
+                self.published[cavity] = triple
+            for idx, (pv_obj, value) in enumerate(zip(pv_objs, triple)):
+                if last is not None and last[idx] == value:
+                    skipped += 1
+                else:
+                    writes.append((pv_obj, value))
+
+        write_pvs(writes)
+        with self._lock:
+            self.sent += len(writes)
+            self.suppressed += skipped
+        return len(writes)
@@ -40,10 +40,14 @@ class CavityDisplayGUI(Display):
 
         heartbeat_label = PyDMLabel(init_channel="ALRM:SYS0:SC_CAV_FAULT:ALHBERR")
         heartbeat_counter = PyDMLabel(init_channel="PHYS:SYS0:1:SC_CAV_FAULT_HEARTBEAT")
+        cycle_time_label = PyDMLabel(init_channel="PHYS:SYS0:1:SC_CAV_FAULT_CYCLE_P95")
+        cycle_time_label.showUnits = True
+        cycle_time_label.setToolTip("95th percentile of the backend's cycle time")
 
         self.header.addWidget(heartbeat_indicator)
         self.header.addWidget(heartbeat_label)
         self.header.addWidget(heartbeat_counter)
+        self.header.addWidget(cycle_time_label)
         self.header.addStretch()
 
         self.decoder_window: DecoderDisplay = DecoderDisplay()
@@ -5,6 +5,21 @@ from typing import Dict, List
 
 DEBUG = False
 BACKEND_SLEEP_TIME = 10
+# Seconds between full passes over every cavity when running off monitors,
+# as a safety net for any update that got lost
+BACKEND_FULL_SWEEP_PERIOD = 60
+# Max seconds the monitor driven backend goes without bumping the heartbeat,
+# also the min seconds between heartbeat and telemetry writes
+BACKEND_HEARTBEAT_PERIOD = 1
+# Seconds the monitor driven backend keeps collecting updates after the first
+# one before publishing them together
+BACKEND_BATCH_WINDOW = 0.1
+# Runner telemetry: cycles kept for the rolling stats, how many of the
+# slowest cavities/faults to report and seconds between metrics log entries
+BACKEND_TELEMETRY_WINDOW = 300
+BACKEND_TELEMETRY_SLOWEST = 5
+BACKEND_METRICS_LOG_PERIOD = 60
+BACKEND_METRICS_LOG = "logfiles/cavity_fault_runner_metrics.log"
 
 STATUS_SUFFIX = "CUDSTATUS"
 SEVERITY_SUFFIX = "CUDSEVR"
@@ -1,9 +1,10 @@
 import random
+import threading
 from random import choice, randint
 from unittest.mock import MagicMock
 
 import pytest
-from lcls_tools.common.controls.pyepics.utils import make_mock_pv
+from lcls_tools.common.controls.pyepics.utils import EPICS_INVALID_VAL, make_mock_pv
 
 from applications.auto_setup.backend.setup_cavity import SetupCavity
 from applications.auto_setup.backend.setup_utils import (
@@ -13,6 +14,8 @@ from applications.auto_setup.backend.setup_utils import (
 )
 from utils.sc_linac.linac_utils import (
     CavityAbortError,
+    QuenchError,
+    TUNE_CONFIG_RESONANCE_VALUE,
     RF_MODE_SELA,
     HW_MODE_MAINTENANCE_VALUE,
     HW_MODE_OFFLINE_VALUE,
@@ -20,11 +23,15 @@ from utils.sc_linac.linac_utils import (
     HW_MODE_READY_VALUE,
     HW_MODE_ONLINE_VALUE,
 )
+from utils.sc_linac.parallel import run_parallel
 from utils.sc_linac.ssa import SSA
 
 
 @pytest.fixture
-def cavity():
+def cavity(monkeypatch, tmp_path):
+    monkeypatch.setattr(
+        "utils.sc_linac.linac_utils.SETUP_CHECKPOINT_DIR", str(tmp_path)
+    )
     cavity = SetupCavity(cavity_num=randint(1, 8), rack_object=MagicMock())
     cavity.ssa = SSA(cavity)
     yield cavity
@@ -96,6 +103,36 @@ def test_check_abort(cavity):
     cavity.clear_abort.assert_called()
 
 
+def test_check_abort_flag(cavity):
+    cavity._abort_pv_obj = make_mock_pv(get_val=False)
+    cavity.turn_off = MagicMock()
+    cavity.request_abort()
+    with pytest.raises(CavityAbortError):
+        cavity.check_abort()
+    cavity.turn_off.assert_called()
+    assert not cavity.abort_flag
+
+
+def test_parallel_timeout_stops_setup(cavity):
+    cavity._abort_pv_obj = make_mock_pv(get_val=False)
+    cavity.turn_off = MagicMock()
+    aborted = threading.Event()
+
+    def long_setup(cav: SetupCavity):
+        for _ in range(500):
+            try:
+                cav.check_abort()
+            except CavityAbortError:
+                aborted.set()
+                raise
+            threading.Event().wait(0.01)
+
+    report = run_parallel(long_setup, [cavity], timeout=0.05)
+    assert report.timed_out == [cavity]
+    assert aborted.is_set()
+    cavity.turn_off.assert_called()
+
+
 def test_shut_down(cavity):
     cavity.clear_abort = MagicMock()
     cavity._status_pv_obj = make_mock_pv(get_val=STATUS_READY_VALUE)
@@ -136,12 +173,12 @@ def test_request_ssa_cal_true(cavity):
     cavity._status_msg_pv_obj = make_mock_pv()
     cavity.turn_off = MagicMock()
     cavity.ssa.calibrate = MagicMock()
-    cavity.ssa._saved_drive_max_pv_obj = make_mock_pv()
+    cavity.ssa._saved_drive_max_pv_obj = make_mock_pv(get_val=0.8)
 
     cavity.request_ssa_cal()
     cavity._ssa_cal_requested_pv_obj.get.assert_called()
     cavity.turn_off.assert_called()
-    cavity.ssa.calibrate.assert_called()
+    cavity.ssa.calibrate.assert_called_with(0.8, attempt=2, force=True)
     cavity.ssa._saved_drive_max_pv_obj.get.assert_called()
     cavity._status_msg_pv_obj.put.assert_called()
     cavity._progress_pv_obj.put.assert_called()
@@ -203,7 +240,7 @@ def test_request_characterization_true(cavity):
 
     cavity.request_characterization()
     cavity._cav_char_requested_pv_obj.get.assert_called()
-    cavity.characterize.assert_called()
+    cavity.characterize.assert_called_with(force=True)
     cavity._calc_probe_q_pv_obj.put.assert_called()
     cavity._cav_char_requested_pv_obj.get.assert_called()
     cavity._progress_pv_obj.put.assert_called()
@@ -320,9 +357,17 @@ def test_setup(cavity):
     cavity.request_ramp = MagicMock()
     cavity.clear_abort = MagicMock()
     cavity._progress_pv_obj = make_mock_pv()
+    cavity._acon_pv_obj = make_mock_pv(get_val=16)
     cavity.turn_off = MagicMock()
     cavity.ssa.turn_on = MagicMock()
     cavity.reset_interlocks = MagicMock()
+    cavity.check_abort = MagicMock()
+    cavity._ssa_cal_requested_pv_obj = make_mock_pv(get_val=False)
+    cavity._cav_char_requested_pv_obj = make_mock_pv(get_val=False)
+    cavity.ssa_calibration_done = MagicMock(return_value=False)
+    cavity.tuning_done = MagicMock(return_value=False)
+    cavity.characterization_done = MagicMock(return_value=False)
+    cavity.ramp_done = MagicMock(return_value=False)
 
     cavity.setup()
     cavity._status_pv_obj.get.assert_called()
@@ -337,3 +382,113 @@ def test_setup(cavity):
     cavity.reset_interlocks.assert_called()
     cavity._status_pv_obj.put.assert_called_with(STATUS_READY_VALUE)
     cavity._progress_pv_obj.put.assert_called_with(100)
+
+
+def test_setup_resume(cavity):
+    cavity._status_pv_obj = make_mock_pv(get_val=STATUS_READY_VALUE)
+    cavity._hw_mode_pv_obj = make_mock_pv(get_val=HW_MODE_ONLINE_VALUE)
+    cavity._status_msg_pv_obj = make_mock_pv()
+    cavity._progress_pv_obj = make_mock_pv()
+    cavity._acon_pv_obj = make_mock_pv(get_val=16)
+    cavity.clear_abort = MagicMock()
+    cavity.turn_off = MagicMock()
+    cavity.ssa.turn_on = MagicMock()
+    cavity.reset_interlocks = MagicMock()
+    cavity.request_ssa_cal = MagicMock()
+    cavity.request_auto_tune = MagicMock()
+    cavity.request_characterization = MagicMock(side_effect=CavityAbortError)
+    cavity.request_ramp = MagicMock()
+    cavity.check_abort = MagicMock()
+    cavity._ssa_cal_requested_pv_obj = make_mock_pv(get_val=False)
+    cavity._cav_char_requested_pv_obj = make_mock_pv(get_val=False)
+    cavity.ssa_calibration_done = MagicMock(return_value=True)
+    cavity.tuning_done = MagicMock(return_value=False)
+    cavity.characterization_done = MagicMock(return_value=False)
+    cavity.ramp_done = MagicMock(return_value=False)
+
+    cavity.setup()
+    cavity.request_ssa_cal.assert_not_called()
+    cavity.request_auto_tune.assert_called_once()
+    cavity.request_ramp.assert_not_called()
+    cavity._status_pv_obj.put.assert_called_with(STATUS_ERROR_VALUE)
+
+    cavity.tuning_done.return_value = True
+    cavity.request_characterization.side_effect = None
+    cavity.setup()
+    cavity.request_auto_tune.assert_called_once()
+    cavity.request_characterization.assert_called()
+    cavity.request_ramp.assert_called()
+    cavity.ramp_done.assert_called_with(16)
+    cavity._status_pv_obj.put.assert_called_with(STATUS_READY_VALUE)
+
+
+def test_setup_resume_rf_off(cavity):
+    cavity._status_pv_obj = make_mock_pv(get_val=STATUS_READY_VALUE)
+    cavity._hw_mode_pv_obj = make_mock_pv(get_val=HW_MODE_ONLINE_VALUE)
+    cavity._status_msg_pv_obj = make_mock_pv()
+    cavity._progress_pv_obj = make_mock_pv()
+    cavity._acon_pv_obj = make_mock_pv(get_val=16)
+    cavity._ssa_cal_requested_pv_obj = make_mock_pv(get_val=True)
+    cavity._cav_char_requested_pv_obj = make_mock_pv(get_val=True)
+    cavity._tune_config_pv_obj = make_mock_pv(get_val=TUNE_CONFIG_RESONANCE_VALUE)
+    cavity.clear_abort = MagicMock()
+    cavity.turn_off = MagicMock()
+    cavity.ssa.turn_on = MagicMock()
+    cavity.reset_interlocks = MagicMock()
+    cavity.check_abort = MagicMock()
+    cavity.request_ssa_cal = MagicMock()
+    cavity.request_auto_tune = MagicMock()
+    cavity.request_characterization = MagicMock()
+    cavity.request_ramp = MagicMock(side_effect=QuenchError)
+    # Everything measured with the cavity off: nothing but the ledger holds
+    cavity._rf_state_pv_obj = make_mock_pv(get_val=0)
+    cavity._rf_mode_pv_obj = make_mock_pv(get_val=RF_MODE_SELA)
+    cavity._detune_best_pv_obj = make_mock_pv()
+    cavity._detune_best_pv_obj.severity = EPICS_INVALID_VAL
+    cavity.ssa_calibration_done = MagicMock(return_value=False)
+    cavity.characterization_done = MagicMock(return_value=False)
+
+    cavity.setup()
+    cavity._status_pv_obj.put.assert_called_with(STATUS_ERROR_VALUE)
+
+    # The ramp failed, everything before it got done
+    cavity.ssa_calibration_done.return_value = True
+    cavity.characterization_done.return_value = True
+    cavity.request_ramp.side_effect = None
+    cavity.setup()
+    cavity.request_ssa_cal.assert_called_once()
+    cavity.request_auto_tune.assert_called_once()
+    cavity.request_characterization.assert_called_once()
+    assert cavity.request_ramp.call_count == 2
+    cavity._status_pv_obj.put.assert_called_with(STATUS_READY_VALUE)
+
+
+def test_setup_requested_calibrations_not_skipped(cavity):
+    cavity._status_pv_obj = make_mock_pv(get_val=STATUS_READY_VALUE)
+    cavity._hw_mode_pv_obj = make_mock_pv(get_val=HW_MODE_ONLINE_VALUE)
+    cavity._status_msg_pv_obj = make_mock_pv()
+    cavity._progress_pv_obj = make_mock_pv()
+    cavity._acon_pv_obj = make_mock_pv(get_val=16)
+    cavity.clear_abort = MagicMock()
+    cavity.turn_off = MagicMock()
+    cavity.ssa.turn_on = MagicMock()
+    cavity.reset_interlocks = MagicMock()
+    cavity.request_ssa_cal = MagicMock()
+    cavity.request_auto_tune = MagicMock()
+    cavity.request_characterization = MagicMock()
+    cavity.request_ramp = MagicMock()
+    cavity.check_abort = MagicMock()
+    cavity._ssa_cal_requested_pv_obj = make_mock_pv(get_val=True)
+    cavity._cav_char_requested_pv_obj = make_mock_pv(get_val=True)
+    # Recent and still in use according to the ledger
+    cavity.ssa_calibration_done = MagicMock(return_value=True)
+    cavity.characterization_done = MagicMock(return_value=True)
+    cavity.tuning_done = MagicMock(return_value=True)
+    cavity.ramp_done = MagicMock(return_value=True)
+
+    cavity.setup()
+    cavity.request_ssa_cal.assert_called_once()
+    cavity.request_characterization.assert_called_once()
+    cavity.request_auto_tune.assert_not_called()
+    cavity.request_ramp.assert_not_called()
+    cavity._status_pv_obj.put.assert_called_with(STATUS_READY_VALUE)
@@ -10,6 +10,7 @@ from lcls_tools.common.controls.pyepics.utils import make_mock_pv
 
 from displays.cavity_display.backend.backend_cavity import BackendCavity
 from displays.cavity_display.backend.fault import FaultCounter, Fault
+from displays.cavity_display.backend.fault_rules import get_fault_rule_table
 from tests.displays.cavity_display.test_utils.utils import mock_parse
 
 
@@ -20,7 +21,9 @@ def cavity():
     rack.rack_name = "A" if cav_num <= 4 else "B"
 
     rack.cryomodule.linac.machine.lazy_fault_pvs = True
+    rack.cryomodule.linac.machine.status_publisher = None
     with patch("displays.cavity_display.utils.utils.parse_csv", mock_parse):
+        get_fault_rule_table.cache_clear()
         cavity = BackendCavity(cavity_num=cav_num, rack_object=rack)
         cavity._status_pv_obj = make_mock_pv()
         cavity._severity_pv_obj = make_mock_pv()
@@ -29,6 +32,7 @@ def cavity():
             fault.is_currently_faulted = MagicMock(return_value=False)
 
         yield cavity
+    get_fault_rule_table.cache_clear()
 
 
 def test_create_faults(cavity):
@@ -125,3 +129,28 @@ def test_run_through_faults_faulted(cavity):
     cavity._status_pv_obj.put.assert_called_with(faulted_fault.tlc)
     cavity._severity_pv_obj.put.assert_called_with(faulted_fault.severity)
     cavity._description_pv_obj.put.assert_called_with(faulted_fault.short_description)
+
+
+def test_create_faults_rule_index(cavity):
+    for fault in cavity.faults.values():
+        rule = get_fault_rule_table().rules[fault.rule_index]
+        assert rule.row["Three Letter Code"] == fault.tlc
+        assert rule.row["Short Description"] == fault.short_description
+
+
+def test_publish_status_invalid(cavity):
+    fault: Fault = choice(list(cavity.faults.values()))
+    cavity.publish_status(fault, invalid=True)
+
+    cavity._status_pv_obj.put.assert_called_with(fault.tlc)
+    cavity._severity_pv_obj.put.assert_called_with(3)
+    cavity._description_pv_obj.put.assert_called_with(fault.short_description)
+
+
+def test_publish_status_queued(cavity):
+    publisher = MagicMock()
+    cavity.rack.cryomodule.linac.machine.status_publisher = publisher
+    cavity.publish_status(None)
+
+    publisher.queue.assert_called_once_with(cavity, str(cavity.number), 0, " ")
+    cavity._status_pv_obj.put.assert_not_called()
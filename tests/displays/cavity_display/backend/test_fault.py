@@ -10,7 +10,7 @@ from lcls_tools.common.controls.pyepics.utils import (
 )
 from lcls_tools.common.data.archiver import ArchiverValue, ArchiveDataHandler
 
-from displays.cavity_display.backend.fault import FaultCounter, Fault
+from displays.cavity_display.backend.fault import FaultCounter, Fault, FaultPVRegistry
 
 archiver_value = ArchiverValue()
 get_data_at_time_mock = MagicMock(return_value={"PV": archiver_value})
@@ -131,3 +131,31 @@ class TestFaultCounter(TestCase):
             self.assertTrue(self.fault_counter == self.fault_counter2)
         else:
             self.assertFalse(self.fault_counter == self.fault_counter2)
+
+
+class TestFaultPVRegistry(TestCase):
+    def setUp(self):
+        self.registry = FaultPVRegistry()
+        self.faults = [
+            Fault(severity=0, pv="PV", ok_value="1", pv_registry=self.registry)
+            for _ in range(3)
+        ]
+
+    @patch("displays.cavity_display.backend.fault.PV")
+    def test_pv_obj_shared(self, pv_class):
+        self.assertIs(self.faults[0].pv_obj, self.faults[1].pv_obj)
+        Fault(severity=0, pv="OTHER", pv_registry=self.registry).pv_obj
+        self.assertEqual(pv_class.call_count, 2)
+        self.assertEqual(len(self.registry), 2)
+
+    def test_evaluated_every_time(self):
+        pv = make_mock_pv()
+        pv.val = 0
+        self.registry._pv_objs["PV"] = pv
+
+        self.assertTrue(all(fault.is_currently_faulted() for fault in self.faults))
+        pv.val = 1
+        self.assertFalse(self.faults[0].is_currently_faulted())
+
+        pv.severity = EPICS_INVALID_VAL
+        self.assertRaises(PVInvalidError, self.faults[1].is_currently_faulted)
@@ -0,0 +1,117 @@
+import threading
+from unittest.mock import MagicMock
+
+import pytest
+from lcls_tools.common.controls.pyepics.utils import make_mock_pv
+
+from displays.cavity_display.backend.fault_engine import FaultEngine
+
+SHARED_PV = "ALL:SUMMARY"
+
+
+def make_cavity(number: int) -> MagicMock:
+    cavity = MagicMock()
+    cavity.faults = {
+        idx: MagicMock(pv=f"CAV{number}:PV{idx}", pv_obj=make_mock_pv())
+        for idx in range(2)
+    }
+    cavity.faults[2] = MagicMock(pv=SHARED_PV, pv_obj=make_mock_pv())
+    return cavity
+
+
+@pytest.fixture
+def engine() -> FaultEngine:
+    engine = FaultEngine(
+        [make_cavity(number) for number in range(3)],
+        full_sweep_period=1000,
+        batch_window=0,
+    )
+    engine.start()
+    yield engine
+
+
+def monitor_callback(cavity: MagicMock, fault: int = 0):
+    return cavity.faults[fault].pv_obj.add_callback.call_args.args[0]
+
+
+def test_start(engine):
+    engine.start()
+    for cavity in engine.cavities:
+        for idx in range(2):
+            cavity.faults[idx].pv_obj.add_callback.assert_called_once()
+            cavity.faults[idx].pv_obj.connection_callbacks.append.assert_called_once()
+
+    # The shared PV is only subscribed to once
+    engine.cavities[0].faults[2].pv_obj.add_callback.assert_called_once()
+    for cavity in engine.cavities[1:]:
+        cavity.faults[2].pv_obj.add_callback.assert_not_called()
+    assert engine.dependents[SHARED_PV] == set(engine.cavities)
+
+    # Everything gets evaluated once to begin with
+    assert engine.process_pending() == 3
+    for cavity in engine.cavities:
+        cavity.run_through_faults.assert_called_once()
+
+
+def test_only_changed_cavities(engine):
+    engine.process_pending()
+    assert engine.process_pending() == 0
+
+    changed = engine.cavities[1]
+    monitor_callback(changed, fault=1)(pvname="CAV1:PV1", value=1, severity=0)
+    monitor_callback(changed, fault=0)(pvname="CAV1:PV0", value=0, severity=0)
+
+    assert engine.process_pending() == 1
+    assert changed.run_through_faults.call_count == 2
+    assert engine.cavities[0].run_through_faults.call_count == 1
+
+
+def test_shared_pv_fans_out(engine):
+    engine.process_pending()
+    monitor_callback(engine.cavities[0], fault=2)(pvname=SHARED_PV, value=1)
+    assert engine.process_pending() == 3
+
+
+def test_connection_change(engine):
+    engine.process_pending()
+    cavity = engine.cavities[2]
+    cavity.faults[0].pv_obj.connection_callbacks.append.call_args.args[0](
+        pvname="CAV2:PV0", conn=False
+    )
+    assert engine.process_pending() == 1
+    assert cavity.run_through_faults.call_count == 2
+
+
+def test_full_sweep(engine):
+    engine.process_pending()
+    engine.full_sweep_period = 0
+    assert engine.process_pending() == 3
+
+
+def test_batched_publish(engine):
+    engine.publish = MagicMock()
+    assert engine.process_pending() == 3
+    engine.publish.assert_called_once_with(engine.cavities)
+    for cavity in engine.cavities:
+        cavity.run_through_faults.assert_not_called()
+
+    monitor_callback(engine.cavities[2])(pvname="CAV2:PV0", value=1)
+    assert engine.process_pending() == 1
+    engine.publish.assert_called_with([engine.cavities[2]])
+    assert engine.process_pending() == 0
+    assert engine.publish.call_count == 2
+
+
+def test_batch_window(engine):
+    engine.process_pending()
+    engine.batch_window = 0.2
+    monitor_callback(engine.cavities[0])(pvname="CAV0:PV0", value=1)
+    # Lands while the first update is still being batched
+    timer = threading.Timer(
+        0.05,
+        monitor_callback(engine.cavities[1]),
+        kwargs={"pvname": "CAV1:PV0", "value": 1},
+    )
+    timer.start()
+    assert engine.process_pending(timeout=1) == 2
+    timer.join()
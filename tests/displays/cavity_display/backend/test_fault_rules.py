@@ -0,0 +1,167 @@
+from unittest.mock import MagicMock, PropertyMock
+
+import numpy as np
+import pytest
+from lcls_tools.common.controls.pyepics.utils import EPICS_INVALID_VAL, make_mock_pv
+
+from displays.cavity_display.backend.fault_rules import (
+    CompiledFaults,
+    FAULT_IF_EQUAL,
+    FaultRuleTable,
+    OK_IF_EQUAL,
+)
+from displays.cavity_display.utils.utils import SpreadsheetError
+from tests.displays.cavity_display.test_utils.utils import mock_parse
+
+# Row order in mock_parse
+RACK, CAV, CM, CRYO, SSA, ALL = range(6)
+SHARED_PV = "BSOC:SYSW:2:SumyA"
+
+
+@pytest.fixture
+def table() -> FaultRuleTable:
+    return FaultRuleTable(mock_parse())
+
+
+def make_fault(pv: str, rule_index: int, val: float, severity: int = 0):
+    pv_obj = make_mock_pv()
+    pv_obj.val = val
+    pv_obj.severity = severity
+    pv_obj.status = 0
+    pv_obj.timestamp = 0
+    return MagicMock(pv=pv, pv_obj=pv_obj, rule_index=rule_index)
+
+
+def make_cavity(number: int, rack_val: float, cav_val: float) -> MagicMock:
+    cavity = MagicMock()
+    cavity.faults = {
+        0: make_fault(f"CAV{number}:RACK", RACK, rack_val),
+        1: make_fault(f"CAV{number}:HWMODE", CAV, cav_val),
+        2: make_fault(SHARED_PV, ALL, 1),
+    }
+    return cavity
+
+
+def test_table_columns(table):
+    assert list(table.tlc) == ["BLV", "   ", "BCS", "USL", "SSA", "BSO"]
+    assert list(table.kind) == [
+        OK_IF_EQUAL,
+        FAULT_IF_EQUAL,
+        OK_IF_EQUAL,
+        FAULT_IF_EQUAL,
+        FAULT_IF_EQUAL,
+        OK_IF_EQUAL,
+    ]
+    assert list(table.threshold) == [0, 2, 0, 2, 2, 1]
+    assert list(table.severity) == [2, 5, 2, 2, 2, 2]
+    assert not table.threshold.flags.writeable
+
+
+def test_table_bad_rows():
+    rows = mock_parse()
+    rows[CAV]["Level"] = "FOO"
+    with pytest.raises(SpreadsheetError):
+        FaultRuleTable(rows)
+
+    rows = mock_parse()
+    rows[CAV]["Faulted If Equal To"] = ""
+    with pytest.raises(SpreadsheetError):
+        FaultRuleTable(rows)
+
+
+def test_pv_name(table):
+    cavity = MagicMock()
+    cavity.rack.rack_name = "B"
+    cavity.cryomodule.name = "02"
+    cavity.cryomodule.is_harmonic_linearizer = False
+    cavity.linac.name = "L1B"
+    cavity.number = 5
+
+    assert table.rules[RACK].pv_name(cavity) is None
+    assert table.rules[CM].pv_name(cavity) == "ACCL:L1B:0200:BCSDRVSUM"
+    assert table.rules[CRYO].pv_name(cavity) == "CLL:CM02:2601:US:LVL.SEVR"
+    assert table.rules[ALL].pv_name(cavity) == SHARED_PV
+
+    cavity.rack.rack_name = "A"
+    assert table.rules[RACK].pv_name(cavity) == "ACCL:L1B:0200:BMLNVACA_LTCH"
+
+
+def test_evaluate(table):
+    rule_indices = np.array([RACK, RACK, CAV, CAV, ALL])
+    values = np.array([0, 1, 2, np.nan, 0])
+    severities = np.array([0, 0, 0, 0, EPICS_INVALID_VAL])
+
+    faulted, invalid = table.evaluate(rule_indices, values, severities)
+    assert list(faulted) == [False, True, True, False, False]
+    assert list(invalid) == [False, False, False, True, True]
+
+
+def test_compiled_faults(table):
+    cavities = [
+        make_cavity(1, rack_val=0, cav_val=0),
+        make_cavity(2, rack_val=1, cav_val=2),
+        make_cavity(3, rack_val=0, cav_val=2),
+    ]
+    compiled = CompiledFaults(cavities, table=table)
+
+    # The shared PV is only read once
+    assert len(compiled.pv_objs) == 7
+
+    first, invalid = compiled.evaluate()
+    assert list(first) == [-1, 3, 7]
+    assert not invalid.any()
+
+    compiled.publish(cavities[:2])
+    cavities[0].publish_status.assert_called_with(None, invalid=False)
+    cavities[1].publish_status.assert_called_with(cavities[1].faults[0], invalid=False)
+    cavities[2].publish_status.assert_not_called()
+
+
+def test_publish_only_given_cavities(table):
+    cavities = [
+        make_cavity(1, rack_val=1, cav_val=0),
+        make_cavity(2, rack_val=1, cav_val=2),
+    ]
+    compiled = CompiledFaults(cavities, table=table)
+    untouched = PropertyMock(return_value=1)
+    type(cavities[0].faults[0].pv_obj).val = untouched
+
+    assert list(compiled.entries([cavities[1]])) == [3, 4, 5]
+    compiled.publish([cavities[1]])
+    cavities[1].publish_status.assert_called_with(cavities[1].faults[0], invalid=False)
+    cavities[0].publish_status.assert_not_called()
+    untouched.assert_not_called()
+
+    first, _ = compiled.evaluate(entries=compiled.entries([cavities[1]]))
+    assert list(first) == [-1, 3]
+
+
+def test_compiled_faults_invalid(table):
+    cavities = [make_cavity(1, rack_val=0, cav_val=0)]
+    cavities[0].faults[1].pv_obj.status = None
+    compiled = CompiledFaults(cavities, table=table)
+
+    first, invalid = compiled.evaluate()
+    assert list(first) == [1]
+    assert list(invalid) == [True]
+
+
+def test_slowest(table, monkeypatch):
+    monkeypatch.setattr(
+        "displays.cavity_display.backend.fault_rules.time.time", lambda: 100.0
+    )
+    cavities = [make_cavity(1, rack_val=0, cav_val=0), make_cavity(2, 0, 0)]
+    cavities[0].faults[0].pv_obj.status = None
+    cavities[1].faults[0].pv_obj.timestamp = 99.5
+    cavities[1].faults[1].pv_obj.timestamp = 99.9
+    compiled = CompiledFaults(cavities, table=table)
+    compiled.read()
+    assert compiled.disconnected == 1
+
+    slowest_cavities, slowest_faults = compiled.slowest(count=1)
+    assert slowest_cavities == [(str(cavities[1]), pytest.approx(0.5))]
+    assert slowest_faults == [(cavities[1].faults[0].pv_obj.pvname, pytest.approx(0.5))]
+
+    # Updates already seen aren't counted again
+    compiled.read()
+    assert compiled.slowest(count=1) == ([], [])
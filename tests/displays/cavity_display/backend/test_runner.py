@@ -5,23 +5,70 @@ import pytest
 from lcls_tools.common.controls.pyepics.utils import make_mock_pv
 
 from displays.cavity_display.backend.runner import Runner
+from displays.cavity_display.utils.utils import BACKEND_HEARTBEAT_PERIOD
 
 
 @pytest.fixture
 def runner() -> Runner:
     runner = Runner(lazy_fault_pvs=True)
     runner._watcher_pv_obj = make_mock_pv(get_val=randint(0, 1000000))
+    runner.status_publisher = MagicMock()
+    runner.telemetry = MagicMock()
     for cavity in runner.backend_cavities:
         cavity.run_through_faults = MagicMock()
     return runner
 
 
+def mock_compiled_faults(runner: Runner):
+    runner._compiled_faults = MagicMock(disconnected=2)
+    runner._compiled_faults.slowest.return_value = ([("CM01 Cavity 1", 0.5)], [])
+
+
 def test_check_faults(runner):
+    mock_compiled_faults(runner)
     runner.check_faults()
-    for cavity in runner.backend_cavities:
-        cavity.run_through_faults.assert_called()
+    runner._compiled_faults.publish.assert_called_with(None)
+    runner.status_publisher.flush.assert_called_once()
+    runner.telemetry.publish.assert_called_once()
     runner._watcher_pv_obj.put.assert_called()
 
 
+def test_publish_statuses(runner):
+    mock_compiled_faults(runner)
+    cavities = runner.backend_cavities[:2]
+    runner.publish_statuses(cavities)
+    runner._compiled_faults.publish.assert_called_with(cavities)
+
+    stats = runner.telemetry.record.call_args.args[0]
+    assert stats.evaluated == 2
+    assert stats.disconnected == 2
+    assert stats.slowest_cavities == [("CM01 Cavity 1", 0.5)]
+
+
 def test_watcher_pv_obj(runner):
     assert runner.watcher_pv_obj == runner._watcher_pv_obj
+
+
+def test_process_updates(runner):
+    runner.engine = MagicMock()
+    runner.process_updates()
+    runner.engine.start.assert_called()
+    runner.engine.process_pending.assert_called()
+    runner.telemetry.publish.assert_called_once()
+    runner._watcher_pv_obj.put.assert_called()
+
+    # Not again within the same heartbeat period
+    runner.process_updates()
+    assert runner.engine.process_pending.call_count == 2
+    runner.telemetry.publish.assert_called_once()
+    runner._watcher_pv_obj.put.assert_called_once()
+
+    runner._last_heartbeat -= BACKEND_HEARTBEAT_PERIOD
+    runner.process_updates()
+    assert runner.telemetry.publish.call_count == 2
+
+
+def test_heartbeat_survives_telemetry_failure(runner):
+    runner.telemetry.publish.side_effect = ValueError("no records")
+    runner.update_heartbeat()
+    runner._watcher_pv_obj.put.assert_called()
@@ -0,0 +1,87 @@
+import json
+from unittest.mock import MagicMock
+
+import pytest
+
+from displays.cavity_display.backend.runner_telemetry import (
+    CYCLE_P95_SUFFIX,
+    CycleStats,
+    DISCONNECTED_SUFFIX,
+    RunnerTelemetry,
+    SLOWEST_FAULT_SUFFIX,
+)
+
+
+@pytest.fixture
+def write_pvs(monkeypatch):
+    write_pvs = MagicMock()
+    monkeypatch.setattr(
+        "displays.cavity_display.backend.runner_telemetry.write_pvs", write_pvs
+    )
+    yield write_pvs
+
+
+@pytest.fixture
+def telemetry(tmp_path) -> RunnerTelemetry:
+    telemetry = RunnerTelemetry(window=10, log_path=str(tmp_path / "metrics.log"))
+    pv_objs = {}
+    telemetry.pv_obj = MagicMock(
+        side_effect=lambda suffix: pv_objs.setdefault(
+            suffix, MagicMock(pvname=suffix, connected=True)
+        )
+    )
+    for idx in range(20):
+        telemetry.record(
+            CycleStats(
+                timestamp=idx,
+                duration=idx / 10,
+                evaluated=296,
+                disconnected=idx % 3,
+                slowest_faults=[("ACCL:L0B:0110:HWMODE", 0.0125)],
+            )
+        )
+    yield telemetry
+
+
+def test_rolling_stats(telemetry):
+    assert len(telemetry.cycles) == 10
+    assert telemetry.percentile(50) == pytest.approx(1.45)
+    assert telemetry.percentile(100) == pytest.approx(1.9)
+    assert telemetry.evaluation_rate == pytest.approx(296)
+    assert telemetry.latest.disconnected == 1
+
+
+def test_no_cycles(write_pvs):
+    telemetry = RunnerTelemetry(log_path=None)
+    assert telemetry.percentile(95) == 0
+    assert telemetry.evaluation_rate == 0
+    telemetry.publish()
+    write_pvs.assert_not_called()
+
+
+def test_publish(telemetry, write_pvs):
+    telemetry.publish()
+    writes = {pv_obj.pvname: value for pv_obj, value in write_pvs.call_args.args[0]}
+    assert writes[CYCLE_P95_SUFFIX] == pytest.approx(1.855)
+    assert writes[DISCONNECTED_SUFFIX] == 1
+    assert writes[SLOWEST_FAULT_SUFFIX] == "ACCL:L0B:0110:HWMODE 12.5ms"
+
+    # Only logged once per log period
+    telemetry.publish()
+    with open(telemetry.log_path) as log:
+        entries = [json.loads(line) for line in log]
+    assert len(entries) == 1
+    assert entries[0]["cycles"] == 10
+
+
+def test_publish_connected_only(telemetry, write_pvs):
+    telemetry.pv_obj(CYCLE_P95_SUFFIX).connected = False
+    telemetry.publish()
+    written = [pv_obj.pvname for pv_obj, _ in write_pvs.call_args.args[0]]
+    assert CYCLE_P95_SUFFIX not in written
+    assert DISCONNECTED_SUFFIX in written
+
+
+def test_describe_truncated():
+    entries = [("ACCL:L3B:3480:PZT:FaultSummary", 0.1), ("ANOTHER:PV", 0.2)]
+    assert len(RunnerTelemetry.describe(entries)) == 40
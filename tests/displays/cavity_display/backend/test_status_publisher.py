@@ -0,0 +1,103 @@
+from unittest.mock import MagicMock
+
+import pytest
+from lcls_tools.common.controls.pyepics.utils import make_mock_pv
+
+from displays.cavity_display.backend.status_publisher import StatusPublisher
+
+
+def make_cavity() -> MagicMock:
+    cavity = MagicMock()
+    cavity.status_pv_obj = make_mock_pv()
+    cavity.severity_pv_obj = make_mock_pv()
+    cavity.description_pv_obj = make_mock_pv()
+    return cavity
+
+
+@pytest.fixture
+def write_pvs(monkeypatch):
+    write_pvs = MagicMock()
+    monkeypatch.setattr(
+        "displays.cavity_display.backend.status_publisher.write_pvs", write_pvs
+    )
+    yield write_pvs
+
+
+def test_first_flush_writes_everything(write_pvs):
+    publisher = StatusPublisher()
+    cavity = make_cavity()
+    publisher.queue(cavity, "1", 0, " ")
+
+    assert publisher.flush() == 3
+    write_pvs.assert_called_once_with(
+        [
+            (cavity.status_pv_obj, "1"),
+            (cavity.severity_pv_obj, 0),
+            (cavity.description_pv_obj, " "),
+        ]
+    )
+    assert publisher.published[cavity] == ("1", 0, " ")
+    assert publisher.sent == 3
+    assert publisher.suppressed == 0
+
+
+def test_only_changes_written(write_pvs):
+    publisher = StatusPublisher()
+    unchanged = make_cavity()
+    changed = make_cavity()
+    publisher.queue(unchanged, "1", 0, " ")
+    publisher.queue(changed, "2", 0, " ")
+    publisher.flush()
+
+    publisher.queue(unchanged, "1", 0, " ")
+    publisher.queue(changed, "SSA", 0, "SSA Faulted")
+    assert publisher.flush() == 2
+    write_pvs.assert_called_with(
+        [(changed.status_pv_obj, "SSA"), (changed.description_pv_obj, "SSA Faulted")]
+    )
+    assert publisher.sent == 8
+    assert publisher.suppressed == 4
+
+
+def test_coalesced_within_cycle(write_pvs):
+    publisher = StatusPublisher()
+    cavity = make_cavity()
+    publisher.queue(cavity, "SSA", 2, "SSA Faulted")
+    publisher.queue(cavity, "1", 0, " ")
+
+    assert publisher.flush() == 3
+    assert publisher.published[cavity] == ("1", 0, " ")
+    assert publisher.suppressed == 3
+
+    # Nothing queued, nothing written
+    assert publisher.flush() == 0
+
+
+def test_rewritten_after_reconnect(write_pvs):
+    publisher = StatusPublisher()
+    cavity = make_cavity()
+    cavity.status_pv_obj.connection_callbacks = []
+    cavity.severity_pv_obj.connection_callbacks = []
+    cavity.description_pv_obj.connection_callbacks = []
+    publisher.queue(cavity, "1", 0, " ")
+    publisher.flush()
+
+    publisher.queue(cavity, "1", 0, " ")
+    publisher.flush()
+    # Only registered once
+    assert len(cavity.severity_pv_obj.connection_callbacks) == 1
+
+    # IOC restart
+    for callback in cavity.severity_pv_obj.connection_callbacks:
+        callback(pvname=cavity.severity_pv, conn=False)
+    assert cavity not in publisher.published
+
+    publisher.queue(cavity, "1", 0, " ")
+    assert publisher.flush() == 3
+    write_pvs.assert_called_with(
+        [
+            (cavity.status_pv_obj, "1"),
+            (cavity.severity_pv_obj, 0),
+            (cavity.description_pv_obj, " "),
+        ]
+    )
@@ -1,5 +1,19 @@
-from unittest.mock import MagicMock
+from unittest.mock import AsyncMock, MagicMock
 
 
 def mock_func(*args, **kwargs):
     return MagicMock()
+
+
+def make_mock_async_pv(pv_name: str = None, get_val=None) -> MagicMock:
+    """
+    Async counterpart of lcls_tools' make_mock_pv, wait_until reports success
+    unless told otherwise
+    """
+    return MagicMock(
+        pvname=pv_name,
+        get=AsyncMock(return_value=get_val),
+        get_timestamp=AsyncMock(return_value=0),
+        put=AsyncMock(),
+        wait_until=AsyncMock(return_value=True),
+    )
@@ -0,0 +1,121 @@
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from utils.sc_linac.async_pv import AsyncPV
+from utils.sc_linac.linac_utils import CavityAbortError
+
+
+def make_subscription() -> MagicMock:
+    # caproto's asyncio Subscription: add_callback is synchronous and returns
+    # an id, remove_callback is a coroutine
+    return MagicMock(
+        add_callback=MagicMock(return_value=7), remove_callback=AsyncMock()
+    )
+
+
+def make_async_pv(*values) -> AsyncPV:
+    pv = AsyncPV("TEST:PV")
+    pv._pv = MagicMock(
+        read=AsyncMock(side_effect=[SimpleNamespace(data=[value]) for value in values])
+    )
+    pv._pv.subscribe.return_value = make_subscription()
+    return pv
+
+
+def assert_unsubscribed(pv: AsyncPV):
+    subscription = pv._pv.subscribe.return_value
+    subscription.remove_callback.assert_awaited_once_with(7)
+    subscription.clear.assert_not_called()
+
+
+def test_get():
+    pv = make_async_pv(3)
+    assert asyncio.run(pv.get()) == 3
+
+
+def test_get_string():
+    pv = make_async_pv(b"ON")
+    assert asyncio.run(pv.get()) == "ON"
+
+
+def test_put():
+    pv = AsyncPV("TEST:PV")
+    pv._pv = MagicMock(write=AsyncMock())
+    asyncio.run(pv.put(5))
+    pv._pv.write.assert_awaited_with([5], wait=True, timeout=pv.timeout)
+
+
+def test_wait_until():
+    pv = make_async_pv(0, 0, 1)
+    assert asyncio.run(pv.wait_until(lambda value: value == 1, poll_period=0))
+    assert pv._pv.read.await_count == 3
+    assert_unsubscribed(pv)
+
+
+def test_wait_until_timeout():
+    pv = make_async_pv(0, 0)
+    assert not asyncio.run(pv.wait_until(lambda value: value == 1, timeout=0))
+
+
+def test_wait_until_abort():
+    pv = make_async_pv(0)
+    abort_check = AsyncMock(side_effect=CavityAbortError)
+    with pytest.raises(CavityAbortError):
+        asyncio.run(pv.wait_until(lambda value: value == 1, abort_check=abort_check))
+    assert_unsubscribed(pv)
+
+
+def test_wait_until_wakes_on_update():
+    pv = make_async_pv(0, 1)
+    callbacks = []
+    pv._pv.subscribe.return_value.add_callback = MagicMock(
+        side_effect=lambda callback: callbacks.append(callback) or 7
+    )
+
+    async def wait():
+        waiter = asyncio.create_task(
+            pv.wait_until(lambda value: value == 1, poll_period=60)
+        )
+        await asyncio.sleep(0.05)
+        callbacks[0](None, None)
+        return await asyncio.wait_for(waiter, 1)
+
+    assert asyncio.run(wait())
+    assert_unsubscribed(pv)
+
+
+def make_time_response(value, severity: int, timestamp: float):
+    return SimpleNamespace(
+        data=[value], metadata=SimpleNamespace(severity=severity, timestamp=timestamp)
+    )
+
+
+def test_get_timestamp():
+    pv = AsyncPV("TEST:PV")
+    pv._pv = MagicMock(read=AsyncMock(return_value=make_time_response(0, 0, 10.0)))
+    assert asyncio.run(pv.get_timestamp()) == 10.0
+    pv._pv.read.assert_awaited_with(data_type="time", timeout=pv.timeout)
+
+
+def test_wait_until_since():
+    pv = AsyncPV("TEST:PV")
+    pv._pv = MagicMock(
+        read=AsyncMock(
+            side_effect=[
+                # Already valid, but from before the write
+                make_time_response(0, 0, 10.0),
+                make_time_response(0, 3, 11.0),
+                make_time_response(0, 0, 12.0),
+            ]
+        )
+    )
+    pv._pv.subscribe.return_value = make_subscription()
+    assert asyncio.run(
+        pv.wait_until(
+            lambda severity: severity != 3, poll_period=0, severity=True, since=10.0
+        )
+    )
+    assert pv._pv.read.await_count == 3
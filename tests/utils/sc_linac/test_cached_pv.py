@@ -0,0 +1,66 @@
+from unittest.mock import MagicMock
+
+import pytest
+from lcls_tools.common.controls.pyepics.utils import PV
+
+from utils.sc_linac.cached_pv import CachedPV
+
+
+@pytest.fixture
+def cached_pv(monkeypatch):
+    monkeypatch.setattr(PV, "get", MagicMock(return_value=5))
+
+    # Skipping __init__ so that no channel gets created
+    pv = CachedPV.__new__(CachedPV)
+    pv.connected = True
+    pv.max_age = 1
+    pv._last_update = None
+    pv._monitored = False
+    yield pv
+
+
+def test_get_no_update(cached_pv):
+    assert cached_pv.get() == 5
+    PV.get.assert_called_with(use_caget=False, use_monitor=False)
+    assert cached_pv._last_update is not None
+
+
+def test_get_fresh(cached_pv):
+    cached_pv._record_update(value=5)
+    assert cached_pv.is_fresh
+    cached_pv.get()
+    PV.get.assert_called_with(use_caget=False, use_monitor=True)
+
+
+def test_get_monitored_unchanged(cached_pv):
+    # Monitors only fire on a change, so an old monitor value is still current
+    cached_pv.max_age = 0
+    cached_pv._record_update(value=5)
+    cached_pv._last_update = 0
+    assert cached_pv.is_fresh
+    cached_pv.get()
+    PV.get.assert_called_with(use_caget=False, use_monitor=True)
+
+
+def test_reconnect_needs_update(cached_pv):
+    cached_pv._record_update(value=5)
+    cached_pv._record_connection(pvname="PV", conn=False)
+    assert not cached_pv.is_fresh
+    cached_pv._record_connection(pvname="PV", conn=True)
+    assert not cached_pv.is_fresh
+
+
+def test_get_stale(cached_pv):
+    cached_pv.max_age = 0
+    cached_pv._last_update = 0
+    assert not cached_pv.is_fresh
+    cached_pv.get()
+    PV.get.assert_called_with(use_caget=False, use_monitor=False)
+
+
+def test_get_disconnected(cached_pv):
+    cached_pv.connected = False
+    cached_pv._record_update(value=5)
+    assert not cached_pv.is_fresh
+    cached_pv.get()
+    PV.get.assert_called_with(use_caget=False, use_monitor=False)
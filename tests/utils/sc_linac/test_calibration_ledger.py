@@ -0,0 +1,93 @@
+import time
+from typing import List
+
+import pytest
+
+from utils.sc_linac.calibration_ledger import (
+    CHARACTERIZATION,
+    SSA_CALIBRATION,
+    CalibrationLedger,
+    CalibrationPolicy,
+    CalibrationRecord,
+)
+from utils.sc_linac.cavity import Cavity
+from utils.sc_linac.linac import Machine
+
+
+@pytest.fixture
+def ledger(tmp_path) -> CalibrationLedger:
+    yield CalibrationLedger(str(tmp_path / "ledgers" / "ledger.db"))
+
+
+@pytest.fixture
+def cavities() -> List[Cavity]:
+    machine = Machine()
+    yield [
+        machine.cryomodules["01"].cavities[1],
+        machine.cryomodules["01"].cavities[2],
+        machine.cryomodules["H1"].cavities[1],
+    ]
+
+
+def test_history(ledger, cavities):
+    for timestamp in [100, 200, 300]:
+        ledger.record(
+            cavities[0],
+            CHARACTERIZATION,
+            {"loaded_q": 4e7 + timestamp, "scale_factor": 20},
+            timestamp=timestamp,
+        )
+    ledger.record(cavities[1], CHARACTERIZATION, {"loaded_q": 3e7}, timestamp=400)
+    ledger.record(cavities[0], SSA_CALIBRATION, {"ssa_slope": 1.5}, timestamp=500)
+
+    history = ledger.history(cavities[0], CHARACTERIZATION)
+    assert [record.timestamp for record in history] == [300, 200, 100]
+    assert history[0].values == {"loaded_q": 4e7 + 300, "scale_factor": 20}
+    assert len(ledger.history(cavities[0], CHARACTERIZATION, since=150)) == 2
+
+    latest = ledger.latest(cavities[1], CHARACTERIZATION)
+    assert latest.values == {"loaded_q": 3e7, "scale_factor": None}
+    assert ledger.latest(cavities[2], CHARACTERIZATION) is None
+    assert ledger.latest(cavities[0], SSA_CALIBRATION).values == {
+        "ssa_slope": 1.5,
+        "max_fwd_pwr": None,
+    }
+
+
+def test_duplicate_ignored(ledger, cavities):
+    for _ in range(2):
+        ledger.record(cavities[0], SSA_CALIBRATION, {"ssa_slope": 1.5}, timestamp=100)
+    assert len(ledger.history(cavities[0], SSA_CALIBRATION)) == 1
+
+
+def test_trend(ledger, cavities):
+    for idx, cavity in enumerate(cavities):
+        ledger.record(
+            cavity, SSA_CALIBRATION, {"ssa_slope": 1 + idx}, timestamp=300 - idx
+        )
+
+    trend = ledger.trend(SSA_CALIBRATION)
+    assert [(record.cryomodule, record.cavity) for record in trend] == [
+        ("H1", 1),
+        ("01", 2),
+        ("01", 1),
+    ]
+    assert len(ledger.trend(SSA_CALIBRATION, cryomodule="01")) == 2
+    assert len(ledger.trend(SSA_CALIBRATION, since=299.5)) == 1
+    assert not ledger.trend(CHARACTERIZATION)
+
+
+def test_policy():
+    policy = CalibrationPolicy(characterization_max_age=60, tolerance=0.01)
+    record = CalibrationRecord(
+        "01", 1, CHARACTERIZATION, time.time() - 30, {"loaded_q": 4e7}
+    )
+    assert policy.is_fresh(record, {"loaded_q": 4.02e7})
+    assert not policy.is_fresh(record, {"loaded_q": 4.1e7})
+    assert not policy.is_fresh(record, {"loaded_q": None})
+    assert not policy.is_fresh(record, {"scale_factor": 20})
+    assert not policy.is_fresh(None, {"loaded_q": 4e7})
+
+    record.timestamp -= 60
+    assert not policy.is_fresh(record, {"loaded_q": 4e7})
+    assert policy.max_age(SSA_CALIBRATION) == policy.ssa_calibration_max_age
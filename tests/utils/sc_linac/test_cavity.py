@@ -1,6 +1,7 @@
+import asyncio
 from datetime import datetime, timedelta
 from random import randint, choice
-from unittest.mock import MagicMock
+from unittest.mock import AsyncMock, MagicMock
 
 import pytest
 from lcls_tools.common.controls.pyepics.utils import (
@@ -9,7 +10,12 @@ from lcls_tools.common.controls.pyepics.utils import (
     make_mock_pv,
 )
 
-from tests.utils.mock_utils import mock_func
+from tests.utils.mock_utils import mock_func, make_mock_async_pv
+from utils.sc_linac.calibration_ledger import (
+    CHARACTERIZATION,
+    CalibrationPolicy,
+    get_ledger,
+)
 from utils.sc_linac.cavity import Cavity
 from utils.sc_linac.linac import MACHINE
 from utils.sc_linac.linac_utils import (
@@ -30,7 +36,14 @@ from utils.sc_linac.linac_utils import (
     HW_MODE_ONLINE_VALUE,
     HW_MODE_OFFLINE_VALUE,
     TUNE_CONFIG_RESONANCE_VALUE,
+    TUNE_CONFIG_OTHER_VALUE,
+    TUNE_CONFIG_COLD_VALUE,
+    TUNE_CONFIG_PARKED_VALUE,
+    HL_RESONANCE_TOLERANCE,
+    DEFAULT_CHIRP_RANGE,
+    MAX_CHIRP_RANGE,
     DetuneError,
+    SetupStageError,
     NOMINAL_PULSED_ONTIME,
     CavityHWModeError,
     CavityAbortError,
@@ -43,11 +56,24 @@ from utils.sc_linac.linac_utils import (
     ALL_CRYOMODULES,
 )
 from utils.sc_linac.piezo import Piezo
+from utils.sc_linac.pipeline import STAGE_DONE, STAGE_SKIPPED
 
 
 @pytest.fixture
-def cavity(monkeypatch):
+def cavity(monkeypatch, tmp_path):
     monkeypatch.setattr("time.sleep", mock_func)
+    monkeypatch.setattr("utils.sc_linac.linac_utils.TUNER_MODEL_DIR", str(tmp_path))
+    monkeypatch.setattr("utils.sc_linac.linac_utils.CHIRP_RANGE_DIR", str(tmp_path))
+    monkeypatch.setattr(
+        "utils.sc_linac.linac_utils.SETUP_CHECKPOINT_DIR", str(tmp_path)
+    )
+    monkeypatch.setattr(
+        "utils.sc_linac.linac_utils.CALIBRATION_LEDGER_PATH",
+        str(tmp_path / "ledger.db"),
+    )
+    monkeypatch.setattr("utils.sc_linac.linac_utils.CHIRP_RANGE_SETTLE_TIMEOUT", 0)
+    monkeypatch.setattr("asyncio.sleep", AsyncMock())
+    monkeypatch.setattr("utils.sc_linac.linac_utils.CHARACTERIZATION_START_TIMEOUT", 0)
     rack = make_rack(is_hl=False)
     cavity = Cavity(cavity_num=randint(1, 8), rack_object=rack)
     cavity.stepper_tuner.hz_per_microstep = 0.00540801
@@ -56,8 +82,19 @@ def cavity(monkeypatch):
 
 
 @pytest.fixture
-def hl_cavity(monkeypatch):
+def hl_cavity(monkeypatch, tmp_path):
     monkeypatch.setattr("time.sleep", mock_func)
+    monkeypatch.setattr("utils.sc_linac.linac_utils.TUNER_MODEL_DIR", str(tmp_path))
+    monkeypatch.setattr("utils.sc_linac.linac_utils.CHIRP_RANGE_DIR", str(tmp_path))
+    monkeypatch.setattr(
+        "utils.sc_linac.linac_utils.SETUP_CHECKPOINT_DIR", str(tmp_path)
+    )
+    monkeypatch.setattr(
+        "utils.sc_linac.linac_utils.CALIBRATION_LEDGER_PATH",
+        str(tmp_path / "ledger.db"),
+    )
+    monkeypatch.setattr("utils.sc_linac.linac_utils.CHIRP_RANGE_SETTLE_TIMEOUT", 0)
+    monkeypatch.setattr("utils.sc_linac.linac_utils.CHARACTERIZATION_START_TIMEOUT", 0)
     rack = make_rack(is_hl=True)
     cavity = Cavity(cavity_num=randint(1, 8), rack_object=rack)
     cavity.stepper_tuner.hz_per_microstep = 0.00540801
@@ -89,6 +126,43 @@ def test_microsteps_per_hz(cavity):
     assert cavity.microsteps_per_hz == 1 / cavity.stepper_tuner.hz_per_microstep
 
 
+def test_pv_obj_attributes(cavity):
+    attributes = cavity.pv_obj_attributes()
+    assert attributes["_ades_pv_obj"] == cavity.ades_pv
+    assert attributes["_rf_state_pv_obj"] == cavity.rf_state_pv
+
+
+def test_create_pv_objs(cavity, monkeypatch):
+    monkeypatch.setattr("utils.sc_linac.linac_utils.PV", MagicMock())
+    pv_objs = cavity.create_pv_objs(["ADES"])
+    assert pv_objs == [cavity._ades_pv_obj]
+    assert cavity._aact_pv_obj is None
+
+
+def test_lazy_pv_obj(cavity, monkeypatch):
+    monkeypatch.setattr("utils.sc_linac.linac_utils.PV", MagicMock())
+    assert cavity.lazy_pv_obj("aact") == cavity._aact_pv_obj
+    with pytest.raises(AttributeError):
+        cavity.lazy_pv_obj("not_a_pv")
+
+
+def test_make_pv_obj(cavity, monkeypatch):
+    pv_class = MagicMock()
+    cached_pv_class = MagicMock()
+    monkeypatch.setattr("utils.sc_linac.linac_utils.PV", pv_class)
+    monkeypatch.setattr("utils.sc_linac.linac_utils.CachedPV", cached_pv_class)
+
+    cavity.make_pv_obj("rf_state")
+    pv_class.assert_called_with(cavity.rf_state_pv)
+
+    cavity.pv_cache_max_age = 2
+    cavity.make_pv_obj("rf_state")
+    cached_pv_class.assert_called_with(cavity.rf_state_pv, max_age=2)
+
+    cavity.make_pv_obj("ades")
+    pv_class.assert_called_with(cavity.ades_pv)
+
+
 def test_start_characterization(cavity):
     cavity._characterization_start_pv_obj = make_mock_pv()
     cavity.start_characterization()
@@ -515,6 +589,42 @@ def test__auto_tune_out_of_tol(cavity):
     assert mock_detune.num_calls == 2
 
 
+def test__auto_tune_saves_model(cavity):
+    cavity._rf_mode_pv_obj = make_mock_pv(get_val=RF_MODE_CHIRP)
+    cavity._detune_chirp_pv_obj = make_mock_pv(severity=EPICS_NO_ALARM_VAL)
+    cavity.stepper_tuner.move = MagicMock()
+    cavity.stepper_tuner.hz_per_microstep = 0.01
+    cavity._tune_config_pv_obj = make_mock_pv()
+    detunes = iter([1000, 100, 5])
+    cavity._auto_tune(delta_hz_func=lambda: next(detunes))
+
+    # 90000 steps moved the cavity 900 Hz, so the model learned 0.01 Hz/step
+    assert cavity.stepper_tuner.move.call_args_list[0].args[0] == 90000
+    assert cavity.tuner_model.hz_per_step_positive == 0.01
+    cavity._tuner_model = None
+    assert cavity.tuner_model.hz_per_step_positive == 0.01
+
+
+def test__aauto_tune_saves_model_on_failure(cavity):
+    cavity._async_pv_table = {
+        "rf_mode": make_mock_async_pv(get_val=RF_MODE_CHIRP),
+        "detune_chirp": make_mock_async_pv(),
+        "tune_config": make_mock_async_pv(),
+    }
+    cavity.async_pv("detune_chirp").get_severity = AsyncMock(
+        return_value=EPICS_NO_ALARM_VAL
+    )
+    cavity.stepper_tuner.amove = AsyncMock()
+    cavity.stepper_tuner.hz_per_microstep = 0.01
+    cavity.acheck_detune = AsyncMock(side_effect=DetuneError)
+    cavity.save_tuner_model = MagicMock()
+
+    with pytest.raises(DetuneError):
+        asyncio.run(cavity._aauto_tune(delta_hz_func=AsyncMock(return_value=1000)))
+    cavity.stepper_tuner.amove.assert_awaited_once()
+    cavity.save_tuner_model.assert_called_once()
+
+
 def test_check_detune(cavity):
     cavity._rf_mode_pv_obj = make_mock_pv(get_val=RF_MODE_CHIRP)
     cavity._detune_chirp_pv_obj = make_mock_pv(severity=EPICS_INVALID_VAL)
@@ -624,9 +734,97 @@ def test_setup_rf(cavity):
     cavity.piezo.enable_feedback = MagicMock()
     cavity.set_sela_mode = MagicMock()
     cavity.walk_amp = MagicMock()
+    cavity._hw_mode_pv_obj = make_mock_pv(get_val=HW_MODE_ONLINE_VALUE)
+    cavity.ssa_calibration_done = MagicMock(return_value=False)
+    cavity.tuning_done = MagicMock(side_effect=[False, True])
+    cavity.characterization_done = MagicMock(return_value=False)
+    cavity.ramp_done = MagicMock(return_value=False)
 
-    cavity.setup_rf(5)
+    results = cavity.setup_rf(5)
     cavity.ssa.calibrate.assert_called()
+    cavity.move_to_resonance.assert_called()
+    cavity.characterize.assert_called()
+    cavity.walk_amp.assert_called_with(5, 0.5)
+    assert [result.status for result in results] == [STAGE_DONE] * 4
+
+
+def test_setup_rf_resume(cavity):
+    cavity._ades_max_pv_obj = make_mock_pv(get_val=21)
+    cavity._hw_mode_pv_obj = make_mock_pv(get_val=HW_MODE_ONLINE_VALUE)
+    cavity.calibrate_ssa_for_setup = MagicMock()
+    cavity.move_to_resonance = MagicMock()
+    cavity.characterize_for_setup = MagicMock(side_effect=CavityCharacterizationError)
+    cavity.ramp_for_setup = MagicMock()
+    cavity.ssa_calibration_done = MagicMock(return_value=True)
+    cavity.tuning_done = MagicMock(side_effect=[False, True, True])
+    cavity.characterization_done = MagicMock(return_value=False)
+    cavity.ramp_done = MagicMock(return_value=False)
+
+    with pytest.raises(CavityCharacterizationError):
+        cavity.setup_rf(16)
+    cavity.calibrate_ssa_for_setup.assert_not_called()
+    cavity.move_to_resonance.assert_called_once()
+    cavity.ramp_for_setup.assert_not_called()
+
+    cavity.characterize_for_setup.side_effect = None
+    results = cavity.setup_rf(16)
+    cavity.move_to_resonance.assert_called_once()
+    cavity.ramp_for_setup.assert_called_with(16)
+    assert [result.status for result in results] == [
+        STAGE_SKIPPED,
+        STAGE_SKIPPED,
+        STAGE_DONE,
+        STAGE_DONE,
+    ]
+
+
+def test_setup_rf_offline(cavity):
+    cavity._ades_max_pv_obj = make_mock_pv(get_val=21)
+    cavity._hw_mode_pv_obj = make_mock_pv(get_val=HW_MODE_OFFLINE_VALUE)
+    cavity.ssa_calibration_done = MagicMock(return_value=False)
+    cavity.calibrate_ssa_for_setup = MagicMock()
+    with pytest.raises(SetupStageError):
+        cavity.setup_rf(16)
+    cavity.calibrate_ssa_for_setup.assert_not_called()
+
+
+def test_tuning_done(cavity):
+    cavity._tune_config_pv_obj = make_mock_pv(get_val=TUNE_CONFIG_OTHER_VALUE)
+    assert not cavity.tuning_done()
+
+    cavity._tune_config_pv_obj = make_mock_pv(get_val=TUNE_CONFIG_RESONANCE_VALUE)
+    cavity._rf_mode_pv_obj = make_mock_pv(get_val=RF_MODE_CHIRP)
+    # Can't tell whether it drifted with RF off
+    cavity._detune_chirp_pv_obj = make_mock_pv(severity=EPICS_INVALID_VAL)
+    assert not cavity.tuning_done()
+
+    cavity._detune_chirp_pv_obj = make_mock_pv(
+        get_val=-500, severity=EPICS_NO_ALARM_VAL
+    )
+    assert not cavity.tuning_done()
+    cavity._detune_chirp_pv_obj = make_mock_pv(get_val=50, severity=EPICS_NO_ALARM_VAL)
+    assert cavity.tuning_done()
+
+
+def test_tuning_done_hl(hl_cavity):
+    cavity = hl_cavity
+    cavity._tune_config_pv_obj = make_mock_pv(get_val=TUNE_CONFIG_RESONANCE_VALUE)
+    cavity._rf_mode_pv_obj = make_mock_pv(get_val=RF_MODE_CHIRP)
+
+    # HL cavities only get tuned to within 500 Hz
+    cavity._detune_chirp_pv_obj = make_mock_pv(get_val=300, severity=EPICS_NO_ALARM_VAL)
+    assert cavity.resonance_tolerance == HL_RESONANCE_TOLERANCE
+    assert cavity.tuning_done()
+
+
+def test_ramp_done(cavity):
+    cavity._rf_state_pv_obj = make_mock_pv(get_val=1)
+    cavity._rf_mode_pv_obj = make_mock_pv(get_val=RF_MODE_SELA)
+    cavity._ades_pv_obj = make_mock_pv(get_val=16)
+    assert cavity.ramp_done(16)
+    assert not cavity.ramp_done(16.5)
+    cavity._rf_mode_pv_obj = make_mock_pv(get_val=RF_MODE_CHIRP)
+    assert not cavity.ramp_done(16)
 
 
 def test_reset_data_decimation(cavity):
@@ -668,20 +866,171 @@ def test_setup_tuning_not_sela(cavity):
     cavity.find_chirp_range.assert_called()
 
 
-def test_find_chirp_range_valid(cavity):
+def make_detune_chirp_pv(get_val=None, severity=EPICS_INVALID_VAL):
+    detune_pv = make_mock_pv(get_val=get_val, severity=severity)
+    detune_pv.timestamp = 1000.0
+    return detune_pv
+
+
+def chirp_update(cavity, severity: int):
+    """Simulates the first detune update computed with a new chirp range"""
+    cavity._detune_chirp_pv_obj.timestamp += 1
+    cavity._detune_chirp_pv_obj.severity = severity
+
+
+def test_try_chirp_range(cavity):
+    cavity._detune_chirp_pv_obj = make_detune_chirp_pv()
+    cavity.set_chirp_range = MagicMock(
+        side_effect=lambda offset: chirp_update(cavity, EPICS_NO_ALARM_VAL)
+    )
+    assert cavity.try_chirp_range(50000)
+    cavity.set_chirp_range.assert_called_with(50000)
+
+
+def test_try_chirp_range_stale(cavity):
+    # Valid from the previous range, but nothing has come in since the write
+    cavity._detune_chirp_pv_obj = make_detune_chirp_pv(severity=EPICS_NO_ALARM_VAL)
     cavity.set_chirp_range = MagicMock()
+    assert not cavity.try_chirp_range(50000)
+
+
+def test_find_chirp_range_valid(cavity):
     cavity._rf_mode_pv_obj = make_mock_pv(get_val=RF_MODE_CHIRP)
-    cavity._detune_chirp_pv_obj = make_mock_pv(severity=EPICS_NO_ALARM_VAL)
+    cavity._detune_chirp_pv_obj = make_detune_chirp_pv(get_val=1000)
+    cavity.set_chirp_range = MagicMock(
+        side_effect=lambda offset: chirp_update(cavity, EPICS_NO_ALARM_VAL)
+    )
 
     cavity.find_chirp_range(50000)
     cavity.set_chirp_range.assert_called_with(50000)
+    assert cavity.last_good_chirp_range == 50000
+
+
+def test_find_chirp_range_coarse_to_fine(cavity):
+    cavity._detune_chirp_pv_obj = make_detune_chirp_pv(get_val=-110000)
+    severities = {50000: EPICS_INVALID_VAL, 100000: EPICS_INVALID_VAL}
+    cavity.set_chirp_range = MagicMock(
+        side_effect=lambda offset: chirp_update(
+            cavity, severities.get(offset, EPICS_NO_ALARM_VAL)
+        )
+    )
+
+    cavity.find_chirp_range(50000)
+
+    assert [call.args[0] for call in cavity.set_chirp_range.call_args_list] == [
+        50000,
+        100000,
+        200000,
+        165000,
+    ]
+    assert cavity.last_good_chirp_range == 165000
+
+
+def test_find_chirp_range_fine_not_verified(cavity):
+    cavity._detune_chirp_pv_obj = make_detune_chirp_pv(get_val=-110000)
+
+    def set_chirp_range(offset):
+        # The fine range never gets a fresh update, the valid severity left
+        # over from the coarse range must not count
+        if offset != 165000:
+            chirp_update(cavity, EPICS_NO_ALARM_VAL)
+
+    cavity.set_chirp_range = MagicMock(side_effect=set_chirp_range)
+    cavity.find_chirp_range(200000)
+
+    cavity.set_chirp_range.assert_called_with(200000)
+    assert cavity.last_good_chirp_range == 200000
+
+
+def test_find_chirp_range_fine_invalid(cavity):
+    cavity._detune_chirp_pv_obj = make_detune_chirp_pv(get_val=60000)
+    cavity.set_chirp_range = MagicMock(
+        side_effect=lambda offset: chirp_update(
+            cavity, EPICS_NO_ALARM_VAL if offset == 400000 else EPICS_INVALID_VAL
+        )
+    )
+
+    cavity.find_chirp_range(400000)
+
+    cavity.set_chirp_range.assert_called_with(400000)
+    assert cavity.last_good_chirp_range == 400000
+
+
+def test_find_chirp_range_invalid(cavity):
+    cavity._detune_chirp_pv_obj = make_detune_chirp_pv()
+    cavity.set_chirp_range = MagicMock(
+        side_effect=lambda offset: chirp_update(cavity, EPICS_INVALID_VAL)
+    )
+
+    with pytest.raises(DetuneError):
+        cavity.find_chirp_range(-50000)
+    cavity.set_chirp_range.assert_called_with(400000)
+    assert cavity.last_good_chirp_range is None
+
+
+def test_find_chirp_range_seed_cold(cavity):
+    cavity.try_chirp_range = MagicMock(return_value=True)
+    cavity._tune_config_pv_obj = make_mock_pv(get_val=TUNE_CONFIG_COLD_VALUE)
+    cavity._df_cold_pv_obj = make_mock_pv(get_val=-100000)
+    cavity._detune_chirp_pv_obj = make_mock_pv(get_val=-100000)
+    cavity.last_good_chirp_range = 300000
+
+    cavity.find_chirp_range()
+    cavity.try_chirp_range.assert_called_once_with(150000)
+
+
+def test_find_chirp_range_seed_cached(cavity):
+    cavity.try_chirp_range = MagicMock(return_value=True)
+    cavity._tune_config_pv_obj = make_mock_pv(get_val=TUNE_CONFIG_PARKED_VALUE)
+    cavity._df_cold_pv_obj = make_mock_pv(get_val=-100000)
+    cavity._detune_chirp_pv_obj = make_mock_pv(get_val=-250000)
+    cavity.last_good_chirp_range = 300000
+
+    cavity.find_chirp_range()
+    cavity.try_chirp_range.assert_called_once_with(300000)
+
+
+def test_chirp_range_seed_default(cavity):
+    assert (
+        cavity.chirp_range_seed(TUNE_CONFIG_RESONANCE_VALUE, 0) == DEFAULT_CHIRP_RANGE
+    )
+    assert cavity.chirp_range_seed(TUNE_CONFIG_COLD_VALUE, 1e6) == MAX_CHIRP_RANGE
+
+
+def test_afind_chirp_range(cavity):
+    cavity._async_pv_table = {
+        "tune_config": make_mock_async_pv(get_val=TUNE_CONFIG_COLD_VALUE),
+        "df_cold": make_mock_async_pv(get_val=40000),
+        "chirp_freq_start": make_mock_async_pv(),
+        "chirp_freq_stop": make_mock_async_pv(),
+        "detune_chirp": make_mock_async_pv(get_val=40000),
+    }
+    detune_pv = cavity.async_pv("detune_chirp")
+    detune_pv.get_timestamp.side_effect = [1000.0, 1001.0, 1002.0, 1003.0]
+    detune_pv.wait_until.side_effect = [False, True, False, True]
+
+    asyncio.run(cavity.afind_chirp_range())
+    # Every wait only trusts updates from after its range was written
+    assert [call.kwargs["since"] for call in detune_pv.wait_until.call_args_list] == [
+        1000.0,
+        1001.0,
+        1002.0,
+        1003.0,
+    ]
+    cavity.async_pv("chirp_freq_stop").put.assert_awaited_with(120000)
+    assert cavity.last_good_chirp_range == 120000
+
+
+def test_coarse_chirp_ranges():
+    assert Cavity.coarse_chirp_ranges(-60000) == [60000, 120000, 240000, 400000]
+    assert Cavity.coarse_chirp_ranges(500000) == [400000]
 
 
 def test_reset_interlocks(cavity):
     cavity._interlock_reset_pv_obj = make_mock_pv()
     cavity._rf_permit_pv_obj = make_mock_pv(get_val=0)
     with pytest.raises(CavityFaultError):
-        cavity.reset_interlocks(attempt=INTERLOCK_RESET_ATTEMPTS)
+        cavity.reset_interlocks(wait=0, attempt=INTERLOCK_RESET_ATTEMPTS)
 
     cavity._interlock_reset_pv_obj.put.assert_called_with(1)
 
@@ -761,6 +1110,8 @@ def test_finish_characterization(cavity):
     cavity.push_scale_factor = MagicMock()
     cavity.reset_data_decimation = MagicMock()
     cavity.piezo._feedback_setpoint_pv_obj = make_mock_pv()
+    char_time = datetime.now().strftime("%Y-%m-%d-%H:%M:%S")
+    cavity._char_timestamp_pv_obj = make_mock_pv(get_val=char_time)
 
     cavity.finish_characterization()
     cavity.push_loaded_q.assert_called()
@@ -768,6 +1119,55 @@ def test_finish_characterization(cavity):
     cavity.reset_data_decimation.assert_called()
     cavity.piezo._feedback_setpoint_pv_obj.put.assert_called_with(0)
 
+    # Finishing the same characterization again isn't recorded twice
+    cavity.finish_characterization()
+    records = get_ledger().history(cavity, CHARACTERIZATION)
+    assert len(records) == 1
+    assert records[0].values == {
+        "loaded_q": cavity.measured_loaded_q,
+        "scale_factor": cavity.measured_scale_factor,
+    }
+
+
+def test_characterize_fresh(cavity):
+    cavity.calibration_policy = CalibrationPolicy()
+    cavity.reset_interlocks = MagicMock()
+    cavity.start_characterization = MagicMock()
+    cavity._current_q_loaded_pv_obj = make_mock_pv(get_val=4e7)
+    cavity._current_cavity_scale_pv_obj = make_mock_pv(get_val=20)
+    get_ledger().record(
+        cavity, CHARACTERIZATION, {"loaded_q": 4.01e7, "scale_factor": 20}
+    )
+
+    cavity.characterize()
+    cavity.reset_interlocks.assert_not_called()
+    cavity.start_characterization.assert_not_called()
+
+
+def test_characterize_fresh_forced(cavity):
+    cavity.calibration_policy = CalibrationPolicy()
+    cavity._current_q_loaded_pv_obj = make_mock_pv(get_val=4e7)
+    cavity._current_cavity_scale_pv_obj = make_mock_pv(get_val=20)
+    get_ledger().record(cavity, CHARACTERIZATION, {"loaded_q": 4e7, "scale_factor": 20})
+    cavity.reset_interlocks = MagicMock(side_effect=CavityAbortError)
+
+    # Gets past the ledger check
+    with pytest.raises(CavityAbortError):
+        cavity.characterize(force=True)
+    cavity.reset_interlocks.assert_called()
+
+
+def test_characterization_fresh_changed(cavity):
+    cavity.calibration_policy = CalibrationPolicy()
+    cavity._current_q_loaded_pv_obj = make_mock_pv(get_val=3e7)
+    cavity._current_cavity_scale_pv_obj = make_mock_pv(get_val=20)
+    get_ledger().record(cavity, CHARACTERIZATION, {"loaded_q": 4e7, "scale_factor": 20})
+    assert not cavity.characterization_fresh
+
+    cavity.calibration_policy = None
+    cavity._current_q_loaded_pv_obj = make_mock_pv(get_val=4e7)
+    assert not cavity.characterization_fresh
+
 
 def test_walk_amp_quench(cavity):
     cavity._ades_pv_obj = make_mock_pv(get_val=0)
@@ -787,3 +1187,115 @@ def test_walk_amp(cavity):
 def test_is_offline(cavity):
     cavity._hw_mode_pv_obj = make_mock_pv(get_val=HW_MODE_OFFLINE_VALUE)
     assert cavity.is_offline
+
+
+def test_aturn_on(cavity):
+    cavity._async_pv_table = {
+        "hw_mode": make_mock_async_pv(get_val=HW_MODE_ONLINE_VALUE),
+        "rf_control": make_mock_async_pv(),
+        "rf_state": make_mock_async_pv(get_val=1),
+    }
+    cavity.ssa.aturn_on = AsyncMock()
+    cavity.areset_interlocks = AsyncMock()
+
+    asyncio.run(cavity.aturn_on())
+    cavity.ssa.aturn_on.assert_awaited()
+    cavity.areset_interlocks.assert_awaited()
+    cavity.async_pv("rf_control").put.assert_awaited_with(1)
+    cavity.async_pv("rf_state").wait_until.assert_awaited()
+
+
+def test_aturn_on_offline(cavity):
+    cavity._async_pv_table = {
+        "hw_mode": make_mock_async_pv(get_val=HW_MODE_OFFLINE_VALUE)
+    }
+    with pytest.raises(CavityHWModeError):
+        asyncio.run(cavity.aturn_on())
+
+
+def test_acheck_abort(cavity):
+    cavity.abort_flag = True
+    cavity.aturn_off = AsyncMock()
+    with pytest.raises(CavityAbortError):
+        asyncio.run(cavity.acheck_abort())
+    cavity.aturn_off.assert_awaited()
+    assert not cavity.abort_flag
+
+
+def test_areset_interlocks(cavity):
+    cavity._async_pv_table = {
+        "interlock_reset": make_mock_async_pv(),
+        "rf_permit": make_mock_async_pv(),
+    }
+    cavity.async_pv("rf_permit").wait_until.side_effect = [False, True]
+
+    asyncio.run(cavity.areset_interlocks(wait=3))
+    assert cavity.async_pv("interlock_reset").put.await_count == 2
+    waits = cavity.async_pv("rf_permit").wait_until.call_args_list
+    assert [call.kwargs["timeout"] for call in waits] == [3, 5]
+
+
+def test_areset_interlocks_fail(cavity):
+    cavity._async_pv_table = {
+        "interlock_reset": make_mock_async_pv(),
+        "rf_permit": make_mock_async_pv(),
+    }
+    cavity.async_pv("rf_permit").wait_until.return_value = False
+    with pytest.raises(CavityFaultError):
+        asyncio.run(cavity.areset_interlocks())
+    assert (
+        cavity.async_pv("interlock_reset").put.await_count
+        == INTERLOCK_RESET_ATTEMPTS + 1
+    )
+
+
+def test_awalk_amp(cavity):
+    cavity._async_pv_table = {
+        "ades": make_mock_async_pv(get_val=16.05),
+        "quench_latch": make_mock_async_pv(get_val=0),
+    }
+    asyncio.run(cavity.awalk_amp(16.1, 0.1))
+    cavity.async_pv("ades").put.assert_awaited_with(16.1)
+
+
+def test_awalk_amp_quench(cavity):
+    cavity._async_pv_table = {
+        "ades": make_mock_async_pv(get_val=16),
+        "quench_latch": make_mock_async_pv(get_val=1),
+    }
+    cavity.async_pv("quench_latch").get_severity = AsyncMock(
+        return_value=EPICS_NO_ALARM_VAL
+    )
+    with pytest.raises(QuenchError):
+        asyncio.run(cavity.awalk_amp(des_amp=16.6, step_size=0.1))
+
+
+def test_amove_to_resonance(cavity):
+    cavity._async_pv_table = {"tune_config": make_mock_async_pv()}
+    cavity.asetup_tuning = AsyncMock()
+    cavity._aauto_tune = AsyncMock()
+    asyncio.run(cavity.amove_to_resonance())
+    cavity.asetup_tuning.assert_awaited_with(use_sela=False)
+    cavity._aauto_tune.assert_awaited()
+    cavity.async_pv("tune_config").put.assert_awaited_with(TUNE_CONFIG_RESONANCE_VALUE)
+
+
+def test_concurrent_aturn_on(cavity):
+    cavities = [cavity] + [
+        Cavity(cavity_num=num, rack_object=cavity.rack) for num in range(1, 4)
+    ]
+    for cav in cavities:
+        cav._async_pv_table = {
+            "hw_mode": make_mock_async_pv(get_val=HW_MODE_ONLINE_VALUE),
+            "rf_control": make_mock_async_pv(),
+            "rf_state": make_mock_async_pv(get_val=1),
+        }
+        cav.ssa.aturn_on = AsyncMock()
+        cav.areset_interlocks = AsyncMock()
+
+    async def turn_all_on():
+        await asyncio.gather(*[cav.aturn_on() for cav in cavities])
+
+    asyncio.run(turn_all_on())
+    for cav in cavities:
+        cav.async_pv("rf_control").put.assert_awaited_with(1)
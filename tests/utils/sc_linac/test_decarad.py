@@ -0,0 +1,148 @@
+from unittest.mock import MagicMock
+
+import pytest
+from lcls_tools.common.controls.pyepics.utils import make_mock_pv
+
+from utils.sc_linac import decarad
+from utils.sc_linac.decarad import Decarad, DecaradMonitor, DoseHistory
+from utils.sc_linac.linac_utils import (
+    DECARAD_BACKGROUND_READING_AVG,
+    DECARAD_BACKGROUND_READING_RAW,
+)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = MagicMock(return_value=1000.0)
+    monkeypatch.setattr("time.time", clock)
+    yield clock
+
+
+@pytest.fixture
+def monitor(clock):
+    decarads = [Decarad(1), Decarad(2)]
+    for head in [head for d in decarads for head in d.heads.values()]:
+        head._raw_dose_rate_pv_obj = make_mock_pv(
+            get_val=DECARAD_BACKGROUND_READING_RAW
+        )
+        head._avg_dose_rate_pv_obj = make_mock_pv(
+            get_val=DECARAD_BACKGROUND_READING_AVG
+        )
+    monitor = DecaradMonitor(decarads, history_size=8)
+    monitor.start()
+    yield monitor
+
+
+def raw_callback(head):
+    return head.raw_dose_rate_pv_obj.add_callback.call_args.args[0]
+
+
+def test_dose_history():
+    history = DoseHistory(size=4)
+    assert history.latest == 0
+    assert history.mean(0, 10) == 0
+
+    history.record(10, timestamp=0)
+    history.record(30, timestamp=10)
+    assert history.latest == 30
+    assert history.mean(0, 20) == 20
+    assert history.mean(5, 10) == 10
+    assert history.max(0) == 30
+    assert history.max(15) == 30
+
+    # Values stay in effect until the next update
+    history.record(0, timestamp=20)
+    assert history.max(25) == 0
+    assert history.max(15) == 30
+
+
+def test_dose_history_wraps():
+    history = DoseHistory(size=3)
+    for timestamp, value in enumerate([50, 1, 2, 3, 4]):
+        history.record(value, timestamp=timestamp)
+
+    assert history.oldest == 2
+    assert history.max(0) == 4
+    assert history.max(2.5) == 4
+    assert history.mean(0, 4) == 2.5
+    assert history.index_at(1) is None
+    assert history.index_at(3.5) == 0
+
+
+def test_start_subscribes_once(monitor):
+    monitor.start()
+    for head in monitor.heads:
+        head.raw_dose_rate_pv_obj.get.assert_called_once()
+        head.raw_dose_rate_pv_obj.add_callback.assert_called_once()
+        head.avg_dose_rate_pv_obj.add_callback.assert_called_once()
+    assert monitor.max_raw_dose() == 0
+    assert monitor.max_avg_dose() == 0
+
+
+def test_start_tolerates_failed_seed(clock):
+    decarads = [Decarad(1)]
+    heads = list(decarads[0].heads.values())
+    for head in heads:
+        head._raw_dose_rate_pv_obj = make_mock_pv(
+            get_val=DECARAD_BACKGROUND_READING_RAW
+        )
+        head._avg_dose_rate_pv_obj = make_mock_pv(
+            get_val=DECARAD_BACKGROUND_READING_AVG
+        )
+    heads[1].raw_dose_rate_pv_obj.get.side_effect = TimeoutError
+
+    monitor = DecaradMonitor(decarads, history_size=8)
+    monitor.start()
+    monitor.start()
+
+    # Every head is subscribed exactly once, including the one that failed
+    for head in heads:
+        head.raw_dose_rate_pv_obj.add_callback.assert_called_once()
+        head.avg_dose_rate_pv_obj.add_callback.assert_called_once()
+    assert monitor.histories[1].latest == 0
+
+    raw_callback(heads[1])(value=DECARAD_BACKGROUND_READING_RAW + 4)
+    assert monitor.max_raw_dose() == 4
+
+
+def test_max_dose_from_monitors(monitor, clock):
+    head = monitor.decarads[2].heads[4]
+    raw_callback(head)(value=DECARAD_BACKGROUND_READING_RAW + 20)
+    head.avg_dose_rate_pv_obj.add_callback.call_args.args[0](
+        value=DECARAD_BACKGROUND_READING_AVG + 2
+    )
+
+    assert monitor.max_raw_dose() == 20
+    assert monitor.max_raw_dose(2) == 20
+    assert monitor.max_raw_dose(1) == 0
+    assert monitor.max_avg_dose(2) == pytest.approx(2)
+    head.raw_dose_rate_pv_obj.get.assert_called_once()
+
+
+def test_windowed_dose(monitor, clock):
+    head = monitor.decarads[1].heads[1]
+    raw_callback(head)(value=DECARAD_BACKGROUND_READING_RAW + 36)
+    clock.return_value = 1010.0
+    raw_callback(head)(value=DECARAD_BACKGROUND_READING_RAW)
+    clock.return_value = 1020.0
+
+    assert monitor.max_raw_dose() == 0
+    assert monitor.max_raw_dose_over(5) == 0
+    assert monitor.max_raw_dose_over(15) == 36
+    assert monitor.mean_raw_dose_over(20) == 18
+    assert monitor.dose_over(20) == pytest.approx(0.1)
+
+
+def test_disconnected_head_read_directly(monitor):
+    head = monitor.decarads[1].heads[3]
+    head.raw_dose_rate_pv_obj.connected = False
+    head.raw_dose_rate_pv_obj.get.return_value = DECARAD_BACKGROUND_READING_RAW + 5
+    assert monitor.max_raw_dose() == 5
+
+
+def test_decarad_uses_shared_monitor(monkeypatch, monitor):
+    monkeypatch.setattr(decarad, "get_decarad_monitor", lambda: monitor)
+    raw_callback(monitor.decarads[1].heads[2])(value=DECARAD_BACKGROUND_READING_RAW + 3)
+    assert Decarad(1).max_raw_dose == 3
+    assert Decarad(2).max_raw_dose == 0
+    assert Decarad(1).max_avg_dose == 0
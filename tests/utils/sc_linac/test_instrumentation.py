@@ -0,0 +1,77 @@
+from random import randint
+from unittest.mock import MagicMock
+
+import pytest
+from lcls_tools.common.controls.pyepics.utils import make_mock_pv
+
+from utils.sc_linac.cavity import Cavity
+from utils.sc_linac.instrumentation import (
+    CA_STATS,
+    InstrumentedPV,
+    disable_instrumentation,
+    enable_instrumentation,
+)
+from utils.sc_linac.linac_utils import ALL_CRYOMODULES_NO_HL
+
+
+@pytest.fixture
+def cavity():
+    rack = MagicMock()
+    rack.cryomodule.name = ALL_CRYOMODULES_NO_HL[0]
+    rack.cryomodule.linac.name = "L0B"
+    rack.cryomodule.is_harmonic_linearizer = False
+    yield Cavity(cavity_num=randint(1, 8), rack_object=rack)
+
+
+@pytest.fixture
+def instrumentation():
+    CA_STATS.reset()
+    enable_instrumentation(warn_gui_thread=False)
+    yield CA_STATS
+    disable_instrumentation()
+    CA_STATS.reset()
+
+
+def test_disabled(cavity):
+    cavity._ades_pv_obj = make_mock_pv(get_val=5)
+    assert not isinstance(cavity._ades_pv_obj, InstrumentedPV)
+
+
+def test_get_put(cavity, instrumentation):
+    cavity._ades_pv_obj = make_mock_pv(cavity.ades_pv, get_val=5)
+    assert isinstance(cavity._ades_pv_obj, InstrumentedPV)
+    assert cavity.ades == 5
+    cavity.ades = 6
+    cavity._ades_pv_obj.pv_obj.put.assert_called_with(6)
+
+    by_suffix = instrumentation.by("suffix")
+    assert by_suffix[("get", "ADES")].count == 1
+    assert by_suffix[("put", "ADES")].count == 1
+    assert instrumentation.by("object_class")[("get", "Cavity")].count == 1
+    assert instrumentation.objects_created == 1
+    assert "ADES" in instrumentation.report()
+
+
+def test_passthrough(cavity, instrumentation):
+    cavity._ades_pv_obj = make_mock_pv(cavity.ades_pv, severity=2)
+    assert cavity._ades_pv_obj.severity == 2
+    assert cavity._ades_pv_obj.pvname == cavity.ades_pv
+
+
+def test_callback(cavity, instrumentation):
+    callback = MagicMock()
+    instrumentation.add_callback(callback)
+    cavity._rf_state_pv_obj = make_mock_pv(cavity.rf_state_pv, get_val=1)
+    assert cavity.is_on
+    record = callback.call_args.args[0]
+    assert record.kind == "get"
+    assert record.suffix == "RFSTATE"
+    assert record.pvname == cavity.rf_state_pv
+    instrumentation.remove_callback(callback)
+
+
+def test_gui_thread(cavity, instrumentation, monkeypatch):
+    monkeypatch.setattr("utils.sc_linac.instrumentation.in_gui_thread", lambda: True)
+    cavity._ades_pv_obj = make_mock_pv(get_val=5)
+    cavity.ades
+    assert instrumentation.by("suffix")[("get", "ADES")].gui_thread_calls == 1
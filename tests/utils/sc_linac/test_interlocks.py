@@ -0,0 +1,76 @@
+from typing import Dict, List
+
+import pytest
+from lcls_tools.common.controls.pyepics.utils import make_mock_pv
+
+from utils.sc_linac.cavity import Cavity
+from utils.sc_linac.cryomodule import Cryomodule
+from utils.sc_linac.interlocks import reset_interlocks
+from utils.sc_linac.linac import Machine
+from utils.sc_linac.linac_utils import INTERLOCK_RESET_ATTEMPTS, CavityFaultError
+
+
+def mock_permits(cavities: List[Cavity], resets_needed: Dict[int, int]):
+    """
+    @param resets_needed: {cavity number: resets before its permit comes
+                          back}, cavities not listed never recover
+    """
+    for cavity in cavities:
+        cavity._rf_permit_pv_obj = make_mock_pv(get_val=0)
+        cavity._interlock_reset_pv_obj = make_mock_pv()
+
+        def reset(value, cavity=cavity):
+            resets = cavity._interlock_reset_pv_obj.put.call_count
+            if resets >= resets_needed.get(cavity.number, float("inf")):
+                cavity._rf_permit_pv_obj.get.return_value = 1
+
+        cavity._interlock_reset_pv_obj.put.side_effect = reset
+
+
+@pytest.fixture
+def cryomodule(monkeypatch) -> Cryomodule:
+    monkeypatch.setattr("utils.sc_linac.interlocks.INTERLOCK_RESET_WAIT_INCREMENT", 0)
+    yield Machine().cryomodules["01"]
+
+
+def test_retries_only_inhibited(cryomodule):
+    cavities = list(cryomodule.cavities.values())
+    mock_permits(cavities, {num: 1 for num in range(1, 8)} | {2: 3})
+
+    report = reset_interlocks(cavities, wait=0)
+    assert report.results == {
+        cavity: 2 if cavity.number == 2 else 0 for cavity in cavities[:7]
+    }
+    assert isinstance(report.errors[cavities[7]], CavityFaultError)
+
+    assert cavities[0]._interlock_reset_pv_obj.put.call_count == 1
+    assert cavities[1]._interlock_reset_pv_obj.put.call_count == 3
+    assert (
+        cavities[7]._interlock_reset_pv_obj.put.call_count
+        == INTERLOCK_RESET_ATTEMPTS + 1
+    )
+
+
+def test_rack(cryomodule):
+    cavities = list(cryomodule.rack_b.cavities.values())
+    mock_permits(cavities, {num: 1 for num in range(5, 9)})
+    report = cryomodule.rack_b.reset_interlocks(wait=0)
+    assert report.all_succeeded
+    assert set(report.results) == set(cavities)
+
+
+def test_cryomodule(cryomodule):
+    cavities = list(cryomodule.cavities.values())
+    mock_permits(cavities, {})
+    report = cryomodule.reset_interlocks(wait=0)
+    assert set(report.errors) == set(cavities)
+
+
+def test_cavity_first_attempt(cryomodule):
+    cavity = cryomodule.cavities[1]
+    mock_permits([cavity], {1: 2})
+    with pytest.raises(CavityFaultError):
+        cavity.reset_interlocks(wait=0, attempt=INTERLOCK_RESET_ATTEMPTS)
+
+    cavity.reset_interlocks(wait=0, attempt=INTERLOCK_RESET_ATTEMPTS - 1)
+    assert cavity._interlock_reset_pv_obj.put.call_count == 2
@@ -38,3 +38,11 @@ def test_insulating_vacuum_pvs(machine):
         linac = machine.linacs[i]
         for cm in INSULATING_VACUUM_CRYOMODULES[i]:
             assert f"VGXX:{linac.name}:{cm}96:COMBO_P" in linac.insulating_vacuum_pvs
+
+
+def test_get_machine():
+    from utils.sc_linac import linac
+
+    assert linac.get_machine() is linac.MACHINE
+    with pytest.raises(AttributeError):
+        linac.NOT_A_MACHINE
@@ -1,6 +1,9 @@
 from random import randint
+from unittest.mock import MagicMock
 
-from utils.sc_linac.linac_utils import stepper_tol_factor
+import pytest
+
+from utils.sc_linac.linac_utils import stepper_tol_factor, LazyDict
 
 
 def test_stepper_tol_factor_low():
@@ -13,3 +16,28 @@ def test_stepper_tol_factor_high():
 
 def test_stepper_tol_factor():
     assert 1.01 <= stepper_tol_factor(randint(10000, int(50e6))) <= 5
+
+
+def test_lazy_dict():
+    factory = MagicMock(side_effect=lambda key: key * 2)
+    lazy_dict = LazyDict([1, 2, 3], factory)
+
+    assert list(lazy_dict) == [1, 2, 3]
+    assert 2 in lazy_dict
+    assert 4 not in lazy_dict
+    assert len(lazy_dict) == 3
+    factory.assert_not_called()
+
+    assert lazy_dict[2] == 4
+    assert lazy_dict[2] == 4
+    factory.assert_called_once_with(2)
+    assert lazy_dict.built == {2: 4}
+
+    assert dict(lazy_dict) == {1: 2, 2: 4, 3: 6}
+
+
+def test_lazy_dict_missing_key():
+    factory = MagicMock()
+    with pytest.raises(KeyError):
+        LazyDict([1], factory)[2]
+    factory.assert_not_called()
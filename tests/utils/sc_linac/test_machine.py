@@ -1,7 +1,17 @@
+from math import isnan
+from unittest.mock import MagicMock
+
 import pytest
+from lcls_tools.common.controls.pyepics.utils import EPICS_INVALID_VAL
 
 from utils.sc_linac.linac import Machine, Linac
-from utils.sc_linac.linac_utils import ALL_CRYOMODULES
+from utils.sc_linac.linac_utils import (
+    ALL_CRYOMODULES,
+    ALL_CRYOMODULES_NO_HL,
+    HW_MODE_ONLINE_VALUE,
+)
+from utils.sc_linac.pv_batch import ConnectionReport
+from utils.sc_linac.ssa import SSA
 
 
 @pytest.fixture
@@ -22,3 +32,104 @@ def test_linac_names(machine):
 def test_cryomodules(machine):
     for cm_name in ALL_CRYOMODULES:
         assert cm_name in machine.cryomodules
+
+
+def test_lazy_cryomodules(machine):
+    assert not machine.cryomodules.built
+    cavity = machine.cryomodules["01"].cavities[1]
+    assert list(machine.cryomodules.built) == ["01"]
+    assert list(cavity.cryomodule.cavities.built) == [1]
+    assert cavity.rack is cavity.cryomodule.rack_a
+
+
+def test_all_cavities(machine):
+    assert len(machine.all_cavities) == len(ALL_CRYOMODULES) * 8
+    assert machine.all_cavities[-1].cryomodule.is_harmonic_linearizer
+
+
+def test_hl_iterator(machine):
+    cavity = next(machine.hl_iterator)
+    assert cavity.cryomodule.is_harmonic_linearizer
+    assert next(machine.hl_iterator) is not cavity
+    assert not any(cm_name in machine.cryomodules.built for cm_name in ["01", "02"])
+
+
+def test_linac_objects(machine):
+    ssas = list(machine.linac_objects(scope=["ssa"]))
+    assert len(ssas) == len(machine.all_cavities)
+    assert all(isinstance(ssa, SSA) for ssa in ssas)
+
+
+def test_linac_objects_bad_scope(machine):
+    with pytest.raises(ValueError):
+        list(machine.linac_objects(scope=["magnet"]))
+
+
+def test_connect(machine, monkeypatch):
+    monkeypatch.setattr("utils.sc_linac.linac_utils.PV", MagicMock())
+    connect_mock = MagicMock(return_value=ConnectionReport())
+    monkeypatch.setattr("utils.sc_linac.linac.connect_pvs", connect_mock)
+
+    cavity = machine.cryomodules["01"].cavities[1]
+    machine.connect(suffixes=["ADES"], scope=["cavity"], cavities=[cavity])
+
+    assert cavity._ades_pv_obj is not None
+    connect_mock.assert_called_once()
+    assert connect_mock.call_args.args[0] == [cavity._ades_pv_obj]
+
+
+def test_snapshot(machine, monkeypatch):
+    monkeypatch.setattr("utils.sc_linac.linac_utils.PV", MagicMock())
+    cavities = list(machine.cryomodules["01"].cavities.values())[:2]
+    readings = [
+        {"value": HW_MODE_ONLINE_VALUE, "severity": 0, "timestamp": 1},
+        {"value": 16.6, "severity": 1, "timestamp": 2},
+        None,
+        {"value": 5, "severity": 0, "timestamp": 3},
+    ]
+    read_mock = MagicMock(return_value=readings)
+    monkeypatch.setattr("utils.sc_linac.linac.read_pvs", read_mock)
+
+    snapshot = machine.snapshot(fields=["hw_mode", "aact"], cavities=cavities)
+
+    assert len(read_mock.call_args.args[0]) == 4
+    assert list(snapshot["cavity"]) == [1, 2]
+    assert list(snapshot["cryomodule"]) == ["01", "01"]
+    assert snapshot["hw_mode"][0] == HW_MODE_ONLINE_VALUE
+    assert snapshot["aact"][0] == 16.6
+    assert snapshot["aact_severity"][0] == 1
+    assert isnan(snapshot["hw_mode"][1])
+    assert snapshot["hw_mode_severity"][1] == EPICS_INVALID_VAL
+    assert snapshot["aact"][1] == 5
+
+
+def test_snapshot_component_field(machine, monkeypatch):
+    monkeypatch.setattr("utils.sc_linac.linac_utils.PV", MagicMock())
+    cavity = machine.cryomodules["01"].cavities[1]
+    read_mock = MagicMock(return_value=[None])
+    monkeypatch.setattr("utils.sc_linac.linac.read_pvs", read_mock)
+
+    machine.snapshot(fields=["ssa.status"], cavities=[cavity])
+
+    assert read_mock.call_args.args[0] == [cavity.ssa._status_pv_obj]
+
+
+def test_enable_pv_cache(machine):
+    machine.enable_pv_cache(max_age=3)
+    for cavity in machine.all_cavities:
+        assert cavity.pv_cache_max_age == 3
+        assert cavity.ssa.pv_cache_max_age == 3
+        assert cavity.stepper_tuner.pv_cache_max_age == 3
+
+
+def test_magnets(machine):
+    assert len(machine.magnets()) == 3 * len(ALL_CRYOMODULES_NO_HL)
+
+    quads = machine.magnets("QUAD", cryomodules=["01", "H1", "02"])
+    assert [magnet.pv_prefix for magnet in quads] == [
+        "QUAD:L0B:0185:",
+        "QUAD:L1B:0285:",
+    ]
+
+    with pytest.raises(ValueError):
+        machine.magnets("SOLENOID")
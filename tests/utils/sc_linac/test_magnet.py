@@ -1,6 +1,7 @@
 from random import randint, choice
 from unittest.mock import MagicMock
 
+import numpy as np
 import pytest
 from lcls_tools.common.controls.pyepics.utils import make_mock_pv
 
@@ -11,10 +12,11 @@ from utils.sc_linac.linac_utils import (
     MAGNET_ON_VALUE,
     MAGNET_OFF_VALUE,
     MAGNET_DEGAUSS_VALUE,
+    MAGNET_READY_VALUE,
     ALL_CRYOMODULES_NO_HL,
     L1BHL,
 )
-from utils.sc_linac.magnet import Magnet
+from utils.sc_linac.magnet import Magnet, MagnetGroup
 
 
 @pytest.fixture
@@ -120,3 +122,55 @@ def test_trim(cryomodule):
     magnet._control_pv_obj = make_mock_pv()
     magnet.trim()
     magnet._control_pv_obj.put.assert_called_with(MAGNET_TRIM_VALUE)
+
+
+@pytest.fixture
+def group(cryomodule, monkeypatch):
+    monkeypatch.setattr(
+        "utils.sc_linac.magnet.read_pvs",
+        lambda pv_objs: [{"value": pv_obj.get()} for pv_obj in pv_objs],
+    )
+    magnets = [cryomodule.quad, cryomodule.xcor, cryomodule.ycor]
+    for magnet in magnets:
+        magnet._control_pv_obj = make_mock_pv(get_val=MAGNET_READY_VALUE)
+        magnet._bdes_pv_obj = make_mock_pv(get_val=1)
+        magnet._bact_pv_obj = make_mock_pv(get_val=1.01)
+    yield MagnetGroup(magnets)
+
+
+def test_group_degauss(group):
+    # The YCOR never finishes
+    ycor_ctrl = group.magnets[2]._control_pv_obj
+    ycor_ctrl.put.side_effect = lambda value, **kwargs: setattr(
+        ycor_ctrl.get, "return_value", value
+    )
+
+    table = group.degauss(timeout=0)
+    for magnet in group:
+        magnet._control_pv_obj.put.assert_called_once_with(
+            MAGNET_DEGAUSS_VALUE, wait=False
+        )
+    assert list(table["magnet"]) == ["QUAD", "XCOR", "YCOR"]
+    assert list(table["done"]) == [True, True, False]
+    assert table["ctrl"][2] == MAGNET_DEGAUSS_VALUE
+    assert table["bact"][0] == 1.01
+
+
+def test_group_set_bdes(group):
+    table = group.set_bdes([0.5, -0.2, 0.1])
+    assert table["done"].all()
+    group.magnets[1]._bdes_pv_obj.put.assert_called_with(-0.2, wait=False)
+    for magnet in group:
+        magnet._control_pv_obj.put.assert_called_with(MAGNET_TRIM_VALUE, wait=False)
+
+    with pytest.raises(ValueError):
+        group.set_bdes([1])
+
+
+def test_group_status_unreadable(group, monkeypatch):
+    monkeypatch.setattr(
+        "utils.sc_linac.magnet.read_pvs", lambda pv_objs: [None] * len(pv_objs)
+    )
+    table = group.status_table()
+    assert not table["done"].any()
+    assert np.isnan(table["bdes"]).all()
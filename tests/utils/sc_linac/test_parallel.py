@@ -0,0 +1,119 @@
+import threading
+from collections import Counter
+
+import pytest
+
+from utils.sc_linac.cavity import Cavity
+from utils.sc_linac.linac import Machine
+from utils.sc_linac.linac_utils import ParallelExecutionError, QuenchError
+from utils.sc_linac.parallel import (
+    ParallelRunner,
+    run_parallel,
+    ssa_resource_key,
+)
+
+
+@pytest.fixture
+def machine():
+    yield Machine()
+
+
+def test_results(machine):
+    cavities = list(machine.cryomodules["01"].cavities.values())
+    report = machine.run_parallel(lambda cavity: cavity.number, cavities)
+    assert report.all_succeeded
+    assert report.results == {cavity: cavity.number for cavity in cavities}
+
+
+def test_errors(machine):
+    cavities = list(machine.cryomodules["01"].cavities.values())
+
+    def fn(cavity: Cavity):
+        if cavity.number == 3:
+            raise QuenchError(f"{cavity} quenched")
+
+    report = run_parallel(fn, cavities)
+    assert list(report.errors) == [cavities[2]]
+    assert len(report.results) == 7
+    with pytest.raises(ParallelExecutionError):
+        report.raise_for_errors()
+
+
+def test_shared_ssa(machine):
+    cavities = list(machine.cryomodules["H1"].cavities.values())
+    assert ssa_resource_key(cavities[0]) == ssa_resource_key(cavities[4])
+
+    lock = threading.Lock()
+    active = Counter()
+    max_active = Counter()
+
+    def fn(cavity: Cavity):
+        key = ssa_resource_key(cavity)
+        with lock:
+            active[key] += 1
+            max_active[key] = max(max_active[key], active[key])
+        threading.Event().wait(0.01)
+        with lock:
+            active[key] -= 1
+
+    report = run_parallel(fn, cavities, resource_limits={"shared_ssa": 1})
+    assert report.all_succeeded
+    assert set(max_active.values()) == {1}
+
+
+def test_per_cm(machine):
+    cavities = list(machine.cryomodules["02"].cavities.values()) + list(
+        machine.cryomodules["03"].cavities.values()
+    )
+    lock = threading.Lock()
+    active = Counter()
+    max_active = Counter()
+
+    def fn(cavity: Cavity):
+        with lock:
+            active[cavity.cryomodule.name] += 1
+            max_active[cavity.cryomodule.name] = max(
+                max_active[cavity.cryomodule.name], active[cavity.cryomodule.name]
+            )
+        threading.Event().wait(0.01)
+        with lock:
+            active[cavity.cryomodule.name] -= 1
+
+    run_parallel(fn, cavities, max_concurrency=16, resource_limits={"per_cm": 2})
+    assert max_active == {"02": 2, "03": 2}
+
+
+def test_progress_callback(machine):
+    cavities = list(machine.cryomodules["01"].cavities.values())
+    progress = []
+    run_parallel(
+        lambda cavity: None,
+        cavities,
+        progress_callback=lambda cavity, done, total: progress.append((done, total)),
+    )
+    assert sorted(progress) == [(done, 8) for done in range(1, 9)]
+
+
+def test_timeout(machine):
+    cavity: Cavity = machine.cryomodules["01"].cavities[1]
+    abort_seen = []
+
+    def ignore_abort(cav: Cavity):
+        # Never calls check_abort, just notices the request
+        threading.Event().wait(0.2)
+        abort_seen.append(cav.abort_flag)
+
+    report = run_parallel(ignore_abort, [cavity], timeout=0)
+    assert report.timed_out == [cavity]
+    assert isinstance(report.errors[cavity], TimeoutError)
+    assert abort_seen == [True]
+
+    # The abort doesn't carry over to the cavity's next procedure
+    assert not cavity.abort_flag
+
+
+def test_invalid_limits():
+    with pytest.raises(ValueError):
+        ParallelRunner(print, resource_limits={"per_decarad": 1})
+    with pytest.raises(ValueError):
+        ParallelRunner(print, resource_limits={"per_cm": 0})
@@ -0,0 +1,116 @@
+from unittest.mock import MagicMock
+
+import pytest
+
+from utils.sc_linac.cavity_data import load_cavity_data
+from utils.sc_linac.linac_utils import CavityAbortError, SetupStageError
+from utils.sc_linac.pipeline import (
+    STAGE_DONE,
+    STAGE_FAILED,
+    STAGE_SKIPPED,
+    SetupPipeline,
+    Stage,
+)
+
+
+@pytest.fixture
+def checkpoint_file(tmp_path) -> str:
+    yield str(tmp_path / "checkpoints" / "cm01.json")
+
+
+def make_pipeline(checkpoint_file: str, *stages: Stage) -> SetupPipeline:
+    return SetupPipeline(list(stages), checkpoint_file, "1")
+
+
+def test_resume_from_checkpoint(checkpoint_file):
+    first = Stage("first", MagicMock())
+    second = Stage("second", MagicMock(side_effect=CavityAbortError))
+    third = Stage("third", MagicMock())
+    pipeline = make_pipeline(checkpoint_file, first, second, third)
+
+    with pytest.raises(CavityAbortError):
+        pipeline.run()
+    assert [result.status for result in pipeline.results] == [STAGE_DONE, STAGE_FAILED]
+    third.run.assert_not_called()
+
+    checkpoint = load_cavity_data(checkpoint_file, "1")
+    assert not checkpoint["finished"]
+    assert checkpoint["stages"][1]["error"] == str(CavityAbortError())
+
+    second.run.side_effect = None
+    results = pipeline.run()
+    assert [result.status for result in results] == [
+        STAGE_SKIPPED,
+        STAGE_DONE,
+        STAGE_DONE,
+    ]
+    first.run.assert_called_once()
+
+    # Nothing is carried over once a run finishes
+    pipeline.run()
+    assert first.run.call_count == 2
+
+
+def test_postcondition(checkpoint_file):
+    done = Stage("done", MagicMock(), postcondition=lambda: True)
+    not_done = Stage("not done", MagicMock(), postcondition=lambda: False)
+    results = make_pipeline(checkpoint_file, done, not_done).run()
+
+    done.run.assert_not_called()
+    not_done.run.assert_called()
+    assert results[1].duration >= 0
+
+
+def test_resume_check(checkpoint_file):
+    # e.g. tuning, which can't be measured again with RF off
+    unmeasurable = Stage(
+        "unmeasurable",
+        MagicMock(),
+        postcondition=lambda: False,
+        resume_check=MagicMock(return_value=True),
+    )
+    live_only = Stage("live only", MagicMock(), postcondition=lambda: False)
+    failing = Stage("failing", MagicMock(side_effect=CavityAbortError))
+    pipeline = make_pipeline(checkpoint_file, unmeasurable, live_only, failing)
+
+    with pytest.raises(CavityAbortError):
+        pipeline.run()
+    unmeasurable.resume_check.assert_not_called()
+
+    failing.run.side_effect = None
+    pipeline.run()
+    unmeasurable.run.assert_called_once()
+    assert live_only.run.call_count == 2
+
+    # The result no longer holds
+    failing.run.side_effect = CavityAbortError
+    with pytest.raises(CavityAbortError):
+        pipeline.run()
+    unmeasurable.resume_check.return_value = False
+    failing.run.side_effect = None
+    pipeline.run()
+    assert unmeasurable.run.call_count == 3
+
+
+def test_precondition(checkpoint_file):
+    stage = Stage("stage", MagicMock(), precondition=lambda: False)
+    with pytest.raises(SetupStageError):
+        make_pipeline(checkpoint_file, stage).run()
+    stage.run.assert_not_called()
+
+
+def test_verify(checkpoint_file):
+    stage = Stage("stage", MagicMock(), postcondition=lambda: False, verify=True)
+    with pytest.raises(SetupStageError):
+        make_pipeline(checkpoint_file, stage).run()
+    stage.run.assert_called()
+
+
+def test_abort_check():
+    stage = Stage("stage", MagicMock())
+    pipeline = SetupPipeline(
+        [stage], abort_check=MagicMock(side_effect=CavityAbortError)
+    )
+    with pytest.raises(CavityAbortError):
+        pipeline.run()
+    stage.run.assert_not_called()
@@ -0,0 +1,76 @@
+from unittest.mock import MagicMock
+
+from lcls_tools.common.controls.pyepics.utils import make_mock_pv
+
+from utils.sc_linac.pv_batch import connect_pvs, ConnectionReport, read_pvs, write_pvs
+
+
+def make_unconnected_pv(name: str, connects: bool):
+    pv = make_mock_pv()
+    pv.pvname = name
+    pv.connected = False
+    pv.wait_for_connection = MagicMock(return_value=connects)
+    return pv
+
+
+def test_connect_pvs(monkeypatch):
+    ca = MagicMock()
+    monkeypatch.setattr("utils.sc_linac.pv_batch.ca", ca)
+    good_pv = make_unconnected_pv("GOOD", connects=True)
+    bad_pv = make_unconnected_pv("BAD", connects=False)
+
+    report = connect_pvs([good_pv, bad_pv], timeout=1)
+
+    ca.flush_io.assert_called_once()
+    assert report.connected == ["GOOD"]
+    assert report.timed_out == ["BAD"]
+    assert not report.all_connected
+
+
+def test_connect_pvs_already_connected(monkeypatch):
+    monkeypatch.setattr("utils.sc_linac.pv_batch.ca", MagicMock())
+    pv = make_unconnected_pv("CONNECTED", connects=False)
+    pv.connected = True
+
+    report = connect_pvs([pv])
+
+    pv.wait_for_connection.assert_not_called()
+    assert report.all_connected
+
+
+def test_connection_report_str():
+    report = ConnectionReport(connected=["A", "B"], timed_out=["C"])
+    assert str(report) == "2/3 PVs connected"
+
+
+def test_read_pvs(monkeypatch):
+    ca = MagicMock()
+    ca.get_complete_with_metadata = MagicMock(
+        return_value={"value": 5, "severity": 0, "timestamp": 0}
+    )
+    monkeypatch.setattr("utils.sc_linac.pv_batch.ca", ca)
+    connected_pv = make_unconnected_pv("CONNECTED", connects=True)
+    connected_pv.connected = True
+    disconnected_pv = make_unconnected_pv("DISCONNECTED", connects=False)
+
+    readings = read_pvs([connected_pv, disconnected_pv], timeout=1)
+
+    ca.get_with_metadata.assert_called_once()
+    ca.poll.assert_called_once()
+    assert readings == [{"value": 5, "severity": 0, "timestamp": 0}, None]
+
+
+def test_write_pvs(monkeypatch):
+    ca = MagicMock()
+    monkeypatch.setattr("utils.sc_linac.pv_batch.ca", ca)
+    first_pv = make_mock_pv()
+    second_pv = make_mock_pv()
+
+    write_pvs([(first_pv, 1), (second_pv, "OK")])
+
+    first_pv.put.assert_called_once_with(1, wait=False)
+    second_pv.put.assert_called_once_with("OK", wait=False)
+    ca.flush_io.assert_called_once()
+
+    write_pvs([])
+    ca.flush_io.assert_called_once()
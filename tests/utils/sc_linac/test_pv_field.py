@@ -0,0 +1,86 @@
+import pytest
+from lcls_tools.common.controls.pyepics.utils import make_mock_pv
+
+from utils.sc_linac.linac_utils import SCLinacObject
+from utils.sc_linac.pv_field import PVField, PV_OBJ_TABLE_ATTR
+
+
+class FieldObject(SCLinacObject):
+    ades_pv = PVField("ADES", writable=True)
+    aact_pv = PVField("AACTMEAN", cached=True)
+    decimation_pv = PVField("ACQ_DECIM_SEL.A", obj_attr="_decim_pv_obj")
+
+    @property
+    def pv_prefix(self):
+        return "TEST:"
+
+
+class ChildFieldObject(FieldObject):
+    rf_state_pv = PVField("RFSTATE")
+
+
+@pytest.fixture
+def field_object():
+    yield FieldObject()
+
+
+def test_address(field_object):
+    assert field_object.ades_pv == "TEST:ADES"
+    assert field_object.decimation_pv == "TEST:ACQ_DECIM_SEL.A"
+    assert "ades_pv" not in vars(field_object)
+
+
+def test_class_access():
+    assert isinstance(FieldObject.ades_pv, PVField)
+    assert FieldObject.ades_pv.stem == "ades"
+
+
+def test_pv_obj_slot(field_object):
+    assert field_object._ades_pv_obj is None
+    assert not hasattr(field_object, PV_OBJ_TABLE_ATTR)
+
+    pv = make_mock_pv()
+    field_object._ades_pv_obj = pv
+    assert field_object._ades_pv_obj is pv
+    assert getattr(field_object, PV_OBJ_TABLE_ATTR) == {"ades": pv}
+
+    field_object._ades_pv_obj = None
+    assert field_object._ades_pv_obj is None
+    assert getattr(field_object, PV_OBJ_TABLE_ATTR) == {}
+
+
+def test_custom_obj_attr(field_object):
+    pv = make_mock_pv()
+    field_object._decim_pv_obj = pv
+    assert field_object.lazy_pv_obj("decimation") is pv
+
+
+def test_pv_fields():
+    assert list(FieldObject.pv_fields()) == ["ades", "aact", "decimation"]
+    assert list(ChildFieldObject.pv_fields()) == [
+        "ades",
+        "aact",
+        "decimation",
+        "rf_state",
+    ]
+
+
+def test_pv_addresses(field_object):
+    assert field_object.pv_addresses(writable_only=True) == {"ades": "TEST:ADES"}
+    assert len(field_object.pv_addresses()) == 3
+
+
+def test_pv_obj_attributes(field_object):
+    attributes = field_object.pv_obj_attributes()
+    assert attributes["_decim_pv_obj"] == "TEST:ACQ_DECIM_SEL.A"
+
+
+def test_bad_name():
+    with pytest.raises((AttributeError, RuntimeError)):
+
+        class BadFieldObject(SCLinacObject):
+            ades = PVField("ADES")
+
+            @property
+            def pv_prefix(self):
+                return "TEST:"
@@ -0,0 +1,72 @@
+import pytest
+
+from utils.sc_linac.cavity import Cavity
+from utils.sc_linac.linac import Machine
+from utils.sc_linac.pv_index import PVIndexEntry
+
+
+@pytest.fixture
+def machine():
+    yield Machine()
+
+
+def test_lookup(machine):
+    cavity: Cavity = machine.cryomodules["01"].cavities[1]
+    entries = machine.pv_index.lookup(cavity.ades_pv)
+    assert entries == [PVIndexEntry(cavity.ades_pv, cavity, "ades_pv", "cavity")]
+    assert machine.pv_index.lookup("FAKE:PV") == []
+
+
+def test_only_built_objects(machine):
+    cavity: Cavity = machine.cryomodules["01"].cavities[1]
+    other_cavity: Cavity = machine.cryomodules["02"].cavities[2]
+    assert cavity.ades_pv in machine.pv_index
+    assert list(machine.cryomodules.built) == ["01", "02"]
+
+    # Indexing shouldn't build anything that hasn't been requested
+    assert other_cavity.ades_pv in machine.pv_index
+    assert list(machine.cryomodules.built) == ["01", "02"]
+    assert "ACCL:L0B:0130:ADES" not in machine.pv_index
+
+
+def test_incremental(machine):
+    machine.cryomodules["01"].cavities[1]
+    num_pvs = len(machine.pv_index)
+    cavity: Cavity = machine.cryomodules["01"].cavities[2]
+    assert cavity.ades_pv in machine.pv_index
+    assert len(machine.pv_index) > num_pvs
+
+
+def test_with_prefix(machine):
+    cavity: Cavity = machine.cryomodules["01"].cavities[1]
+    entries = machine.pv_index.with_prefix(cavity.pv_prefix)
+    assert entries
+    assert all(entry.pv_name.startswith(cavity.pv_prefix) for entry in entries)
+    assert {entry.obj for entry in entries} >= {cavity, cavity.ssa, cavity.piezo}
+
+
+def test_with_suffix(machine):
+    cavities = [machine.cryomodules["01"].cavities[i] for i in range(1, 9)]
+    entries = machine.pv_index.with_suffix(":ADES")
+    assert {entry.obj for entry in entries} == set(cavities)
+
+
+def test_shared_hl_ssa_pv(machine):
+    cavity1: Cavity = machine.cryomodules["H1"].cavities[1]
+    cavity2: Cavity = machine.cryomodules["H1"].cavities[5]
+    assert cavity1.ssa.turn_on_pv == cavity2.ssa.turn_on_pv
+    owners = {entry.obj for entry in machine.pv_index.lookup(cavity1.ssa.turn_on_pv)}
+    assert owners == {cavity1.ssa, cavity2.ssa}
+
+
+def test_linac_vacuum_pv(machine):
+    linac = machine.linacs[1]
+    levels = {
+        entry.level for entry in machine.pv_index.lookup(linac.beamline_vacuum_pvs[0])
+    }
+    assert levels == {"linac"}
+    machine.cryomodules["02"].cavities[1]
+    levels = {
+        entry.level for entry in machine.pv_index.lookup(linac.beamline_vacuum_pvs[0])
+    }
+    assert levels == {"linac", "cryomodule"}
@@ -0,0 +1,103 @@
+from typing import List
+from unittest.mock import MagicMock
+
+import pytest
+from lcls_tools.common.controls.pyepics.utils import (
+    EPICS_INVALID_VAL,
+    PVInvalidError,
+    make_mock_pv,
+)
+
+from tests.utils.mock_utils import mock_func
+from utils.sc_linac.cavity import Cavity
+from utils.sc_linac.linac import Machine
+from utils.sc_linac.linac_utils import CavityAbortError, QuenchError
+from utils.sc_linac.ramp import RampEngine, ramp_to_acon
+
+
+@pytest.fixture
+def cavities(monkeypatch) -> List[Cavity]:
+    monkeypatch.setattr("time.sleep", mock_func)
+    cavities = list(Machine().cryomodules["01"].cavities.values())[:3]
+    for cavity in cavities:
+        cavity._ades_pv_obj = make_mock_pv(get_val=5)
+        cavity._acon_pv_obj = make_mock_pv(get_val=5.3)
+        cavity._quench_latch_pv_obj = make_mock_pv(get_val=0)
+    yield cavities
+
+
+def test_interleaved(cavities):
+    puts = []
+    for cavity in cavities:
+        cavity._ades_pv_obj.put.side_effect = lambda value, cavity=cavity: puts.append(
+            (cavity.number, value)
+        )
+
+    report = ramp_to_acon(cavities, step_size=0.1)
+    assert report.all_succeeded
+    assert report.results == {cavity: 5.3 for cavity in cavities}
+
+    # Every cavity takes its first step before any takes its second
+    assert [number for number, _ in puts[:3]] == [1, 2, 3]
+    assert puts[-1] == (3, 5.3)
+    for cavity in cavities:
+        # The starting amplitude is only read once per cavity
+        cavity._ades_pv_obj.get.assert_called_once()
+        cavity._quench_latch_pv_obj.remove_callback.assert_called()
+
+
+def test_already_at_target(cavities):
+    report = RampEngine().run()
+    assert not report.results
+
+    engine = RampEngine()
+    engine.add(cavities[0], 5, 0.1)
+    report = engine.run()
+    assert report.results == {cavities[0]: 5}
+    cavities[0]._ades_pv_obj.put.assert_not_called()
+
+
+def test_quench_at_start(cavities):
+    cavities[1]._quench_latch_pv_obj = make_mock_pv(get_val=1)
+    report = ramp_to_acon(cavities)
+    assert isinstance(report.errors[cavities[1]], QuenchError)
+    assert set(report.results) == {cavities[0], cavities[2]}
+    cavities[1]._ades_pv_obj.put.assert_not_called()
+
+
+def test_quench_from_monitor(cavities):
+    quench_latch_pv_obj = cavities[0]._quench_latch_pv_obj
+
+    def put(value):
+        callback = quench_latch_pv_obj.add_callback.call_args.args[0]
+        callback(value=1, severity=0)
+
+    cavities[0]._ades_pv_obj.put.side_effect = put
+    report = ramp_to_acon(cavities)
+    assert isinstance(report.errors[cavities[0]], QuenchError)
+    cavities[0]._ades_pv_obj.put.assert_called_once()
+    assert len(report.results) == 2
+
+
+def test_quench_latch_invalid(cavities):
+    quench_latch_pv_obj = cavities[0]._quench_latch_pv_obj
+
+    def put(value):
+        callback = quench_latch_pv_obj.add_callback.call_args.args[0]
+        callback(value=0, severity=EPICS_INVALID_VAL)
+
+    cavities[0]._ades_pv_obj.put.side_effect = put
+    report = ramp_to_acon(cavities)
+    assert isinstance(report.errors[cavities[0]], PVInvalidError)
+
+
+def test_abort(cavities):
+    cavities[2].check_abort = MagicMock(side_effect=CavityAbortError)
+    report = ramp_to_acon(cavities)
+    assert isinstance(report.errors[cavities[2]], CavityAbortError)
+    cavities[2]._quench_latch_pv_obj.remove_callback.assert_called()
+
+
+def test_invalid_rate():
+    with pytest.raises(ValueError):
+        RampEngine(max_put_rate=0)
@@ -1,10 +1,17 @@
+import asyncio
+import threading
 from random import randint, uniform, choice
-from unittest.mock import MagicMock
+from unittest.mock import AsyncMock, MagicMock
 
 import pytest
 from lcls_tools.common.controls.pyepics.utils import make_mock_pv
 
-from tests.utils.mock_utils import mock_func
+from tests.utils.mock_utils import mock_func, make_mock_async_pv
+from utils.sc_linac.calibration_ledger import (
+    SSA_CALIBRATION,
+    CalibrationPolicy,
+    get_ledger,
+)
 from utils.sc_linac.cavity import Cavity
 from utils.sc_linac.linac_utils import (
     SSA_STATUS_ON_VALUE,
@@ -22,12 +29,19 @@ from utils.sc_linac.linac_utils import (
     ALL_CRYOMODULES,
     CavityAbortError,
 )
-from utils.sc_linac.ssa import SSA
+from utils.sc_linac.linac import Machine
+from utils.sc_linac.parallel import ssa_resource_key
+from utils.sc_linac.ssa import SSA, calibrate_ssas
 
 
 @pytest.fixture
-def ssa(monkeypatch):
+def ssa(monkeypatch, tmp_path):
     monkeypatch.setattr("time.sleep", mock_func)
+    monkeypatch.setattr(
+        "utils.sc_linac.linac_utils.CALIBRATION_LEDGER_PATH",
+        str(tmp_path / "ledger.db"),
+    )
+    monkeypatch.setattr("asyncio.sleep", AsyncMock())
     rack = MagicMock()
     rack.cryomodule.name = choice(ALL_CRYOMODULES)
     rack.cryomodule.linac.name = f"L{randint(0,3)}B"
@@ -120,6 +134,27 @@ def test_calibrate(ssa):
     ssa.run_calibration.assert_called()
 
 
+def test_calibrate_fresh(ssa):
+    ssa.cavity.calibration_policy = CalibrationPolicy()
+    ssa.run_calibration = MagicMock()
+    ssa._current_slope_pv_obj = make_mock_pv(get_val=1.5)
+    get_ledger().record(ssa.cavity, SSA_CALIBRATION, {"ssa_slope": 1.5})
+
+    ssa.calibrate(0.8)
+    ssa.run_calibration.assert_not_called()
+
+    # Explicitly requested
+    ssa._drive_max_setpoint_pv_obj = make_mock_pv()
+    ssa.calibrate(0.8, force=True)
+    ssa.run_calibration.assert_called_once()
+    ssa.run_calibration.reset_mock()
+
+    ssa._current_slope_pv_obj = make_mock_pv(get_val=1.8)
+    ssa._drive_max_setpoint_pv_obj = make_mock_pv()
+    ssa.calibrate(0.8)
+    ssa.run_calibration.assert_called()
+
+
 def test_ps_volt_setpoint2_pv_obj(ssa):
     ssa._ps_volt_setpoint2_pv_obj = make_mock_pv()
     assert ssa.ps_volt_setpoint2_pv_obj == ssa._ps_volt_setpoint2_pv_obj
@@ -222,6 +257,10 @@ def test_run_calibration(ssa):
     ssa.cavity.reset_interlocks.assert_called()
     ssa.start_calibration.assert_called()
     ssa.cavity.push_ssa_slope.assert_called()
+    assert get_ledger().latest(ssa.cavity, SSA_CALIBRATION).values == {
+        "ssa_slope": ssa.measured_slope,
+        "max_fwd_pwr": ssa.max_fwd_pwr,
+    }
 
 
 def test_run_calibration_crashed(ssa):
@@ -300,3 +339,110 @@ def test_wait_while_resetting(ssa):
     ssa._status_pv_obj = make_mock_pv(get_val=SSA_STATUS_RESETTING_FAULTS_VALUE)
     with pytest.raises(CavityAbortError):
         ssa.wait_while_resetting()
+
+
+def test_acalibrate(ssa):
+    ssa._async_pv_table = {"drive_max_setpoint": make_mock_async_pv()}
+    ssa.arun_calibration = AsyncMock()
+    drive = uniform(0.5, 1)
+    asyncio.run(ssa.acalibrate(drive))
+    ssa.async_pv("drive_max_setpoint").put.assert_awaited_with(drive)
+    ssa.arun_calibration.assert_awaited()
+
+
+def test_acalibrate_retries(ssa):
+    ssa._async_pv_table = {"drive_max_setpoint": make_mock_async_pv()}
+    ssa.arun_calibration = AsyncMock(side_effect=SSACalibrationToleranceError)
+    with pytest.raises(SSACalibrationError):
+        asyncio.run(ssa.acalibrate(0.8))
+    assert ssa.arun_calibration.await_count == 4
+
+
+def test_aturn_on(ssa):
+    ssa.cavity.cryomodule.is_harmonic_linearizer = False
+    ssa._async_pv_table = {
+        "status": make_mock_async_pv(get_val=SSA_STATUS_ON_VALUE),
+        "turn_on": make_mock_async_pv(),
+    }
+    asyncio.run(ssa.aturn_on())
+    ssa.async_pv("turn_on").put.assert_not_awaited()
+
+
+def test_areset_timeout(ssa):
+    ssa._async_pv_table = {
+        "status": make_mock_async_pv(get_val=SSA_STATUS_FAULTED_VALUE),
+        "reset": make_mock_async_pv(),
+    }
+    ssa.async_pv("status").wait_until = AsyncMock(return_value=False)
+    with pytest.raises(SSAFaultError):
+        asyncio.run(ssa.areset())
+    ssa.async_pv("reset").put.assert_awaited_with(1)
+
+
+def test_arun_calibration(ssa):
+    ssa._async_pv_table = {
+        "calibration_start": make_mock_async_pv(),
+        "calibration_status": make_mock_async_pv(get_val=1),
+        "cal_result_status": make_mock_async_pv(get_val=SSA_RESULT_GOOD_STATUS_VALUE),
+        "max_fwd_pwr": make_mock_async_pv(get_val=ssa.fwd_power_lower_limit * 2),
+        "measured_slope": make_mock_async_pv(
+            get_val=uniform(SSA_SLOPE_LOWER_LIMIT, SSA_SLOPE_UPPER_LIMIT)
+        ),
+    }
+    ssa.areset = AsyncMock()
+    ssa.aturn_on = AsyncMock()
+    ssa.cavity.areset_interlocks = AsyncMock()
+    ssa.cavity._async_pv_table = {"push_ssa_slope": make_mock_async_pv()}
+
+    asyncio.run(ssa.arun_calibration())
+    ssa.async_pv("calibration_start").put.assert_awaited_with(1)
+    ssa.cavity.async_pv("push_ssa_slope").put.assert_awaited_with(1)
+
+
+def test_arun_calibration_crashed(ssa):
+    ssa._async_pv_table = {
+        "calibration_start": make_mock_async_pv(),
+        "calibration_status": make_mock_async_pv(get_val=SSA_CALIBRATION_CRASHED_VALUE),
+    }
+    ssa.areset = AsyncMock()
+    ssa.aturn_on = AsyncMock()
+    ssa.cavity.areset_interlocks = AsyncMock()
+    with pytest.raises(SSACalibrationError):
+        asyncio.run(ssa.arun_calibration())
+
+
+def test_calibrate_ssas_shared():
+    cavities = list(Machine().cryomodules["H1"].cavities.values())
+    lock = threading.Lock()
+    running = set()
+    overlapped = []
+
+    for cavity in cavities:
+        cavity.turn_off = MagicMock()
+        cavity.ssa._saved_drive_max_pv_obj = make_mock_pv(get_val=0.8)
+        cavity.ssa._current_slope_pv_obj = make_mock_pv(get_val=cavity.number)
+        cavity.ssa._max_fwd_pwr_pv_obj = make_mock_pv(get_val=4000)
+
+        def calibrate(drive_max, cavity=cavity):
+            with lock:
+                assert ssa_resource_key(cavity) not in running
+                running.add(ssa_resource_key(cavity))
+                overlapped.append(len(running))
+            threading.Event().wait(0.05)
+            with lock:
+                running.remove(ssa_resource_key(cavity))
+            if cavity.number == 8:
+                raise SSACalibrationError("out of tolerance")
+
+        cavity.ssa.calibrate = MagicMock(side_effect=calibrate)
+
+    report = calibrate_ssas(cavities)
+    assert report.results == {
+        cavity: {"ssa_slope": cavity.number, "max_fwd_pwr": 4000}
+        for cavity in cavities[:7]
+    }
+    assert isinstance(report.errors[cavities[7]], SSACalibrationError)
+    # Independent SSAs ran together, but shared ones never did
+    assert max(overlapped) == 4
+    for cavity in cavities:
+        cavity.turn_off.assert_called()
@@ -1,24 +1,29 @@
+import asyncio
 from random import randint, choice
-from unittest.mock import MagicMock
+from unittest.mock import AsyncMock, MagicMock
 
 import pytest
 from lcls_tools.common.controls.pyepics.utils import make_mock_pv
 
-from tests.utils.mock_utils import mock_func
+from tests.utils.mock_utils import mock_func, make_mock_async_pv
 from utils.sc_linac.cavity import Cavity
 from utils.sc_linac.linac_utils import (
     StepperAbortError,
+    StepperError,
     STEPPER_ON_LIMIT_SWITCH_VALUE,
     DEFAULT_STEPPER_MAX_STEPS,
     DEFAULT_STEPPER_SPEED,
     ALL_CRYOMODULES,
+    MAX_STEPPER_SPEED,
+    STEPPER_MOVE_OVERHEAD,
 )
-from utils.sc_linac.stepper import StepperTuner
+from utils.sc_linac.stepper import MovePlan, StepperTuner
 
 
 @pytest.fixture
 def stepper(monkeypatch):
     monkeypatch.setattr("time.sleep", mock_func)
+    monkeypatch.setattr("utils.sc_linac.linac_utils.STEPPER_START_MOVING_TIMEOUT", 0)
     rack = MagicMock()
     rack.cryomodule.name = choice(ALL_CRYOMODULES)
     rack.cryomodule.linac.name = f"L{randint(0,3)}B"
@@ -144,6 +149,7 @@ def test_move(stepper):
     stepper._max_steps_pv_obj = make_mock_pv()
     stepper._speed_pv_obj = make_mock_pv()
     stepper._step_des_pv_obj = make_mock_pv()
+    stepper._step_signed_pv_obj = make_mock_pv(get_val=0)
     stepper.issue_move_command = MagicMock()
     stepper.restore_defaults = MagicMock()
 
@@ -152,10 +158,60 @@ def test_move(stepper):
     stepper._max_steps_pv_obj.put.assert_called_with(DEFAULT_STEPPER_MAX_STEPS)
     stepper._speed_pv_obj.put.assert_called_with(DEFAULT_STEPPER_SPEED)
     stepper._step_des_pv_obj.put.assert_called_with(abs(num_steps))
-    stepper.issue_move_command.assert_called_with(num_steps, check_detune=True)
+    stepper.issue_move_command.assert_called_once()
+    assert stepper.issue_move_command.call_args.args == (num_steps,)
+    assert stepper.issue_move_command.call_args.kwargs["check_detune"]
     stepper.restore_defaults.assert_called()
 
 
+def test_move_plan():
+    plan = MovePlan(-250, max_steps=-100, speed=10)
+    assert plan.chunks == [-100, -100, -50]
+    assert plan.max_steps == 100
+    assert plan.expected_duration() == 25 + 3 * STEPPER_MOVE_OVERHEAD
+    assert plan.expected_duration(200) == 5 + STEPPER_MOVE_OVERHEAD
+    assert plan.expected_duration(250) == 0
+
+    assert MovePlan(300, 100, 10).chunks == [100, 100, 100]
+    assert MovePlan(0, 100, 10).chunks == [0]
+    assert MovePlan(10, 100, MAX_STEPPER_SPEED * 2).speed == MAX_STEPPER_SPEED
+
+    with pytest.raises(ValueError):
+        MovePlan(10, 0, 10)
+
+
+def test_move_chunks(stepper):
+    stepper.check_abort = MagicMock()
+    stepper._max_steps_pv_obj = make_mock_pv()
+    stepper._speed_pv_obj = make_mock_pv()
+    stepper._step_des_pv_obj = make_mock_pv()
+    stepper._step_signed_pv_obj = make_mock_pv(get_val=1000)
+    stepper.restore_defaults = MagicMock()
+    progress = MagicMock()
+
+    def issue_move_command(num_steps, check_detune=True, on_poll=None):
+        stepper._step_signed_pv_obj.get.return_value += min(num_steps, 100)
+        on_poll()
+
+    stepper.issue_move_command = MagicMock(side_effect=issue_move_command)
+    stepper.move(250, max_steps=100, speed=10, progress_callback=progress)
+
+    assert [call.args[0] for call in stepper.issue_move_command.call_args_list] == [
+        250,
+        150,
+        50,
+    ]
+    # NSTEPS is only written when the chunk size changes
+    assert [call.args[0] for call in stepper._step_des_pv_obj.put.call_args_list] == [
+        100,
+        50,
+    ]
+    stepper._max_steps_pv_obj.put.assert_called_once_with(100)
+    progress.assert_any_call(100, 250, 15 + 2 * STEPPER_MOVE_OVERHEAD)
+    progress.assert_called_with(250, 250, 0)
+    stepper.restore_defaults.assert_called_once()
+
+
 def test_issue_move_command(stepper):
     stepper.cavity.rack.cryomodule.is_harmonic_linearizer = False
     stepper.move_positive = MagicMock()
@@ -182,3 +238,33 @@ def test_issue_move_command_hl(stepper):
     stepper._motor_moving_pv_obj.get.assert_called()
     stepper._limit_switch_a_pv_obj.get.assert_called()
     stepper._limit_switch_b_pv_obj.get.assert_called()
+
+
+def test_amove(stepper):
+    stepper._async_pv_table = {
+        "max_steps": make_mock_async_pv(),
+        "speed": make_mock_async_pv(),
+        "step_des": make_mock_async_pv(),
+    }
+    stepper.aissue_move_command = AsyncMock()
+    asyncio.run(stepper.amove(-250, max_steps=100, speed=10))
+    assert [call.args[0] for call in stepper.aissue_move_command.await_args_list] == [
+        -250,
+        -150,
+        -50,
+    ]
+    stepper.async_pv("step_des").put.assert_awaited_with(50)
+    stepper.async_pv("max_steps").put.assert_awaited_with(DEFAULT_STEPPER_MAX_STEPS)
+    stepper.async_pv("speed").put.assert_awaited_with(DEFAULT_STEPPER_SPEED)
+
+
+def test_aissue_move_command_limit_switch(stepper):
+    stepper.cavity.cryomodule.is_harmonic_linearizer = False
+    stepper._async_pv_table = {
+        "move_pos": make_mock_async_pv(),
+        "motor_moving": make_mock_async_pv(),
+        "limit_switch_a": make_mock_async_pv(get_val=STEPPER_ON_LIMIT_SWITCH_VALUE),
+    }
+    with pytest.raises(StepperError):
+        asyncio.run(stepper.aissue_move_command(10))
+    stepper.async_pv("move_pos").put.assert_awaited_with(1)
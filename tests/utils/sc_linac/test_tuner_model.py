@@ -0,0 +1,89 @@
+from utils.sc_linac.tuner_model import (
+    TUNER_MODEL_GAIN,
+    TUNER_MODEL_UNLEARNED_GAIN,
+    TunerModel,
+    load_tuner_model,
+    save_tuner_model,
+)
+
+
+class SimulatedTuner:
+    def __init__(self, hz_per_step: float, backlash_steps: int, detune: float):
+        self.hz_per_step = hz_per_step
+        self.backlash_steps = backlash_steps
+        self.detune = detune
+        self.last_direction = 0
+
+    def move(self, steps: int):
+        direction = 1 if steps > 0 else -1
+        effective = abs(steps)
+        if self.last_direction and direction != self.last_direction:
+            effective = max(effective - self.backlash_steps, 0)
+        self.last_direction = direction
+        self.detune -= direction * effective * self.hz_per_step
+
+
+def tune(model: TunerModel, tuner: SimulatedTuner, tolerance=50) -> int:
+    moves = 0
+    while abs(tuner.detune) > tolerance and moves < 20:
+        steps = model.plan(tuner.detune, default_hz_per_step=1)
+        before = tuner.detune
+        tuner.move(steps)
+        model.update(steps, before - tuner.detune, default_hz_per_step=1)
+        moves += 1
+    return moves
+
+
+def test_plan_unlearned():
+    assert TunerModel().plan(1000, 2) == int(TUNER_MODEL_UNLEARNED_GAIN * 500)
+    assert TunerModel().plan(-1000, 2) == -int(TUNER_MODEL_UNLEARNED_GAIN * 500)
+
+
+def test_learns_per_direction():
+    model = TunerModel()
+    model.update(100, 300, default_hz_per_step=1)
+    # The first move after a reversal only tells us about backlash
+    model.update(-100, -150, default_hz_per_step=1)
+    model.update(-100, -150, default_hz_per_step=1)
+    assert model.hz_per_step_positive == 3
+    assert model.hz_per_step_negative == 1.5
+    assert model.plan(-1500, 1) == -int(TUNER_MODEL_GAIN * 1000)
+
+
+def test_ignores_noise():
+    model = TunerModel()
+    model.update(100, 1, default_hz_per_step=1)
+    assert model.hz_per_step_positive is None
+    assert model.samples == 0
+
+
+def test_backlash():
+    model = TunerModel(hz_per_step_positive=1, hz_per_step_negative=1)
+    model.update(100, 100, default_hz_per_step=1)
+    model.update(-100, -60, default_hz_per_step=1)
+    assert model.backlash_steps == 20
+    assert model.plan(100, 1) == int(TUNER_MODEL_GAIN * 100) + 20
+
+
+def test_converges_faster_once_learned():
+    model = TunerModel()
+    tuner = SimulatedTuner(hz_per_step=0.6, backlash_steps=2000, detune=5000)
+    moves = []
+    for detune in [5000, -5000, 5000, -5000]:
+        # The cavity drifts but the tuner keeps its backlash state
+        tuner.detune = detune
+        moves.append(tune(model, tuner))
+
+    assert model.hz_per_step_positive == model.hz_per_step_negative == 0.6
+    assert model.backlash_steps > 0
+    assert moves[-1] < moves[0]
+
+
+def test_persistence(tmp_path):
+    filepath = str(tmp_path / "models" / "cm01.json")
+    assert load_tuner_model(filepath, "1") == TunerModel()
+
+    model = TunerModel(hz_per_step_positive=1.2, backlash_steps=40, samples=3)
+    save_tuner_model(filepath, "1", model)
+    save_tuner_model(filepath, "2", TunerModel())
+    assert load_tuner_model(filepath, "1") == model
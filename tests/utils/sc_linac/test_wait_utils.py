@@ -0,0 +1,70 @@
+import threading
+import time
+from unittest.mock import MagicMock
+
+import pytest
+from lcls_tools.common.controls.pyepics.utils import make_mock_pv
+
+from utils.sc_linac.linac_utils import CavityAbortError
+from utils.sc_linac.wait_utils import updated_since, wait_until
+
+
+def test_wait_until_pv_condition():
+    pv = make_mock_pv(get_val=3)
+    assert wait_until(pv, lambda value: value == 3)
+    pv.get.assert_called()
+    pv.add_callback.assert_called()
+    pv.remove_callback.assert_called()
+
+
+def test_wait_until_predicate():
+    predicate = MagicMock(side_effect=[False, False, True])
+    assert wait_until(predicate, poll_period=0)
+    assert predicate.call_count == 3
+
+
+def test_wait_until_timeout():
+    pv = make_mock_pv(get_val=0)
+    assert not wait_until(pv, lambda value: value == 1, timeout=0)
+    pv.remove_callback.assert_called()
+
+
+def test_wait_until_abort():
+    pv = make_mock_pv(get_val=0)
+    abort_check = MagicMock(side_effect=CavityAbortError)
+    with pytest.raises(CavityAbortError):
+        wait_until(pv, lambda value: value == 1, abort_check=abort_check)
+    pv.remove_callback.assert_called()
+
+
+def test_wait_until_abort_not_called_when_met():
+    abort_check = MagicMock()
+    assert wait_until(lambda: True, abort_check=abort_check)
+    abort_check.assert_not_called()
+
+
+def test_wait_until_wakes_on_update():
+    pv = make_mock_pv(get_val=0)
+    callbacks = []
+    pv.add_callback = MagicMock(side_effect=lambda callback: callbacks.append(callback))
+
+    def update():
+        pv.get.return_value = 1
+        callbacks[0](value=1)
+
+    threading.Timer(0.05, update).start()
+
+    start = time.monotonic()
+    assert wait_until(pv, lambda value: value == 1, poll_period=60)
+    assert time.monotonic() - start < 1
+
+
+def test_updated_since():
+    pv = make_mock_pv()
+    pv.timestamp = None
+    assert not updated_since(pv, None)
+
+    pv.timestamp = 10.0
+    assert updated_since(pv, None)
+    assert not updated_since(pv, 10.0)
+    assert updated_since(pv, 9.0)
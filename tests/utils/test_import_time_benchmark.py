@@ -0,0 +1,24 @@
+import csv
+
+from utils.import_time_benchmark import time_import, record
+
+
+def test_time_import():
+    durations = time_import("json", runs=2)
+    assert len(durations) == 2
+    assert all(duration > 0 for duration in durations)
+
+
+def test_record(tmp_path):
+    history_file = str(tmp_path / "import_times.csv")
+    record(history_file, "json", [0.2, 0.1, 0.3])
+    record(history_file, "json", [0.1])
+
+    with open(history_file) as f:
+        rows = list(csv.DictReader(f))
+
+    assert len(rows) == 2
+    assert rows[0]["module"] == "json"
+    assert rows[0]["runs"] == "3"
+    assert float(rows[0]["min_s"]) == 0.1
+    assert float(rows[0]["median_s"]) == 0.2
@@ -0,0 +1,92 @@
+"""
+Measures how long it takes a fresh interpreter to import a module. Every per
+cavity setup subprocess pays this cost, so it's worth tracking over time:
+run with --history to append the result to a CSV and compare against earlier
+runs
+"""
+
+import argparse
+import csv
+import os
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+from typing import List
+
+DEFAULT_BENCHMARK_MODULE = "applications.auto_setup.launcher.srf_cavity_setup_launcher"
+DEFAULT_BENCHMARK_RUNS = 5
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def time_import(module: str, runs: int = DEFAULT_BENCHMARK_RUNS) -> List[float]:
+    """
+    @param module: dotted module name to import
+    @param runs: number of fresh interpreters to time
+    @return: wall clock seconds for each run, including interpreter startup
+    """
+    durations: List[float] = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(
+            [sys.executable, "-c", f"import {module}"], cwd=REPO_ROOT, check=True
+        )
+        durations.append(time.perf_counter() - start)
+    return durations
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=REPO_ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def record(history_file: str, module: str, durations: List[float]):
+    """
+    Appends one row (timestamp, git revision, module, runs, min, median) to a
+    CSV file, writing the header if the file is new
+    """
+    is_new = not os.path.exists(history_file)
+    with open(history_file, "a", newline="") as f:
+        writer = csv.writer(f)
+        if is_new:
+            writer.writerow(
+                ["timestamp", "revision", "module", "runs", "min_s", "median_s"]
+            )
+        writer.writerow(
+            [
+                datetime.now().isoformat(timespec="seconds"),
+                git_revision(),
+                module,
+                len(durations),
+                f"{min(durations):.4f}",
+                f"{statistics.median(durations):.4f}",
+            ]
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--module", "-m", default=DEFAULT_BENCHMARK_MODULE)
+    parser.add_argument("--runs", "-n", type=int, default=DEFAULT_BENCHMARK_RUNS)
+    parser.add_argument(
+        "--history", help="CSV file to append this result to for tracking over time"
+    )
+    parsed_args = parser.parse_args()
+
+    results = time_import(parsed_args.module, parsed_args.runs)
+    print(
+        f"import {parsed_args.module}: min {min(results):.3f}s,"
+        f" median {statistics.median(results):.3f}s over {len(results)} runs"
+    )
+
+    if parsed_args.history:
+        record(parsed_args.history, parsed_args.module, results)
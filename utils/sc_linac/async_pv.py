@@ -0,0 +1,157 @@
+import asyncio
+import time
+import weakref
+from typing import Any, Awaitable, Callable, Optional
+
+# Upper bound on how long an async wait goes without re-checking the condition
+# (and the abort flag) when no monitor update arrives
+DEFAULT_ASYNC_POLL_PERIOD = 1
+DEFAULT_ASYNC_TIMEOUT = 2
+
+# One caproto client context per event loop, they can't be shared across loops
+_contexts: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+
+def get_context():
+    """
+    @return: the caproto asyncio client context for the running event loop.
+             caproto is imported here rather than at module level so that the
+             (far more common) blocking code paths don't pay for it
+    """
+    from caproto.asyncio.client import Context
+
+    loop = asyncio.get_running_loop()
+    if loop not in _contexts:
+        _contexts[loop] = Context()
+    return _contexts[loop]
+
+
+class AsyncPV:
+    """
+    Asyncio counterpart of the pyepics based PV used everywhere else, backed by
+    caproto's asyncio client. Nothing blocks, so a single event loop can drive
+    any number of cavities at once, and cancelling the task that is awaiting
+    a get, put or wait is enough to stop it
+    """
+
+    def __init__(self, pvname: str, timeout: float = DEFAULT_ASYNC_TIMEOUT):
+        self.pvname: str = pvname
+        self.timeout: float = timeout
+        self._pv = None
+
+    def __repr__(self):
+        return f"AsyncPV({self.pvname!r})"
+
+    async def connect(self):
+        if self._pv is None:
+            (pv,) = await get_context().get_pvs(self.pvname, timeout=self.timeout)
+            await pv.wait_for_connection(timeout=self.timeout)
+            self._pv = pv
+        return self._pv
+
+    @staticmethod
+    def unpack(response) -> Any:
+        data = response.data
+        value = data[0] if len(data) == 1 else data
+        return value.decode() if isinstance(value, bytes) else value
+
+    async def get(self) -> Any:
+        pv = await self.connect()
+        return self.unpack(await pv.read(timeout=self.timeout))
+
+    async def get_severity(self) -> int:
+        pv = await self.connect()
+        response = await pv.read(data_type="status", timeout=self.timeout)
+        return response.metadata.severity
+
+    async def get_timestamp(self) -> float:
+        """
+        @return: the timestamp of the PV's current value
+        """
+        pv = await self.connect()
+        response = await pv.read(data_type="time", timeout=self.timeout)
+        return response.metadata.timestamp
+
+    async def put(self, value, wait: bool = True):
+        pv = await self.connect()
+        await pv.write([value], wait=wait, timeout=self.timeout)
+
+    async def _check(
+        self,
+        condition: Callable[[Any], bool],
+        severity: bool,
+        since: Optional[float],
+    ) -> bool:
+        if since is None:
+            return condition(await (self.get_severity() if severity else self.get()))
+
+        response = await self._pv.read(data_type="time", timeout=self.timeout)
+        if response.metadata.timestamp <= since:
+            return False
+        return condition(
+            response.metadata.severity if severity else self.unpack(response)
+        )
+
+    async def wait_until(
+        self,
+        condition: Callable[[Any], bool],
+        timeout: Optional[float] = None,
+        abort_check: Optional[Callable[[], Awaitable[None]]] = None,
+        poll_period: float = DEFAULT_ASYNC_POLL_PERIOD,
+        severity: bool = False,
+        since: Optional[float] = None,
+    ) -> bool:
+        """
+        Async version of wait_utils.wait_until for a single PV, woken up by
+        monitor updates instead of sleeping a fixed amount between checks
+        @param condition: callable taking the PV value (or alarm severity)
+        @param timeout: seconds to wait before giving up, None to wait forever
+        @param abort_check: coroutine function called after every failed
+                            check, expected to raise if the wait should be
+                            abandoned (e.g. Cavity.acheck_abort)
+        @param poll_period: max seconds between checks when no update comes in
+        @param severity: pass the alarm severity to condition instead of the
+                         value, i.e. to wait for a reading to become valid
+        @param since: only trust readings with a timestamp newer than this
+                      (i.e. the PV's timestamp from before a write that should
+                      change it), anything older counts as not met
+        @return: True if the condition was met, False if it timed out
+        """
+        pv = await self.connect()
+        loop = asyncio.get_running_loop()
+        updated = asyncio.Event()
+
+        # caproto may run callbacks off the loop's thread
+        def wake(sub, response):
+            loop.call_soon_threadsafe(updated.set)
+
+        # subscribe() hands back a subscription shared with any other waiter
+        # on this PV, so only our own callback gets removed afterwards
+        subscription = pv.subscribe()
+        cb_id = subscription.add_callback(wake)
+        start = time.monotonic()
+
+        try:
+            while True:
+                updated.clear()
+
+                if await self._check(condition, severity, since):
+                    return True
+
+                if abort_check:
+                    await abort_check()
+
+                wait_time = poll_period
+                if timeout is not None:
+                    remaining = timeout - (time.monotonic() - start)
+                    if remaining <= 0:
+                        return False
+                    wait_time = min(wait_time, remaining)
+
+                try:
+                    await asyncio.wait_for(updated.wait(), wait_time)
+                except asyncio.TimeoutError:
+                    pass
+
+        finally:
+            await subscription.remove_callback(cb_id)
@@ -0,0 +1,63 @@
+import time
+from typing import Optional
+
+from lcls_tools.common.controls.pyepics.utils import PV
+
+DEFAULT_PV_CACHE_MAX_AGE = 1
+
+
+class CachedPV(PV):
+    """
+    PV that subscribes to CA monitors and answers get() with the last monitored
+    value while the channel is connected. CA monitors only fire on a change,
+    so a monitored value is current for as long as the connection holds. Until
+    a monitor update has arrived (or again after a disconnect) a value from a
+    real get is reused for up to max_age. Meant for long running processes
+    that check the same status PVs in tight loops
+    """
+
+    def __init__(self, pvname, max_age: float = DEFAULT_PV_CACHE_MAX_AGE, **kwargs):
+        """
+        @param pvname: PV address
+        @param max_age: seconds a value from a real get can be reused before
+                        any monitor update has arrived
+        """
+        kwargs["auto_monitor"] = True
+        super().__init__(pvname, **kwargs)
+        self.max_age: float = max_age
+        self._last_update: Optional[float] = None
+        self._monitored: bool = False
+        self.add_callback(self._record_update)
+        self.connection_callbacks.append(self._record_connection)
+
+    def _record_update(self, **kwargs):
+        self._last_update = time.monotonic()
+        self._monitored = True
+
+    def _record_connection(self, conn: bool = False, **kwargs):
+        # Anything monitored before a disconnect can't be trusted after it
+        if not conn:
+            self._monitored = False
+            self._last_update = None
+
+    @property
+    def is_fresh(self) -> bool:
+        if not self.connected:
+            return False
+        if self._monitored:
+            return True
+        return (
+            self._last_update is not None
+            and (time.monotonic() - self._last_update) <= self.max_age
+        )
+
+    def get(self, *args, use_caget=True, use_monitor=True, **kwargs):
+        """
+        Same signature as PV.get, but use_caget is ignored since the whole
+        point is to avoid a new channel access round trip
+        """
+        use_monitor = use_monitor and self.is_fresh
+        value = super().get(*args, use_caget=False, use_monitor=use_monitor, **kwargs)
+        if not use_monitor:
+            self._last_update = time.monotonic()
+        return value
@@ -0,0 +1,218 @@
+import dataclasses
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Tuple, TYPE_CHECKING
+
+from utils.sc_linac import linac_utils
+
+if TYPE_CHECKING:
+    from cavity import Cavity
+
+CHARACTERIZATION = "characterization"
+SSA_CALIBRATION = "ssa_calibration"
+
+# Result columns stored for each kind of calibration
+LEDGER_VALUES: Dict[str, Tuple[str, ...]] = {
+    CHARACTERIZATION: ("loaded_q", "scale_factor"),
+    SSA_CALIBRATION: ("ssa_slope", "max_fwd_pwr"),
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS calibrations (
+    cryomodule TEXT NOT NULL,
+    cavity INTEGER NOT NULL,
+    kind TEXT NOT NULL,
+    timestamp REAL NOT NULL,
+    loaded_q REAL,
+    scale_factor REAL,
+    ssa_slope REAL,
+    max_fwd_pwr REAL,
+    UNIQUE (cryomodule, cavity, kind, timestamp)
+);
+CREATE INDEX IF NOT EXISTS calibrations_by_time
+    ON calibrations (kind, timestamp);
+"""
+
+
+@dataclasses.dataclass
+class CalibrationRecord:
+    cryomodule: str
+    cavity: int
+    kind: str
+    timestamp: float
+    values: Dict[str, float]
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.timestamp
+
+
+@dataclasses.dataclass
+class CalibrationPolicy:
+    """
+    Decides when a previous result is good enough to skip rerunning a
+    calibration: it has to be recent, and the values currently in use by the
+    IOC have to match it (otherwise someone else has changed them since)
+    """
+
+    characterization_max_age: float = 24 * 60 * 60
+    ssa_calibration_max_age: float = 7 * 24 * 60 * 60
+    # Max relative difference between the recorded and in use values
+    tolerance: float = 0.02
+
+    def max_age(self, kind: str) -> float:
+        if kind == CHARACTERIZATION:
+            return self.characterization_max_age
+        return self.ssa_calibration_max_age
+
+    def is_fresh(
+        self, record: Optional[CalibrationRecord], current_values: Dict[str, float]
+    ) -> bool:
+        """
+        @param record: latest ledger entry for the cavity, if any
+        @param current_values: {column: value currently in use}
+        """
+        if not record or record.age > self.max_age(record.kind):
+            return False
+        for name, current in current_values.items():
+            recorded = record.values.get(name)
+            if recorded is None or current is None:
+                return False
+            if abs(current - recorded) > self.tolerance * abs(recorded):
+                return False
+        return True
+
+
+class CalibrationLedger:
+    """
+    Append only SQLite record of every cavity characterization and SSA
+    calibration result, used to skip calibrations whose last result is still
+    good and for trending. A connection is opened per call so that the ledger
+    can be shared by setup threads
+    """
+
+    def __init__(self, filepath: str):
+        self.filepath: str = filepath
+        self._initialized: bool = False
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        with self._lock:
+            if not self._initialized:
+                directory = os.path.dirname(self.filepath)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                with sqlite3.connect(self.filepath) as connection:
+                    connection.executescript(_SCHEMA)
+                self._initialized = True
+        return sqlite3.connect(self.filepath, timeout=10)
+
+    def record(
+        self,
+        cavity: "Cavity",
+        kind: str,
+        values: Dict[str, float],
+        timestamp: Optional[float] = None,
+    ):
+        """
+        @param cavity: cavity the result belongs to
+        @param kind: CHARACTERIZATION or SSA_CALIBRATION
+        @param values: {column: value} with the columns in LEDGER_VALUES[kind]
+        @param timestamp: epoch seconds of the result, now if None. Recording
+                          the same result twice is ignored
+        """
+        columns = LEDGER_VALUES[kind]
+        connection = self._connect()
+        try:
+            with connection:
+                connection.execute(
+                    f"INSERT OR IGNORE INTO calibrations"
+                    f" (cryomodule, cavity, kind, timestamp, {', '.join(columns)})"
+                    f" VALUES (?, ?, ?, ?{', ?' * len(columns)})",
+                    (
+                        cavity.cryomodule.name,
+                        cavity.number,
+                        kind,
+                        time.time() if timestamp is None else timestamp,
+                        *(values.get(column) for column in columns),
+                    ),
+                )
+        finally:
+            connection.close()
+
+    def history(
+        self,
+        cavity: "Cavity",
+        kind: str,
+        since: Optional[float] = None,
+        limit: Optional[int] = None,
+    ) -> List[CalibrationRecord]:
+        """
+        @return: the cavity's results, newest first
+        """
+        query = (
+            "SELECT * FROM calibrations WHERE cryomodule = ? AND cavity = ?"
+            " AND kind = ? AND timestamp >= ? ORDER BY timestamp DESC"
+        )
+        params = [cavity.cryomodule.name, cavity.number, kind, since or 0]
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+        return self._query(query, params)
+
+    def latest(self, cavity: "Cavity", kind: str) -> Optional[CalibrationRecord]:
+        records = self.history(cavity, kind, limit=1)
+        return records[0] if records else None
+
+    def trend(
+        self,
+        kind: str,
+        cryomodule: Optional[str] = None,
+        since: Optional[float] = None,
+    ) -> List[CalibrationRecord]:
+        """
+        @param kind: CHARACTERIZATION or SSA_CALIBRATION
+        @param cryomodule: only this cryomodule's cavities, all if None
+        @param since: only results newer than this epoch time
+        @return: every matching result, oldest first for plotting
+        """
+        query = "SELECT * FROM calibrations WHERE kind = ? AND timestamp >= ?"
+        params = [kind, since or 0]
+        if cryomodule is not None:
+            query += " AND cryomodule = ?"
+            params.append(cryomodule)
+        return self._query(query + " ORDER BY timestamp", params)
+
+    def _query(self, query: str, params: List) -> List[CalibrationRecord]:
+        connection = self._connect()
+        connection.row_factory = sqlite3.Row
+        try:
+            rows = connection.execute(query, params).fetchall()
+        finally:
+            connection.close()
+
+        return [
+            CalibrationRecord(
+                cryomodule=row["cryomodule"],
+                cavity=row["cavity"],
+                kind=row["kind"],
+                timestamp=row["timestamp"],
+                values={column: row[column] for column in LEDGER_VALUES[row["kind"]]},
+            )
+            for row in rows
+        ]
+
+
+_ledgers: Dict[str, CalibrationLedger] = {}
+
+
+def get_ledger() -> CalibrationLedger:
+    """
+    @return: the ledger at linac_utils.CALIBRATION_LEDGER_PATH
+    """
+    filepath = linac_utils.CALIBRATION_LEDGER_PATH
+    if filepath not in _ledgers:
+        _ledgers[filepath] = CalibrationLedger(filepath)
+    return _ledgers[filepath]
@@ -1,6 +1,9 @@
+import asyncio
+import os
+import sqlite3
 import time
 from datetime import datetime
-from typing import Optional, Callable, TYPE_CHECKING
+from typing import Awaitable, Callable, Dict, List, Optional, TYPE_CHECKING
 
 from lcls_tools.common.controls.pyepics.utils import (
     PV,
@@ -8,7 +11,20 @@ from lcls_tools.common.controls.pyepics.utils import (
     PVInvalidError,
 )
 
-from utils.sc_linac import linac_utils
+from utils.sc_linac import interlocks, linac_utils
+from utils.sc_linac.async_pv import AsyncPV
+from utils.sc_linac.calibration_ledger import (
+    CHARACTERIZATION,
+    SSA_CALIBRATION,
+    CalibrationPolicy,
+    get_ledger,
+)
+from utils.sc_linac.cavity_data import load_cavity_data, save_cavity_data
+from utils.sc_linac.pipeline import SetupPipeline, Stage, StageResult
+from utils.sc_linac.pv_field import PVField
+from utils.sc_linac.ramp import RampEngine, RampRequest
+from utils.sc_linac.tuner_model import TunerModel, load_tuner_model, save_tuner_model
+from utils.sc_linac.wait_utils import updated_since, wait_until
 
 if TYPE_CHECKING:
     from linac import Linac
@@ -28,6 +44,58 @@ class Cavity(linac_utils.SCLinacObject):
 
     """
 
+    calc_probe_q_pv = PVField("QPROBE_CALC1.PROC", writable=True)
+    push_ssa_slope_pv = PVField("PUSH_SSA_SLOPE.PROC", writable=True)
+    save_ssa_slope_pv = PVField("SAVE_SSA_SLOPE.PROC", writable=True)
+    interlock_reset_pv = PVField("INTLK_RESET_ALL", writable=True)
+    drive_level_pv = PVField("SEL_ASET", writable=True)
+    characterization_start_pv = PVField("PROBECALSTRT", writable=True)
+    characterization_status_pv = PVField("PROBECALSTS")
+    current_q_loaded_pv = PVField("QLOADED")
+    measured_loaded_q_pv = PVField("QLOADED_NEW")
+    push_loaded_q_pv = PVField("PUSH_QLOADED.PROC", writable=True)
+    save_q_loaded_pv = PVField("SAVE_QLOADED.PROC", writable=True)
+    current_cavity_scale_pv = PVField("CAV:SCALER_SEL.B")
+    measured_scale_factor_pv = PVField("CAV:CAL_SCALEB_NEW")
+    push_scale_factor_pv = PVField("PUSH_CAV_SCALE.PROC", writable=True)
+    save_cavity_scale_pv = PVField("SAVE_CAV_SCALE.PROC", writable=True)
+    ades_pv = PVField("ADES", writable=True)
+    acon_pv = PVField("ACON", writable=True)
+    aact_pv = PVField("AACTMEAN")
+    ades_max_pv = PVField("ADES_MAX")
+    rf_mode_ctrl_pv = PVField("RFMODECTRL", writable=True)
+    rf_mode_pv = PVField("RFMODE", cached=True)
+    rf_state_pv = PVField("RFSTATE", cached=True)
+    rf_control_pv = PVField("RFCTRL", writable=True)
+    pulse_go_pv = PVField("PULSE_DIFF_SUM", writable=True)
+    pulse_status_pv = PVField("PULSE_STATUS")
+    pulse_on_time_pv = PVField("PULSE_ONTIME", writable=True)
+    rev_waveform_pv = PVField("REV:AWF")
+    fwd_waveform_pv = PVField("FWD:AWF")
+    cav_waveform_pv = PVField("CAV:AWF")
+    stepper_temp_pv = PVField("STEPTEMP")
+    detune_best_pv = PVField("DFBEST")
+    detune_chirp_pv = PVField("CHIRP:DF")
+    rf_permit_pv = PVField("RFPERMIT")
+    quench_latch_pv = PVField("QUENCH_LTCH", cached=True)
+    quench_bypass_pv = PVField("QUENCH_BYP", writable=True)
+    cw_data_decimation_pv = PVField(
+        "ACQ_DECIM_SEL.A", writable=True, obj_attr="_cw_data_decim_pv_obj"
+    )
+    pulsed_data_decimation_pv = PVField(
+        "ACQ_DECIM_SEL.C", writable=True, obj_attr="_pulsed_data_decim_pv_obj"
+    )
+    tune_config_pv = PVField("TUNE_CONFIG", writable=True)
+    chirp_freq_start_pv = PVField("CHIRP:FREQ_START", writable=True)
+    chirp_freq_stop_pv = PVField("CHIRP:FREQ_STOP", writable=True)
+    df_cold_pv = PVField("DF_COLD")
+    hw_mode_pv = PVField("HWMODE", cached=True)
+    char_timestamp_pv = PVField("PROBECALTS")
+
+    # Set (on the class or an instance) to skip characterizations and SSA
+    # calibrations whose last ledger result is still good
+    calibration_policy: Optional[CalibrationPolicy] = None
+
     def __init__(self, cavity_num: int, rack_object: "Rack"):
         """
         @param cavity_num: int cavity number i.e. 1 - 8
@@ -62,137 +130,99 @@ class Cavity(linac_utils.SCLinacObject):
 
         self.chirp_prefix = self._pv_prefix + "CHIRP:"
         self.abort_flag: bool = False
+        self._tuner_model: Optional[TunerModel] = None
 
         # These need to be created after all the base cavity properties are defined
         self.ssa: "SSA" = self.rack.ssa_class(cavity=self)
         self.stepper_tuner: "StepperTuner" = self.rack.stepper_class(cavity=self)
         self.piezo: "Piezo" = self.rack.piezo_class(cavity=self)
 
-        self._calc_probe_q_pv_obj: Optional[PV] = None
-        self.calc_probe_q_pv: str = self.pv_addr("QPROBE_CALC1.PROC")
-
-        self._push_ssa_slope_pv_obj: Optional[PV] = None
-        self.push_ssa_slope_pv: str = self.pv_addr("PUSH_SSA_SLOPE.PROC")
-
-        self.save_ssa_slope_pv: str = self.pv_addr("SAVE_SSA_SLOPE.PROC")
-        self._save_ssa_slope_pv_obj: Optional[PV] = None
-
-        self.interlock_reset_pv: str = self.pv_addr("INTLK_RESET_ALL")
-        self._interlock_reset_pv_obj: Optional[PV] = None
-
-        self.drive_level_pv: str = self.pv_addr("SEL_ASET")
-        self._drive_level_pv_obj: Optional[PV] = None
-
-        self.characterization_start_pv: str = self.pv_addr("PROBECALSTRT")
-        self._characterization_start_pv_obj: Optional[PV] = None
-
-        self.characterization_status_pv: str = self.pv_addr("PROBECALSTS")
-        self._characterization_status_pv_obj: Optional[PV] = None
-
-        self.current_q_loaded_pv: str = self.pv_addr("QLOADED")
-
-        self.measured_loaded_q_pv: str = self.pv_addr("QLOADED_NEW")
-        self._measured_loaded_q_pv_obj: Optional[PV] = None
-
-        self.push_loaded_q_pv: str = self.pv_addr("PUSH_QLOADED.PROC")
-        self._push_loaded_q_pv_obj: Optional[PV] = None
-
-        self.save_q_loaded_pv: str = self.pv_addr("SAVE_QLOADED.PROC")
-
-        self.current_cavity_scale_pv: str = self.pv_addr("CAV:SCALER_SEL.B")
-
-        self.measured_scale_factor_pv: str = self.pv_addr("CAV:CAL_SCALEB_NEW")
-        self._measured_scale_factor_pv_obj: Optional[PV] = None
-
-        self.push_scale_factor_pv: str = self.pv_addr("PUSH_CAV_SCALE.PROC")
-        self._push_scale_factor_pv_obj: Optional[PV] = None
-
-        self.save_cavity_scale_pv: str = self.pv_addr("SAVE_CAV_SCALE.PROC")
-
-        self.ades_pv: str = self.pv_addr("ADES")
-        self._ades_pv_obj: Optional[PV] = None
-
-        self.acon_pv: str = self.pv_addr("ACON")
-        self._acon_pv_obj: Optional[PV] = None
-
-        self.aact_pv: str = self.pv_addr("AACTMEAN")
-        self._aact_pv_obj: Optional[PV] = None
-
-        self.ades_max_pv: str = self.pv_addr("ADES_MAX")
-        self._ades_max_pv_obj: Optional[PV] = None
-
-        self.rf_mode_ctrl_pv: str = self.pv_addr("RFMODECTRL")
-        self._rf_mode_ctrl_pv_obj: Optional[PV] = None
-
-        self.rf_mode_pv: str = self.pv_addr("RFMODE")
-        self._rf_mode_pv_obj: Optional[PV] = None
-
-        self.rf_state_pv: str = self.pv_addr("RFSTATE")
-        self._rf_state_pv_obj: Optional[PV] = None
-
-        self.rf_control_pv: str = self.pv_addr("RFCTRL")
-        self._rf_control_pv_obj: Optional[PV] = None
-
-        self.pulse_go_pv: str = self.pv_addr("PULSE_DIFF_SUM")
-        self._pulse_go_pv_obj: Optional[PV] = None
-
-        self.pulse_status_pv: str = self.pv_addr("PULSE_STATUS")
-        self._pulse_status_pv_obj: Optional[PV] = None
-
-        self.pulse_on_time_pv: str = self.pv_addr("PULSE_ONTIME")
-        self._pulse_on_time_pv_obj: Optional[PV] = None
-
-        self.rev_waveform_pv: str = self.pv_addr("REV:AWF")
-        self.fwd_waveform_pv: str = self.pv_addr("FWD:AWF")
-        self.cav_waveform_pv: str = self.pv_addr("CAV:AWF")
-
-        self.stepper_temp_pv: str = self.pv_addr("STEPTEMP")
-
-        self.detune_best_pv: str = self.pv_addr("DFBEST")
-        self._detune_best_pv_obj: Optional[PV] = None
-
-        self.detune_chirp_pv: str = self.pv_addr("CHIRP:DF")
-        self._detune_chirp_pv_obj: Optional[PV] = None
-
-        self.rf_permit_pv: str = self.pv_addr("RFPERMIT")
-        self._rf_permit_pv_obj: Optional[PV] = None
-
-        self.quench_latch_pv: str = self.pv_addr("QUENCH_LTCH")
-        self._quench_latch_pv_obj: Optional[PV] = None
-
-        self.quench_bypass_pv: str = self.pv_addr("QUENCH_BYP")
+    def __str__(self):
+        return f"{self.linac.name} CM{self.cryomodule.name} Cavity {self.number}"
 
-        self.cw_data_decimation_pv: str = self.pv_addr("ACQ_DECIM_SEL.A")
-        self._cw_data_decim_pv_obj: Optional[PV] = None
+    @property
+    def pv_prefix(self):
+        return self._pv_prefix
 
-        self.pulsed_data_decimation_pv: str = self.pv_addr("ACQ_DECIM_SEL.C")
-        self._pulsed_data_decim_pv_obj: Optional[PV] = None
+    @property
+    def microsteps_per_hz(self):
+        return 1 / self.stepper_tuner.hz_per_microstep
 
-        self.tune_config_pv: str = self.pv_addr("TUNE_CONFIG")
-        self._tune_config_pv_obj: Optional[PV] = None
+    @property
+    def tuner_model_file(self) -> str:
+        return os.path.join(
+            linac_utils.TUNER_MODEL_DIR, f"cm{self.cryomodule.name}.json"
+        )
 
-        self.chirp_freq_start_pv: str = self.chirp_prefix + "FREQ_START"
-        self._chirp_freq_start_pv_obj: Optional[PV] = None
+    @property
+    def tuner_model(self) -> TunerModel:
+        if not self._tuner_model:
+            self._tuner_model = load_tuner_model(
+                self.tuner_model_file, str(self.number)
+            )
+        return self._tuner_model
 
-        self.chirp_freq_stop_pv: str = self.chirp_prefix + "FREQ_STOP"
-        self._chirp_freq_stop_pv_obj: Optional[PV] = None
+    def save_tuner_model(self):
+        save_tuner_model(self.tuner_model_file, str(self.number), self.tuner_model)
 
-        self.hw_mode_pv: str = self.pv_addr("HWMODE")
-        self._hw_mode_pv_obj: Optional[PV] = None
+    def record_calibration(
+        self, kind: str, values: Dict[str, float], timestamp: Optional[float] = None
+    ):
+        """
+        Adds a result to the calibration ledger, a ledger problem is reported
+        but never fails the calibration itself
+        """
+        try:
+            get_ledger().record(self, kind, values, timestamp)
+        except sqlite3.Error as e:
+            print(f"Unable to record {self} {kind} in the calibration ledger: {e}")
 
-        self.char_timestamp_pv: str = self.pv_addr("PROBECALTS")
-        self._char_timestamp_pv_obj: Optional[PV] = None
+    def calibration_fresh(
+        self,
+        kind: str,
+        current_values: Callable[[], Dict[str, float]],
+        policy: Optional[CalibrationPolicy] = None,
+    ) -> bool:
+        """
+        @param kind: CHARACTERIZATION or SSA_CALIBRATION
+        @param current_values: returns the values currently in use, only
+                               called if there's a policy to check against
+        @param policy: policy to check against, calibration_policy if None
+        @return: whether the policy allows skipping this calibration
+        """
+        policy = policy or self.calibration_policy
+        if not policy:
+            return False
+        try:
+            record = get_ledger().latest(self, kind)
+        except sqlite3.Error as e:
+            print(f"Unable to read {self} {kind} from the calibration ledger: {e}")
+            return False
+        return policy.is_fresh(record, current_values())
+
+    def characterization_in_use(self) -> Dict[str, float]:
+        return {
+            "loaded_q": self.lazy_pv_obj("current_q_loaded").get(),
+            "scale_factor": self.lazy_pv_obj("current_cavity_scale").get(),
+        }
 
-    def __str__(self):
-        return f"{self.linac.name} CM{self.cryomodule.name} Cavity {self.number}"
+    @property
+    def characterization_fresh(self) -> bool:
+        return self.calibration_fresh(CHARACTERIZATION, self.characterization_in_use)
 
     @property
-    def pv_prefix(self):
-        return self._pv_prefix
+    def chirp_range_file(self) -> str:
+        return os.path.join(
+            linac_utils.CHIRP_RANGE_DIR, f"cm{self.cryomodule.name}.json"
+        )
 
     @property
-    def microsteps_per_hz(self):
-        return 1 / self.stepper_tuner.hz_per_microstep
+    def last_good_chirp_range(self) -> Optional[int]:
+        return load_cavity_data(self.chirp_range_file, str(self.number))
+
+    @last_good_chirp_range.setter
+    def last_good_chirp_range(self, value: int):
+        save_cavity_data(self.chirp_range_file, str(self.number), value)
 
     def start_characterization(self):
         if not self._characterization_start_pv_obj:
@@ -244,7 +274,7 @@ class Cavity(linac_utils.SCLinacObject):
     @property
     def rf_mode(self):
         if not self._rf_mode_pv_obj:
-            self._rf_mode_pv_obj = PV(self.rf_mode_pv)
+            self._rf_mode_pv_obj = self.make_pv_obj("rf_mode")
         return self._rf_mode_pv_obj.get()
 
     @property
@@ -328,10 +358,14 @@ class Cavity(linac_utils.SCLinacObject):
         self._push_scale_factor_pv_obj.put(1)
 
     @property
-    def characterization_status(self):
+    def characterization_status_pv_obj(self) -> PV:
         if not self._characterization_status_pv_obj:
             self._characterization_status_pv_obj = PV(self.characterization_status_pv)
-        return self._characterization_status_pv_obj.get()
+        return self._characterization_status_pv_obj
+
+    @property
+    def characterization_status(self):
+        return self.characterization_status_pv_obj.get()
 
     @property
     def characterization_running(self) -> bool:
@@ -358,16 +392,24 @@ class Cavity(linac_utils.SCLinacObject):
         self._pulse_on_time_pv_obj.put(value)
 
     @property
-    def pulse_status(self):
+    def pulse_status_pv_obj(self) -> PV:
         if not self._pulse_status_pv_obj:
             self._pulse_status_pv_obj = PV(self.pulse_status_pv)
-        return self._pulse_status_pv_obj.get()
+        return self._pulse_status_pv_obj
 
     @property
-    def rf_permit(self):
+    def pulse_status(self):
+        return self.pulse_status_pv_obj.get()
+
+    @property
+    def rf_permit_pv_obj(self) -> PV:
         if not self._rf_permit_pv_obj:
             self._rf_permit_pv_obj = PV(self.rf_permit_pv)
-        return self._rf_permit_pv_obj.get()
+        return self._rf_permit_pv_obj
+
+    @property
+    def rf_permit(self):
+        return self.rf_permit_pv_obj.get()
 
     @property
     def rf_inhibited(self) -> bool:
@@ -439,7 +481,7 @@ class Cavity(linac_utils.SCLinacObject):
     @property
     def hw_mode_pv_obj(self) -> PV:
         if not self._hw_mode_pv_obj:
-            self._hw_mode_pv_obj = PV(self.hw_mode_pv)
+            self._hw_mode_pv_obj = self.make_pv_obj("hw_mode")
         return self._hw_mode_pv_obj
 
     @property
@@ -457,7 +499,7 @@ class Cavity(linac_utils.SCLinacObject):
     @property
     def is_quenched(self) -> bool:
         if not self._quench_latch_pv_obj:
-            self._quench_latch_pv_obj = PV(self.quench_latch_pv)
+            self._quench_latch_pv_obj = self.make_pv_obj("quench_latch")
         if self._quench_latch_pv_obj.severity == EPICS_INVALID_VAL:
             raise PVInvalidError(f"{self} quench latch PV invalid")
         return self._quench_latch_pv_obj.get() == 1
@@ -468,6 +510,12 @@ class Cavity(linac_utils.SCLinacObject):
             self._tune_config_pv_obj = PV(self.tune_config_pv)
         return self._tune_config_pv_obj
 
+    @property
+    def df_cold_pv_obj(self) -> PV:
+        if not self._df_cold_pv_obj:
+            self._df_cold_pv_obj = PV(self.df_cold_pv)
+        return self._df_cold_pv_obj
+
     @property
     def chirp_freq_start_pv_obj(self) -> PV:
         if not self._chirp_freq_start_pv_obj:
@@ -515,7 +563,7 @@ class Cavity(linac_utils.SCLinacObject):
     @property
     def rf_state_pv_obj(self) -> PV:
         if not self._rf_state_pv_obj:
-            self._rf_state_pv_obj = PV(self.rf_state_pv)
+            self._rf_state_pv_obj = self.make_pv_obj("rf_state")
         return self._rf_state_pv_obj
 
     @property
@@ -533,6 +581,15 @@ class Cavity(linac_utils.SCLinacObject):
         print(f"{self} piezo detune: {delta_hz}")
         return delta_hz if not self.cryomodule.is_harmonic_linearizer else -delta_hz
 
+    @property
+    def resonance_tolerance(self) -> int:
+        """
+        @return: max detune in Hz for the cavity to count as on resonance
+        """
+        if self.cryomodule.is_harmonic_linearizer:
+            return linac_utils.HL_RESONANCE_TOLERANCE
+        return linac_utils.RESONANCE_TOLERANCE
+
     def move_to_resonance(self, reset_signed_steps=False, use_sela=False):
         def delta_detune():
             return self.detune
@@ -541,7 +598,7 @@ class Cavity(linac_utils.SCLinacObject):
         print(f"Tuning {self} to resonance in " + ("SELA" if use_sela else "chirp"))
         self._auto_tune(
             delta_hz_func=delta_detune,
-            tolerance=(500 if self.cryomodule.is_harmonic_linearizer else 50),
+            tolerance=self.resonance_tolerance,
             reset_signed_steps=reset_signed_steps,
         )
 
@@ -555,6 +612,40 @@ class Cavity(linac_utils.SCLinacObject):
 
         self.tune_config_pv_obj.put(linac_utils.TUNE_CONFIG_RESONANCE_VALUE)
 
+    async def amove_to_resonance(self, reset_signed_steps=False, use_sela=False):
+        """
+        Async version of move_to_resonance
+        """
+
+        async def delta_detune():
+            return await (await self.adetune_pv()).get()
+
+        await self.asetup_tuning(use_sela=use_sela)
+        print(f"Tuning {self} to resonance in " + ("SELA" if use_sela else "chirp"))
+        await self._aauto_tune(
+            delta_hz_func=delta_detune,
+            tolerance=self.resonance_tolerance,
+            reset_signed_steps=reset_signed_steps,
+        )
+
+        if use_sela:
+            print(f"Centering {self} piezo")
+            hz_per_v = await self.piezo.async_pv("hz_per_v").get()
+            await self._aauto_tune(
+                delta_hz_func=self.adelta_piezo,
+                tolerance=5 * hz_per_v,
+                reset_signed_steps=False,
+            )
+
+        await self.async_pv("tune_config").put(linac_utils.TUNE_CONFIG_RESONANCE_VALUE)
+
+    async def adelta_piezo(self):
+        voltage = await self.piezo.async_pv("voltage").get()
+        delta_volts = voltage - linac_utils.PIEZO_CENTER_VOLTAGE
+        delta_hz = delta_volts * await self.piezo.async_pv("hz_per_v").get()
+        print(f"{self} piezo detune: {delta_hz}")
+        return delta_hz if not self.cryomodule.is_harmonic_linearizer else -delta_hz
+
     @property
     def detune_best_pv_obj(self) -> PV:
         if not self._detune_best_pv_obj:
@@ -610,29 +701,102 @@ class Cavity(linac_utils.SCLinacObject):
 
         self.tune_config_pv_obj.put(linac_utils.TUNE_CONFIG_OTHER_VALUE)
 
-        while abs(delta_hz) > tolerance:
-            self.check_abort()
-            est_steps = int(0.9 * delta_hz * self.microsteps_per_hz)
+        try:
+            while abs(delta_hz) > tolerance:
+                self.check_abort()
+                # Learned Hz/step for this tuner and direction (with backlash
+                # compensation on reversals) so we need fewer iterations
+                est_steps = self.tuner_model.plan(delta_hz, 1 / self.microsteps_per_hz)
 
-            print(f"Moving stepper for {self} {est_steps} steps")
+                print(f"Moving stepper for {self} {est_steps} steps")
 
-            self.stepper_tuner.move(
-                est_steps,
-                max_steps=int(abs(est_steps) * 1.1),
-                speed=linac_utils.MAX_STEPPER_SPEED,
-            )
+                self.stepper_tuner.move(
+                    est_steps,
+                    max_steps=int(abs(est_steps) * 1.1),
+                    speed=linac_utils.MAX_STEPPER_SPEED,
+                )
 
-            steps_moved += abs(est_steps)
+                steps_moved += abs(est_steps)
 
-            if steps_moved > expected_steps * stepper_tol_factor:
-                raise linac_utils.DetuneError(
-                    f"{self} motor moved more steps than expected"
+                if steps_moved > expected_steps * stepper_tol_factor:
+                    raise linac_utils.DetuneError(
+                        f"{self} motor moved more steps than expected"
+                    )
+
+                # this should catch if the chirp range is wrong or if the cavity is off
+                self.check_detune()
+
+                previous_delta_hz = delta_hz
+                delta_hz = delta_hz_func()
+                self.tuner_model.update(
+                    est_steps, previous_delta_hz - delta_hz, 1 / self.microsteps_per_hz
                 )
+        finally:
+            self.save_tuner_model()
 
-            # this should catch if the chirp range is wrong or if the cavity is off
-            self.check_detune()
+    async def adetune_pv(self) -> AsyncPV:
+        """
+        @return: the detune PV that's meaningful in the current RF mode
+        """
+        if await self.async_pv("rf_mode").get() == linac_utils.RF_MODE_CHIRP:
+            return self.async_pv("detune_chirp")
+        return self.async_pv("detune_best")
+
+    async def adetune_invalid(self) -> bool:
+        detune_pv = await self.adetune_pv()
+        return await detune_pv.get_severity() == EPICS_INVALID_VAL
+
+    async def _aauto_tune(
+        self,
+        delta_hz_func: Callable[[], Awaitable[float]],
+        tolerance: int = 50,
+        reset_signed_steps: bool = False,
+    ):
+        if await self.adetune_invalid():
+            raise linac_utils.DetuneError(f"{self} detune invalid")
+
+        delta_hz = await delta_hz_func()
+        expected_steps: int = abs(int(delta_hz * self.microsteps_per_hz))
+
+        stepper_tol_factor = linac_utils.stepper_tol_factor(expected_steps)
+
+        steps_moved: int = 0
+
+        if reset_signed_steps:
+            await self.stepper_tuner.async_pv("reset_signed").put(0)
+
+        await self.async_pv("tune_config").put(linac_utils.TUNE_CONFIG_OTHER_VALUE)
 
-            delta_hz = delta_hz_func()
+        try:
+            while abs(delta_hz) > tolerance:
+                await self.acheck_abort()
+                est_steps = self.tuner_model.plan(delta_hz, 1 / self.microsteps_per_hz)
+
+                print(f"Moving stepper for {self} {est_steps} steps")
+
+                await self.stepper_tuner.amove(
+                    est_steps,
+                    max_steps=int(abs(est_steps) * 1.1),
+                    speed=linac_utils.MAX_STEPPER_SPEED,
+                )
+
+                steps_moved += abs(est_steps)
+
+                if steps_moved > expected_steps * stepper_tol_factor:
+                    raise linac_utils.DetuneError(
+                        f"{self} motor moved more steps than expected"
+                    )
+
+                # this should catch if the chirp range is wrong or if the cavity is off
+                await self.acheck_detune()
+
+                previous_delta_hz = delta_hz
+                delta_hz = await delta_hz_func()
+                self.tuner_model.update(
+                    est_steps, previous_delta_hz - delta_hz, 1 / self.microsteps_per_hz
+                )
+        finally:
+            self.save_tuner_model()
 
     def check_detune(self):
         if self.detune_invalid:
@@ -643,6 +807,16 @@ class Cavity(linac_utils.SCLinacObject):
                     f"Cannot tune {self} in SELA with invalid detune"
                 )
 
+    async def acheck_detune(self):
+        if await self.adetune_invalid():
+            if await self.async_pv("rf_mode").get() == linac_utils.RF_MODE_CHIRP:
+                chirp_freq_start = await self.async_pv("chirp_freq_start").get()
+                await self.afind_chirp_range(chirp_freq_start * 1.1)
+            else:
+                raise linac_utils.DetuneError(
+                    f"Cannot tune {self} in SELA with invalid detune"
+                )
+
     def check_and_set_on_time(self):
         """
         In pulsed mode the cavity has a duty cycle determined by the on time and
@@ -673,11 +847,13 @@ class Cavity(linac_utils.SCLinacObject):
         go button is pressed
         :return:
         """
-        self._pulse_go_pv_obj.put(1)
-        while self.pulse_status < 2:
-            self.check_abort()
-            print("waiting for pulse state", datetime.now())
-            time.sleep(1)
+        self.pulse_go_pv_obj.put(1)
+        print("waiting for pulse state", datetime.now())
+        wait_until(
+            self.pulse_status_pv_obj,
+            lambda status: status >= 2,
+            abort_check=self.check_abort,
+        )
         if self.pulse_status > 2:
             raise linac_utils.PulseError(f"Unable to pulse {self}")
 
@@ -688,10 +864,28 @@ class Cavity(linac_utils.SCLinacObject):
             self.reset_interlocks()
             self.rf_control = 1
 
-            while not self.is_on:
-                self.check_abort()
-                print(f"waiting for {self} to turn on", datetime.now())
-                time.sleep(1)
+            print(f"waiting for {self} to turn on", datetime.now())
+            wait_until(
+                lambda: self.is_on,
+                abort_check=self.check_abort,
+                wake_on=[self.rf_state_pv_obj],
+            )
+
+            print(f"{self} on")
+        else:
+            raise linac_utils.CavityHWModeError(f"{self} not online")
+
+    async def aturn_on(self):
+        print(f"Turning {self} on")
+        if await self.async_pv("hw_mode").get() == linac_utils.HW_MODE_ONLINE_VALUE:
+            await self.ssa.aturn_on()
+            await self.areset_interlocks()
+            await self.async_pv("rf_control").put(1)
+
+            print(f"waiting for {self} to turn on", datetime.now())
+            await self.async_pv("rf_state").wait_until(
+                lambda state: state == 1, abort_check=self.acheck_abort
+            )
 
             print(f"{self} on")
         else:
@@ -700,10 +894,20 @@ class Cavity(linac_utils.SCLinacObject):
     def turn_off(self):
         print(f"turning {self} off")
         self.rf_control = 0
-        while self.is_on:
-            self.check_abort()
-            print(f"waiting for {self} to turn off")
-            time.sleep(1)
+        print(f"waiting for {self} to turn off")
+        wait_until(
+            lambda: not self.is_on,
+            abort_check=self.check_abort,
+            wake_on=[self.rf_state_pv_obj],
+        )
+        print(f"{self} off")
+
+    async def aturn_off(self):
+        print(f"turning {self} off")
+        await self.async_pv("rf_control").put(0)
+        print(f"waiting for {self} to turn off")
+        # No abort check here since acheck_abort calls this
+        await self.async_pv("rf_state").wait_until(lambda state: state != 1)
         print(f"{self} off")
 
     def setup_selap(self, des_amp: float = 5):
@@ -725,26 +929,95 @@ class Cavity(linac_utils.SCLinacObject):
             self.turn_off()
             raise linac_utils.CavityAbortError(f"Abort requested for {self}")
 
-    def setup_rf(self, des_amp):
-        if des_amp > self.ades_max:
-            print(
-                f"Requested amplitude for {self} too high - ramping up to AMAX instead"
-            )
-            des_amp = self.ades_max
-        print(f"setting up {self}")
+    async def acheck_abort(self):
+        if self.abort_flag:
+            self.abort_flag = False
+            await self.aturn_off()
+            raise linac_utils.CavityAbortError(f"Abort requested for {self}")
+
+    @property
+    def setup_policy(self) -> CalibrationPolicy:
+        """
+        @return: policy for deciding whether setup can skip a calibration,
+                 setup always checks even if calibration_policy isn't set
+        """
+        return self.calibration_policy or CalibrationPolicy()
+
+    def ssa_calibration_done(self) -> bool:
+        """
+        @return: whether the SSA slope in use is in tolerance and comes from a
+                 recent calibration
+        """
+        current_slope = self.ssa.lazy_pv_obj("current_slope").get()
+        if current_slope is None or not (
+            linac_utils.SSA_SLOPE_LOWER_LIMIT
+            < current_slope
+            < linac_utils.SSA_SLOPE_UPPER_LIMIT
+        ):
+            return False
+        return self.calibration_fresh(
+            SSA_CALIBRATION, lambda: {"ssa_slope": current_slope}, self.setup_policy
+        )
+
+    def tuner_at_resonance(self) -> bool:
+        """
+        @return: whether the tuner is still where the last successful tune to
+                 resonance left it, i.e. for resuming setup with RF off
+        """
+        return self.tune_config_pv_obj.get() == linac_utils.TUNE_CONFIG_RESONANCE_VALUE
+
+    def tuning_done(self) -> bool:
+        """
+        @return: whether the last tune to resonance succeeded and the detune
+                 is still within tolerance. A detune that can't be measured
+                 right now (i.e. RF off) counts as not tuned since the cavity
+                 may have drifted
+        """
+        if not self.tuner_at_resonance():
+            return False
+        if self.detune_invalid:
+            return False
+        return abs(self.detune) <= self.resonance_tolerance
+
+    def characterization_done(self) -> bool:
+        return self.calibration_fresh(
+            CHARACTERIZATION, self.characterization_in_use, self.setup_policy
+        )
+
+    def ramp_done(self, des_amp: float) -> bool:
+        return (
+            self.is_on
+            and self.rf_mode in [linac_utils.RF_MODE_SELA, linac_utils.RF_MODE_SELAP]
+            and abs(self.ades - des_amp) < linac_utils.SETUP_AMPLITUDE_TOLERANCE
+        )
+
+    @property
+    def setup_checkpoint_file(self) -> str:
+        return os.path.join(
+            linac_utils.SETUP_CHECKPOINT_DIR, f"cm{self.cryomodule.name}.json"
+        )
+
+    def setup_pipeline(self, stages: List[Stage]) -> SetupPipeline:
+        for stage in stages:
+            stage.precondition = stage.precondition or (lambda: self.is_online)
+        return SetupPipeline(
+            stages,
+            checkpoint_file=self.setup_checkpoint_file,
+            checkpoint_key=str(self.number),
+            abort_check=self.check_abort,
+        )
+
+    def calibrate_ssa_for_setup(self):
         self.turn_off()
         self.ssa.calibrate(self.ssa.drive_max)
-        self.move_to_resonance()
 
+    def characterize_for_setup(self):
         self.characterize()
         self.calculate_probe_q()
-
         self.check_abort()
-
         self.reset_data_decimation()
 
-        self.check_abort()
-
+    def ramp_for_setup(self, des_amp: float):
         self.ades = min(5, des_amp)
         self.set_sel_mode()
         self.piezo.enable_feedback()
@@ -759,12 +1032,54 @@ class Cavity(linac_utils.SCLinacObject):
             self.walk_amp(10, 0.5)
             self.walk_amp(des_amp, 0.1)
 
+    def setup_rf(self, des_amp) -> List[StageResult]:
+        """
+        Calibrates the SSA, tunes, characterizes, and ramps the cavity, skipping
+        any of those that already hold so that a rerun picks up where a failed
+        or aborted one stopped
+        @param des_amp: amplitude to ramp to, capped at ADES_MAX
+        @return: what happened to each stage and how long it took
+        """
+        if des_amp > self.ades_max:
+            print(
+                f"Requested amplitude for {self} too high - ramping up to AMAX instead"
+            )
+            des_amp = self.ades_max
+        print(f"setting up {self}")
+
+        return self.setup_pipeline(
+            [
+                Stage(
+                    "SSA calibration",
+                    self.calibrate_ssa_for_setup,
+                    postcondition=self.ssa_calibration_done,
+                ),
+                Stage(
+                    "tuning",
+                    self.move_to_resonance,
+                    postcondition=self.tuning_done,
+                    resume_check=self.tuner_at_resonance,
+                    verify=True,
+                ),
+                Stage(
+                    "characterization",
+                    self.characterize_for_setup,
+                    postcondition=self.characterization_done,
+                ),
+                Stage(
+                    "ramp",
+                    lambda: self.ramp_for_setup(des_amp),
+                    postcondition=lambda: self.ramp_done(des_amp),
+                ),
+            ]
+        ).run()
+
     def reset_data_decimation(self):
         print(f"Setting data decimation for {self}")
         self.cw_data_decimation = 255
         self.pulsed_data_decimation = 255
 
-    def setup_tuning(self, chirp_range=50000, use_sela=False):
+    def setup_tuning(self, chirp_range: Optional[float] = None, use_sela=False):
         self.piezo.enable()
 
         if not use_sela:
@@ -791,41 +1106,203 @@ class Cavity(linac_utils.SCLinacObject):
             self.set_sela_mode()
             self.turn_on()
 
-    def find_chirp_range(self, chirp_range=50000):
+    async def asetup_tuning(self, chirp_range: Optional[float] = None, use_sela=False):
+        await self.piezo.aenable()
+
+        if not use_sela:
+            await self.piezo.adisable_feedback()
+
+            print(f"setting {self} piezo DC voltage offset to 0V")
+            await self.piezo.async_pv("dc_setpoint").put(0)
+
+            print(
+                f"setting {self} drive level to {linac_utils.SAFE_PULSED_DRIVE_LEVEL}"
+            )
+            await self.async_pv("drive_level").put(linac_utils.SAFE_PULSED_DRIVE_LEVEL)
+
+            print(f"setting {self} RF to chirp")
+            await self.async_pv("rf_mode_ctrl").put(linac_utils.RF_MODE_CHIRP)
+
+            print(f"turning {self} RF on and waiting 5s for detune to catch up")
+            await self.aturn_on()
+            await asyncio.sleep(5)
+            await self.afind_chirp_range(chirp_range)
+
+        else:
+            await self.piezo.aenable_feedback()
+            await self.async_pv("rf_mode_ctrl").put(linac_utils.RF_MODE_SELA)
+            await self.aturn_on()
+
+    @staticmethod
+    def clamp_chirp_range(chirp_range: float) -> int:
+        return int(
+            min(
+                max(abs(chirp_range), linac_utils.DEFAULT_CHIRP_RANGE),
+                linac_utils.MAX_CHIRP_RANGE,
+            )
+        )
+
+    def chirp_range_seed(self, tune_config: int, df_cold: Optional[float]) -> int:
+        """
+        @param tune_config: current TUNE_CONFIG value
+        @param df_cold: current DF_COLD value
+        @return: first chirp range to try. A cavity in its cold landing
+                 position should be about DF_COLD off resonance, anything else
+                 starts from the last range that gave a valid detune
+        """
+        if tune_config == linac_utils.TUNE_CONFIG_COLD_VALUE and df_cold is not None:
+            return self.clamp_chirp_range(df_cold * linac_utils.CHIRP_RANGE_MARGIN)
+        return self.clamp_chirp_range(
+            self.last_good_chirp_range or linac_utils.DEFAULT_CHIRP_RANGE
+        )
+
+    @staticmethod
+    def coarse_chirp_ranges(chirp_range: float) -> List[int]:
+        """
+        @return: ranges to try in order, doubling from chirp_range up to the max
+        """
+        ranges = [int(min(abs(chirp_range), linac_utils.MAX_CHIRP_RANGE))]
+        while ranges[-1] < linac_utils.MAX_CHIRP_RANGE:
+            ranges.append(min(ranges[-1] * 2, linac_utils.MAX_CHIRP_RANGE))
+        return ranges
+
+    def fine_chirp_range(self, detune: float, chirp_range: int) -> int:
+        """
+        @return: the narrowest range that still comfortably covers detune, a
+                 tighter range gives a better detune measurement
+        """
+        return min(
+            self.clamp_chirp_range(detune * linac_utils.CHIRP_RANGE_MARGIN),
+            chirp_range,
+        )
+
+    def try_chirp_range(self, chirp_range: int) -> bool:
+        """
+        @return: whether the chirp detune became valid with this range
+        """
         self.check_abort()
+        detune_pv = self.detune_chirp_pv_obj
+
+        # The severity (and value) from before the write still reflect the
+        # old range, only an update that comes in after it can be trusted
+        last_update = detune_pv.timestamp
         self.set_chirp_range(chirp_range)
-        time.sleep(1)
-        if self.detune_invalid:
-            if chirp_range < 400000:
-                self.find_chirp_range(int(chirp_range * 1.1))
-            else:
-                raise linac_utils.DetuneError(
-                    f"{self}: No valid detune found within" f"+/-400000Hz chirp range"
-                )
+        return wait_until(
+            lambda: updated_since(detune_pv, last_update)
+            and detune_pv.severity != EPICS_INVALID_VAL,
+            timeout=linac_utils.CHIRP_RANGE_SETTLE_TIMEOUT,
+            abort_check=self.check_abort,
+            wake_on=[detune_pv],
+        )
 
-    def reset_interlocks(self, wait: int = 3, attempt: int = 0):
-        # TODO see if it makes more sense to implement this non-recursively
-        print(f"Resetting interlocks for {self} and waiting {wait}s")
+    def find_chirp_range(self, chirp_range: Optional[float] = None):
+        """
+        Looks for a chirp range that gives a valid detune by doubling the range
+        until the detune is valid, then narrows it down around the measured
+        detune. The result is remembered per cavity to seed the next search
+        @param chirp_range: first range to try, picked by chirp_range_seed if None
+        """
+        if chirp_range is None:
+            chirp_range = self.chirp_range_seed(
+                self.tune_config_pv_obj.get(), self.df_cold_pv_obj.get()
+            )
+
+        for coarse_range in self.coarse_chirp_ranges(chirp_range):
+            if self.try_chirp_range(coarse_range):
+                break
+        else:
+            raise linac_utils.DetuneError(
+                f"{self}: No valid detune found within"
+                f" +/-{linac_utils.MAX_CHIRP_RANGE}Hz chirp range"
+            )
+
+        fine_range = self.fine_chirp_range(self.detune_chirp, coarse_range)
+        if fine_range < coarse_range and not self.try_chirp_range(fine_range):
+            self.set_chirp_range(coarse_range)
+            fine_range = coarse_range
+
+        self.last_good_chirp_range = fine_range
+
+    async def atry_chirp_range(self, chirp_range: int) -> bool:
+        await self.acheck_abort()
+        detune_pv = self.async_pv("detune_chirp")
+        last_update = await detune_pv.get_timestamp()
+
+        print(f"Setting chirp range for {self} to +/- {chirp_range} Hz")
+        await self.async_pv("chirp_freq_start").put(-chirp_range)
+        await self.async_pv("chirp_freq_stop").put(chirp_range)
+        return await detune_pv.wait_until(
+            lambda severity: severity != EPICS_INVALID_VAL,
+            timeout=linac_utils.CHIRP_RANGE_SETTLE_TIMEOUT,
+            abort_check=self.acheck_abort,
+            severity=True,
+            since=last_update,
+        )
 
+    async def afind_chirp_range(self, chirp_range: Optional[float] = None):
+        if chirp_range is None:
+            chirp_range = self.chirp_range_seed(
+                await self.async_pv("tune_config").get(),
+                await self.async_pv("df_cold").get(),
+            )
+
+        for coarse_range in self.coarse_chirp_ranges(chirp_range):
+            if await self.atry_chirp_range(coarse_range):
+                break
+        else:
+            raise linac_utils.DetuneError(
+                f"{self}: No valid detune found within"
+                f" +/-{linac_utils.MAX_CHIRP_RANGE}Hz chirp range"
+            )
+
+        detune = await self.async_pv("detune_chirp").get()
+        fine_range = self.fine_chirp_range(detune, coarse_range)
+        if fine_range < coarse_range and not await self.atry_chirp_range(fine_range):
+            await self.atry_chirp_range(coarse_range)
+            fine_range = coarse_range
+
+        self.last_good_chirp_range = fine_range
+
+    @property
+    def interlock_reset_pv_obj(self) -> PV:
         if not self._interlock_reset_pv_obj:
             self._interlock_reset_pv_obj = PV(self.interlock_reset_pv)
+        return self._interlock_reset_pv_obj
 
-        self._interlock_reset_pv_obj.put(1)
-        time.sleep(wait)
+    def reset_interlocks(self, wait: int = 3, attempt: int = 0):
+        """
+        Single cavity reset, see Rack.reset_interlocks and
+        Cryomodule.reset_interlocks to reset several cavities at once
+        @param wait: max seconds to wait for the RF permit after the first reset
+        @param attempt: attempt number to start counting from
+        """
+        report = interlocks.reset_interlocks([self], wait=wait, first_attempt=attempt)
+        if self in report.errors:
+            raise report.errors[self]
 
-        print(f"Checking {self} RF permit")
-        if self.rf_inhibited:
-            if attempt >= linac_utils.INTERLOCK_RESET_ATTEMPTS:
-                raise linac_utils.CavityFaultError(
-                    f"{self} still faulted after"
-                    f" {linac_utils.INTERLOCK_RESET_ATTEMPTS} "
-                    f"reset attempts"
-                )
-            else:
-                print(f"{self} reset {attempt} unsuccessful; retrying")
-                self.reset_interlocks(wait=wait + 2, attempt=attempt + 1)
-        else:
-            print(f"{self} interlocks reset")
+    async def areset_interlocks(self, wait: int = 3, attempt: int = 0):
+        """
+        Async version of reset_interlocks, waits on the RF permit's monitor
+        with a longer wait on every retry
+        @param wait: max seconds to wait for the RF permit after the first reset
+        @param attempt: attempt number to start counting from
+        """
+        rf_permit = self.async_pv("rf_permit")
+        for attempt in range(attempt, linac_utils.INTERLOCK_RESET_ATTEMPTS + 1):
+            print(f"Resetting interlocks for {self} and waiting up to {wait}s")
+            await self.async_pv("interlock_reset").put(1)
+
+            if await rf_permit.wait_until(lambda permit: permit != 0, timeout=wait):
+                print(f"{self} interlocks reset")
+                return
+
+            print(f"{self} reset {attempt} unsuccessful")
+            wait += interlocks.INTERLOCK_RESET_WAIT_INCREMENT
+
+        raise linac_utils.CavityFaultError(
+            f"{self} still faulted after"
+            f" {linac_utils.INTERLOCK_RESET_ATTEMPTS} reset attempts"
+        )
 
     @property
     def characterization_timestamp(self) -> datetime:
@@ -835,14 +1312,24 @@ class Cavity(linac_utils.SCLinacObject):
         time_readback = datetime.strptime(date_string, "%Y-%m-%d-%H:%M:%S")
         return time_readback
 
-    def characterize(self):
+    def characterize(self, force=False):
         """
         Calibrates the cavity's RF probe so that the amplitude readback will be
         accurate. Also measures the loaded Q (quality factor) of the cavity power
         coupler
+        :param force: characterize even if the calibration policy says the last
+                      characterization is still good i.e. when an operator
+                      explicitly asked for one
         :return:
         """
 
+        if not force and self.characterization_fresh:
+            print(
+                f"{self} last characterization is recent and still in use,"
+                f" not starting a new one"
+            )
+            return
+
         self.reset_interlocks()
 
         print(f"setting {self} drive to {linac_utils.SAFE_PULSED_DRIVE_LEVEL}")
@@ -859,15 +1346,25 @@ class Cavity(linac_utils.SCLinacObject):
 
         print(f"Starting {self} cavity characterization at {datetime.now()}")
         self.start_characterization()
-        time.sleep(2)
 
-        while self.characterization_running:
-            self.check_abort()
-            print(
-                f"waiting for {self} characterization" f" to stop running",
-                datetime.now(),
-            )
-            time.sleep(1)
+        # Give the IOC a moment to flip the status to running so we don't
+        # mistake the previous result for this one
+        wait_until(
+            lambda: self.characterization_running,
+            timeout=linac_utils.CHARACTERIZATION_START_TIMEOUT,
+            abort_check=self.check_abort,
+            wake_on=[self.characterization_status_pv_obj],
+        )
+
+        print(
+            f"waiting for {self} characterization to stop running",
+            datetime.now(),
+        )
+        wait_until(
+            lambda: not self.characterization_running,
+            abort_check=self.check_abort,
+            wake_on=[self.characterization_status_pv_obj],
+        )
 
         if self.characterization_status == linac_utils.CALIBRATION_COMPLETE_VALUE:
             if (datetime.now() - self.characterization_timestamp).total_seconds() > 300:
@@ -896,6 +1393,17 @@ class Cavity(linac_utils.SCLinacObject):
                 f"{self} scale factor out of tolerance"
             )
 
+        # Keyed on the IOC's timestamp so reusing a recent result isn't
+        # recorded twice
+        self.record_calibration(
+            CHARACTERIZATION,
+            {
+                "loaded_q": self.measured_loaded_q,
+                "scale_factor": self.measured_scale_factor,
+            },
+            timestamp=self.characterization_timestamp.timestamp(),
+        )
+
         self.reset_data_decimation()
         print(f"restoring {self} piezo feedback setpoint to 0")
         self.piezo.feedback_setpoint = 0
@@ -903,19 +1411,34 @@ class Cavity(linac_utils.SCLinacObject):
         print(f"{self} characterization successful")
 
     def walk_amp(self, des_amp, step_size):
-        print(f"walking {self} to {des_amp} from {self.ades}")
-
-        while self.ades <= (des_amp - step_size):
-            self.check_abort()
-            if self.is_quenched:
+        """
+        Single cavity ramp, see utils.sc_linac.ramp.RampEngine to walk several
+        cavities at once
+        """
+        report = RampEngine([RampRequest(self, des_amp, step_size)]).run()
+        if self in report.errors:
+            raise report.errors[self]
+
+    async def awalk_amp(self, des_amp, step_size):
+        ades_pv = self.async_pv("ades")
+        quench_latch_pv = self.async_pv("quench_latch")
+        ades = await ades_pv.get()
+        print(f"walking {self} to {des_amp} from {ades}")
+
+        while ades <= (des_amp - step_size):
+            await self.acheck_abort()
+            if await quench_latch_pv.get_severity() == EPICS_INVALID_VAL:
+                raise PVInvalidError(f"{self} quench latch PV invalid")
+            if await quench_latch_pv.get() == 1:
                 raise linac_utils.QuenchError(
                     f"{self} quench detected, aborting RF ramp"
                 )
-            self.ades = self.ades + step_size
+            await ades_pv.put(ades + step_size)
             # to avoid tripping sensitive interlock
-            time.sleep(0.1)
+            await asyncio.sleep(0.1)
+            ades = await ades_pv.get()
 
-        if self.ades != des_amp:
-            self.ades = des_amp
+        if ades != des_amp:
+            await ades_pv.put(des_amp)
 
         print(f"{self} at {des_amp} MV")
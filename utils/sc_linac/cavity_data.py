@@ -0,0 +1,36 @@
+import json
+import os
+import threading
+from typing import Any, Dict, Optional
+
+# Serializes read-modify-write of the per cryomodule files when cavities in
+# the same cryomodule are handled in parallel
+_file_lock = threading.Lock()
+
+
+def load_cavity_data(filepath: str, key: str) -> Optional[Any]:
+    """
+    @param filepath: JSON file holding {key: data} for a cryomodule
+    @param key: cavity identifier within the file
+    @return: the saved data, None if there isn't any
+    """
+    with _file_lock:
+        if not os.path.isfile(filepath):
+            return None
+        with open(filepath) as f:
+            data: Dict = json.load(f)
+    return data.get(key)
+
+
+def save_cavity_data(filepath: str, key: str, value: Any):
+    with _file_lock:
+        data: Dict = {}
+        if os.path.isfile(filepath):
+            with open(filepath) as f:
+                data = json.load(f)
+        else:
+            os.makedirs(os.path.dirname(filepath), exist_ok=True)
+
+        data[key] = value
+        with open(filepath, "w") as f:
+            json.dump(data, f, indent=4)
@@ -1,8 +1,15 @@
-from typing import Type, Dict, List, TYPE_CHECKING, Optional
+from typing import Iterable, Type, List, TYPE_CHECKING, Optional, Mapping
 
 from lcls_tools.common.controls.pyepics.utils import PV
 
-from utils.sc_linac.linac_utils import SCLinacObject, L1BHL, CRYO_NAME_MAP
+from utils.sc_linac import interlocks, ssa
+from utils.sc_linac.linac_utils import (
+    SCLinacObject,
+    L1BHL,
+    CRYO_NAME_MAP,
+    LazyDict,
+)
+from utils.sc_linac.parallel import DEFAULT_MAX_CONCURRENCY, ParallelReport
 
 if TYPE_CHECKING:
     from cavity import Cavity
@@ -73,9 +80,12 @@ class Cryomodule(SCLinacObject):
         self.rack_a: "Rack" = self.rack_class(rack_name="A", cryomodule_object=self)
         self.rack_b: "Rack" = self.rack_class(rack_name="B", cryomodule_object=self)
 
-        self.cavities: Dict[int, "Cavity"] = {}
-        self.cavities.update(self.rack_a.cavities)
-        self.cavities.update(self.rack_b.cavities)
+        self.cavities: Mapping[int, "Cavity"] = LazyDict(
+            range(1, 9),
+            lambda cavity_num: (
+                self.rack_a if cavity_num in self.rack_a.cavities else self.rack_b
+            ).cavities[cavity_num],
+        )
 
         if self.is_harmonic_linearizer:
             self.coupler_vacuum_pvs: List[str] = [
@@ -93,6 +103,31 @@ class Cryomodule(SCLinacObject):
             + self.linac.insulating_vacuum_pvs
         )
 
+    def reset_interlocks(
+        self, wait: float = interlocks.DEFAULT_INTERLOCK_RESET_WAIT
+    ) -> ParallelReport:
+        """
+        Resets every cavity's interlocks together, see
+        utils.sc_linac.interlocks.reset_interlocks
+        @return: ParallelReport with each cavity's result
+        """
+        return interlocks.reset_interlocks(self.cavities.values(), wait=wait)
+
+    def calibrate_ssas(
+        self,
+        cavities: Optional[Iterable["Cavity"]] = None,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    ) -> ParallelReport:
+        """
+        Calibrates the SSAs concurrently, see utils.sc_linac.ssa.calibrate_ssas
+        @param cavities: cavities in this cryomodule to calibrate, all if None
+        @return: ParallelReport with each cavity's slope and forward power
+        """
+        return ssa.calibrate_ssas(
+            self.cavities.values() if cavities is None else cavities,
+            max_concurrency=max_concurrency,
+        )
+
     def __str__(self):
         return f"{self.linac.name} CM{self.name}"
 
@@ -1,15 +1,24 @@
-from typing import Dict, Optional
+import threading
+import time
+from functools import partial
+from typing import Dict, Iterable, List, Optional
 
+import numpy as np
 from lcls_tools.common.controls.pyepics.utils import PV
 
+from utils.sc_linac import linac_utils
 from utils.sc_linac.linac_utils import (
     SCLinacObject,
     DECARAD_BACKGROUND_READING_AVG,
     DECARAD_BACKGROUND_READING_RAW,
 )
+from utils.sc_linac.pv_field import PVField
 
 
 class DecaradHead(SCLinacObject):
+    avg_dose_rate_pv = PVField("GAMMAAVE")
+    raw_dose_rate_pv = PVField("GAMMA_DOSE_RATE")
+
     def __init__(self, number: int, decarad: "Decarad"):
         if number not in range(1, 11):
             raise AttributeError("Decarad Head number need to be between 1 and 10")
@@ -20,11 +29,6 @@ class DecaradHead(SCLinacObject):
         # Adds leading 0 to numbers with less than 2 digits
         self._pv_prefix = self.decarad.pv_addr("{:02d}:".format(self.number))
 
-        self.avg_dose_rate_pv: str = self.pv_addr("GAMMAAVE")
-        self.raw_dose_rate_pv: str = self.pv_addr("GAMMA_DOSE_RATE")
-        self._avg_dose_rate_pv_obj: Optional[PV] = None
-        self._raw_dose_rate_pv_obj: Optional[PV] = None
-
         self.counter = 0
 
     @property
@@ -53,16 +57,15 @@ class DecaradHead(SCLinacObject):
 
 
 class Decarad(SCLinacObject):
+    power_control_pv = PVField("HVCTRL", writable=True)
+    power_status_pv = PVField("HVSTATUS")
+    voltage_readback_pv = PVField("HVMON")
+
     def __init__(self, number: int):
         if number not in [1, 2]:
             raise AttributeError("Decarad needs to be 1 or 2")
         self.number = number
         self._pv_prefix = "RADM:SYS0:{num}00:".format(num=self.number)
-        self.power_control_pv = self.pv_addr("HVCTRL")
-        self._power_control_pv_obj: Optional[PV] = None
-
-        self.power_status_pv = self.pv_addr("HVSTATUS")
-        self.voltage_readback_pv = self.pv_addr("HVMON")
 
         self.heads: Dict[int, DecaradHead] = {
             head: DecaradHead(number=head, decarad=self) for head in range(1, 11)
@@ -89,8 +92,257 @@ class Decarad(SCLinacObject):
 
     @property
     def max_avg_dose(self) -> float:
-        return max([head.normalized_avg_dose for head in self.heads.values()])
+        return get_decarad_monitor().max_avg_dose(self.number)
 
     @property
     def max_raw_dose(self) -> float:
-        return max([head.normalized_raw_dose for head in self.heads.values()])
+        return get_decarad_monitor().max_raw_dose(self.number)
+
+
+class DoseHistory:
+    """
+    NumPy ring buffer of one head's background subtracted raw dose rate. CA
+    monitors only fire on change, so each value holds until the next one, and
+    the running integral is stored with every update so that windowed doses
+    only need a binary search instead of a pass over the whole buffer
+    """
+
+    def __init__(self, size: int = linac_utils.DECARAD_HISTORY_SIZE):
+        self.times: np.ndarray = np.zeros(size)
+        self.values: np.ndarray = np.zeros(size)
+        self.integrals: np.ndarray = np.zeros(size)
+        self.count: int = 0
+
+    @property
+    def size(self) -> int:
+        return len(self.times)
+
+    @property
+    def newest(self) -> Optional[int]:
+        return (self.count - 1) % self.size if self.count else None
+
+    @property
+    def oldest(self) -> Optional[int]:
+        return self.count % self.size if self.count > self.size else 0
+
+    @property
+    def latest(self) -> float:
+        return self.values[self.newest] if self.count else 0
+
+    def record(self, value: float, timestamp: float):
+        newest = self.newest
+        integral = 0
+        if newest is not None:
+            integral = self.integrals[newest] + self.values[newest] * (
+                timestamp - self.times[newest]
+            )
+
+        index = self.count % self.size
+        self.times[index] = timestamp
+        self.values[index] = value
+        self.integrals[index] = integral
+        self.count += 1
+
+    def _segments(self) -> List[slice]:
+        """
+        @return: the filled part of the buffer as slices from oldest to newest
+        """
+        if self.count <= self.size:
+            return [slice(0, self.count)]
+        return [slice(self.oldest, self.size), slice(0, self.oldest)]
+
+    def index_at(self, timestamp: float) -> Optional[int]:
+        """
+        @return: index of the value in effect at timestamp, None if timestamp
+                 is before the oldest value still in the buffer
+        """
+        index = None
+        for segment in self._segments():
+            position = np.searchsorted(self.times[segment], timestamp, side="right")
+            if not position:
+                break
+            index = segment.start + position - 1
+        return index
+
+    def integral_at(self, timestamp: float) -> float:
+        index = self.index_at(timestamp)
+        if index is None:
+            return self.integrals[self.oldest]
+        return self.integrals[index] + self.values[index] * (
+            timestamp - self.times[index]
+        )
+
+    def mean(self, start: float, end: float) -> float:
+        """
+        @return: time weighted mean dose rate between start and end (or since
+                 the oldest value if start is before it)
+        """
+        if not self.count:
+            return 0
+        start = max(start, self.times[self.oldest])
+        if end <= start:
+            return self.latest
+        return (self.integral_at(end) - self.integral_at(start)) / (end - start)
+
+    def max(self, start: float) -> float:
+        """
+        @return: the highest dose rate in effect at any point since start
+        """
+        if not self.count:
+            return 0
+        first = self.index_at(start)
+        if first is None:
+            first = self.oldest
+        end = self.newest + 1
+        if first < end:
+            return self.values[first:end].max()
+        return max(self.values[first:].max(), self.values[:end].max())
+
+
+class DecaradMonitor:
+    """
+    Subscribes once to every head of the given decarads and keeps their
+    latest readings plus a rolling history of raw dose rates, so any number
+    of consumers (i.e. every QuenchCavity.check_abort) can ask for doses
+    without going over the network. Heads whose PVs are disconnected are
+    read directly so that a lost monitor can't hide radiation
+    """
+
+    def __init__(
+        self,
+        decarads: Iterable[Decarad],
+        history_size: int = linac_utils.DECARAD_HISTORY_SIZE,
+    ):
+        self.decarads: Dict[int, Decarad] = {
+            decarad.number: decarad for decarad in decarads
+        }
+        self.heads: List[DecaradHead] = [
+            head
+            for decarad in self.decarads.values()
+            for head in decarad.heads.values()
+        ]
+        self.latest_raw: np.ndarray = np.zeros(len(self.heads))
+        self.latest_avg: np.ndarray = np.zeros(len(self.heads))
+        self.histories: List[DoseHistory] = [
+            DoseHistory(history_size) for _ in self.heads
+        ]
+        self._rows: Dict[int, np.ndarray] = {
+            number: np.array(
+                [row for row, head in enumerate(self.heads) if head.decarad is decarad]
+            )
+            for number, decarad in self.decarads.items()
+        }
+        self._lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._started: bool = False
+
+    def start(self):
+        """
+        Subscribes to every head's updates and seeds it with one read, only
+        does anything the first time it's called (even if it fails partway,
+        so callbacks never get added twice). A head whose seed read fails is
+        left to its monitor, and is read directly while it's disconnected
+        """
+        with self._start_lock:
+            if self._started:
+                return
+
+            try:
+                for row, head in enumerate(self.heads):
+                    head.raw_dose_rate_pv_obj.add_callback(partial(self._on_raw, row))
+                    head.avg_dose_rate_pv_obj.add_callback(partial(self._on_avg, row))
+                    self._seed(row, head)
+            finally:
+                self._started = True
+
+    def _seed(self, row: int, head: DecaradHead):
+        try:
+            self._on_raw(row, head.raw_dose_rate_pv_obj.get())
+            self._on_avg(row, head.avg_dose_rate_pv_obj.get())
+        except Exception as e:
+            print(f"Could not read {head.pv_prefix} to seed its dose history: {e}")
+
+    def _on_raw(self, row: int, value=None, **kwargs):
+        if value is None:
+            return
+        normalized = max(value - DECARAD_BACKGROUND_READING_RAW, 0)
+        with self._lock:
+            self.latest_raw[row] = normalized
+            self.histories[row].record(normalized, time.time())
+
+    def _on_avg(self, row: int, value=None, **kwargs):
+        if value is not None:
+            with self._lock:
+                self.latest_avg[row] = max(value - DECARAD_BACKGROUND_READING_AVG, 0)
+
+    def rows(self, decarad: Optional[int] = None) -> np.ndarray:
+        """
+        @param decarad: decarad number, every monitored decarad if None
+        """
+        if decarad is None:
+            return np.arange(len(self.heads))
+        return self._rows[decarad]
+
+    def _latest(self, rows: np.ndarray, raw: bool) -> float:
+        with self._lock:
+            values = (self.latest_raw if raw else self.latest_avg)[rows]
+
+        for index, row in enumerate(rows):
+            head = self.heads[row]
+            pv_obj = head.raw_dose_rate_pv_obj if raw else head.avg_dose_rate_pv_obj
+            if not pv_obj.connected:
+                values[index] = (
+                    head.normalized_raw_dose if raw else head.normalized_avg_dose
+                )
+        return values.max()
+
+    def max_raw_dose(self, decarad: Optional[int] = None) -> float:
+        return self._latest(self.rows(decarad), raw=True)
+
+    def max_avg_dose(self, decarad: Optional[int] = None) -> float:
+        return self._latest(self.rows(decarad), raw=False)
+
+    def max_raw_dose_over(self, seconds: float, decarad: Optional[int] = None) -> float:
+        """
+        @return: the highest raw dose rate any head saw in the last seconds
+        """
+        start = time.time() - seconds
+        with self._lock:
+            return max(self.histories[row].max(start) for row in self.rows(decarad))
+
+    def mean_raw_dose_over(
+        self, seconds: float, decarad: Optional[int] = None
+    ) -> float:
+        """
+        @return: the highest time weighted mean raw dose rate of any head over
+                 the last seconds
+        """
+        end = time.time()
+        with self._lock:
+            return max(
+                self.histories[row].mean(end - seconds, end)
+                for row in self.rows(decarad)
+            )
+
+    def dose_over(self, seconds: float, decarad: Optional[int] = None) -> float:
+        """
+        @return: the highest dose any head accumulated over the last seconds
+                 (the dose rates are per hour)
+        """
+        return self.mean_raw_dose_over(seconds, decarad) * seconds / 3600
+
+
+_monitor: Optional[DecaradMonitor] = None
+_monitor_lock = threading.Lock()
+
+
+def get_decarad_monitor() -> DecaradMonitor:
+    """
+    @return: the process wide monitor for both decarads, started on first use
+    """
+    global _monitor
+    with _monitor_lock:
+        if _monitor is None:
+            _monitor = DecaradMonitor([Decarad(1), Decarad(2)])
+    _monitor.start()
+    return _monitor
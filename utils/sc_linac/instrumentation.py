@@ -0,0 +1,223 @@
+import bisect
+import dataclasses
+import sys
+import threading
+import time
+from collections import defaultdict
+from typing import Callable, DefaultDict, Dict, List, Optional, Tuple
+
+from lcls_tools.common.controls.pyepics.utils import PV
+
+# Upper bounds (in seconds) of the latency histogram buckets, anything slower
+# than the last one lands in an overflow bucket
+LATENCY_BUCKETS = [0.001, 0.01, 0.1, 1, 10]
+
+
+def in_gui_thread() -> bool:
+    """
+    @return: whether we're on the thread running a Qt application, where a
+             blocking CA call freezes the display. Doesn't import Qt itself
+             so that non GUI tools don't pay for it
+    """
+    qt_widgets = sys.modules.get("PyQt5.QtWidgets")
+    if not qt_widgets or not qt_widgets.QApplication.instance():
+        return False
+    return threading.current_thread() is threading.main_thread()
+
+
+@dataclasses.dataclass
+class CallRecord:
+    kind: str
+    object_class: str
+    suffix: str
+    pvname: str
+    duration: float
+    gui_thread: bool
+
+
+@dataclasses.dataclass
+class CallStats:
+    count: int = 0
+    total_time: float = 0
+    max_time: float = 0
+    gui_thread_calls: int = 0
+    histogram: List[int] = dataclasses.field(
+        default_factory=lambda: [0] * (len(LATENCY_BUCKETS) + 1)
+    )
+
+    def add(self, record: CallRecord):
+        self.count += 1
+        self.total_time += record.duration
+        self.max_time = max(self.max_time, record.duration)
+        self.histogram[bisect.bisect_left(LATENCY_BUCKETS, record.duration)] += 1
+        if record.gui_thread:
+            self.gui_thread_calls += 1
+
+    @property
+    def mean_time(self) -> float:
+        return self.total_time / self.count if self.count else 0
+
+
+class CATrafficStats:
+    """
+    Collects every get, put and connection wait made through instrumented PV
+    objects, keyed by (call kind, object class, PV suffix)
+    """
+
+    def __init__(self):
+        self.enabled: bool = False
+        self.objects_created: int = 0
+        self._stats: DefaultDict[Tuple[str, str, str], CallStats] = defaultdict(
+            CallStats
+        )
+        self._callbacks: List[Callable[[CallRecord], None]] = []
+        self._lock = threading.Lock()
+
+    def add_callback(self, callback: Callable[[CallRecord], None]):
+        """
+        @param callback: called with a CallRecord for every call, i.e. to
+                         warn about CA calls made from the GUI thread
+        """
+        self._callbacks.append(callback)
+
+    def remove_callback(self, callback: Callable[[CallRecord], None]):
+        self._callbacks.remove(callback)
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+            self.objects_created = 0
+
+    def record(self, record: CallRecord):
+        with self._lock:
+            self._stats[(record.kind, record.object_class, record.suffix)].add(record)
+        for callback in self._callbacks:
+            callback(record)
+
+    def by(self, group: str) -> Dict[Tuple[str, str], CallStats]:
+        """
+        @param group: "suffix" or "object_class"
+        @return: {(call kind, suffix or class): CallStats} aggregated over the
+                 other key
+        """
+        idx = {"object_class": 1, "suffix": 2}[group]
+        aggregated: DefaultDict[Tuple[str, str], CallStats] = defaultdict(CallStats)
+        with self._lock:
+            for key, stats in self._stats.items():
+                total = aggregated[(key[0], key[idx])]
+                total.count += stats.count
+                total.total_time += stats.total_time
+                total.max_time = max(total.max_time, stats.max_time)
+                total.gui_thread_calls += stats.gui_thread_calls
+                total.histogram = [
+                    a + b for a, b in zip(total.histogram, stats.histogram)
+                ]
+        return dict(aggregated)
+
+    def report(self, group: str = "suffix") -> str:
+        """
+        @param group: "suffix" or "object_class"
+        @return: table of call counts and latencies, slowest total time first
+        """
+        bucket_names = [f"<{bound}s" for bound in LATENCY_BUCKETS] + ["slower"]
+        lines = [
+            f"{self.objects_created} PV objects created",
+            f"{'kind':8}{group:28}{'count':>8}{'total s':>10}{'mean ms':>10}"
+            f"{'max ms':>10}{'gui':>6}  {' '.join(bucket_names)}",
+        ]
+        rows = sorted(self.by(group).items(), key=lambda item: -item[1].total_time)
+        for (kind, name), stats in rows:
+            lines.append(
+                f"{kind:8}{name:28}{stats.count:>8}{stats.total_time:>10.3f}"
+                f"{stats.mean_time * 1000:>10.2f}{stats.max_time * 1000:>10.2f}"
+                f"{stats.gui_thread_calls:>6}  {stats.histogram}"
+            )
+        return "\n".join(lines)
+
+
+CA_STATS = CATrafficStats()
+
+
+class InstrumentedPV:
+    """
+    Stands in for a PV object and times its gets, puts and connection waits.
+    Everything else is passed straight through to the wrapped PV
+    """
+
+    def __init__(self, pv_obj: PV, object_class: str, suffix: str):
+        self.pv_obj: PV = pv_obj
+        self.object_class: str = object_class
+        self.suffix: str = suffix
+
+    def __getattr__(self, name):
+        return getattr(self.pv_obj, name)
+
+    def __repr__(self):
+        return f"InstrumentedPV({self.pv_obj!r})"
+
+    def _timed(self, kind: str, func: Callable, *args, **kwargs):
+        gui_thread = in_gui_thread()
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            CA_STATS.record(
+                CallRecord(
+                    kind=kind,
+                    object_class=self.object_class,
+                    suffix=self.suffix,
+                    pvname=self.pv_obj.pvname,
+                    duration=time.perf_counter() - start,
+                    gui_thread=gui_thread,
+                )
+            )
+
+    def get(self, *args, **kwargs):
+        return self._timed("get", self.pv_obj.get, *args, **kwargs)
+
+    def put(self, *args, **kwargs):
+        return self._timed("put", self.pv_obj.put, *args, **kwargs)
+
+    def wait_for_connection(self, *args, **kwargs):
+        return self._timed("connect", self.pv_obj.wait_for_connection, *args, **kwargs)
+
+
+def instrument(pv_obj: Optional[PV], object_class: str, suffix: str):
+    """
+    @return: pv_obj wrapped in an InstrumentedPV if instrumentation is on,
+             otherwise pv_obj unchanged
+    """
+    if not CA_STATS.enabled or pv_obj is None or isinstance(pv_obj, InstrumentedPV):
+        return pv_obj
+    CA_STATS.objects_created += 1
+    return InstrumentedPV(pv_obj, object_class, suffix)
+
+
+def warn_gui_thread_call(record: CallRecord):
+    if record.gui_thread:
+        print(
+            f"Blocking CA {record.kind} on {record.pvname} from the GUI thread"
+            f" took {record.duration * 1000:.1f} ms"
+        )
+
+
+def enable_instrumentation(
+    callback: Optional[Callable[[CallRecord], None]] = None,
+    warn_gui_thread: bool = True,
+):
+    """
+    Starts instrumenting PV objects created from now on (existing ones are
+    left alone, so call this before the tool starts talking to the machine)
+    @param callback: optional per call callback, see CATrafficStats.add_callback
+    @param warn_gui_thread: print a warning for every call made from the GUI
+                            thread
+    """
+    CA_STATS.enabled = True
+    if callback:
+        CA_STATS.add_callback(callback)
+    if warn_gui_thread and warn_gui_thread_call not in CA_STATS._callbacks:
+        CA_STATS.add_callback(warn_gui_thread_call)
+
+
+def disable_instrumentation():
+    CA_STATS.enabled = False
@@ -0,0 +1,69 @@
+from typing import Iterable, List, TYPE_CHECKING
+
+from utils.sc_linac import linac_utils
+from utils.sc_linac.parallel import ParallelReport
+from utils.sc_linac.wait_utils import wait_until
+
+if TYPE_CHECKING:
+    from cavity import Cavity
+
+DEFAULT_INTERLOCK_RESET_WAIT = 3
+
+# Extra seconds allowed for the RF permit on every retry
+INTERLOCK_RESET_WAIT_INCREMENT = 2
+
+
+def reset_interlocks(
+    cavities: Iterable["Cavity"],
+    wait: float = DEFAULT_INTERLOCK_RESET_WAIT,
+    first_attempt: int = 0,
+) -> ParallelReport:
+    """
+    Resets the interlocks on every cavity at once and waits (through monitors)
+    for all of their RF permits together, so a group of cavities costs one wait
+    period instead of one each. Only cavities that are still inhibited get
+    reset again, with a longer wait every time
+    @param cavities: cavities to reset
+    @param wait: max seconds to wait for the RF permits after the first reset
+    @param first_attempt: attempt number to start counting from, cavities
+                          still inhibited after attempt INTERLOCK_RESET_ATTEMPTS
+                          are reported as faulted
+    @return: ParallelReport with the attempt that cleared each cavity, or a
+             CavityFaultError for cavities that never cleared
+    """
+    report = ParallelReport()
+    pending: List["Cavity"] = list(cavities)
+
+    for attempt in range(first_attempt, linac_utils.INTERLOCK_RESET_ATTEMPTS + 1):
+        if not pending:
+            break
+
+        for cavity in pending:
+            print(f"Resetting interlocks for {cavity} and waiting up to {wait}s")
+            cavity.interlock_reset_pv_obj.put(1)
+
+        wait_until(
+            lambda: not any(cavity.rf_inhibited for cavity in pending),
+            timeout=wait,
+            wake_on=[cavity.rf_permit_pv_obj for cavity in pending],
+        )
+
+        still_inhibited: List["Cavity"] = []
+        for cavity in pending:
+            if cavity.rf_inhibited:
+                print(f"{cavity} reset {attempt} unsuccessful")
+                still_inhibited.append(cavity)
+            else:
+                print(f"{cavity} interlocks reset")
+                report.results[cavity] = attempt
+
+        pending = still_inhibited
+        wait += INTERLOCK_RESET_WAIT_INCREMENT
+
+    for cavity in pending:
+        report.errors[cavity] = linac_utils.CavityFaultError(
+            f"{cavity} still faulted after"
+            f" {linac_utils.INTERLOCK_RESET_ATTEMPTS} reset attempts"
+        )
+
+    return report
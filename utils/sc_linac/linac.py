@@ -3,13 +3,42 @@
 # NOTE: For some reason, using python 3 style type annotations causes circular
 #       import issues, so leaving as python 2 style for now
 ################################################################################
-from typing import Dict, List, Type
+from functools import cached_property, lru_cache
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    List,
+    Type,
+    Optional,
+    Iterable,
+    Iterator,
+    Mapping,
+    Union,
+)
+
+import numpy as np
+from lcls_tools.common.controls.pyepics.utils import EPICS_INVALID_VAL, PV
 
 from utils.sc_linac import linac_utils
+from utils.sc_linac.cached_pv import DEFAULT_PV_CACHE_MAX_AGE
 from utils.sc_linac.cavity import Cavity
 from utils.sc_linac.cryomodule import Cryomodule
-from utils.sc_linac.magnet import Magnet
+from utils.sc_linac.magnet import Magnet, MagnetGroup
 from utils.sc_linac.piezo import Piezo
+from utils.sc_linac.parallel import (
+    DEFAULT_MAX_CONCURRENCY,
+    ParallelReport,
+    run_parallel,
+)
+from utils.sc_linac.pv_index import PVIndex
+from utils.sc_linac.pv_batch import (
+    ConnectionReport,
+    connect_pvs,
+    read_pvs,
+    DEFAULT_BULK_CONNECTION_TIMEOUT,
+    DEFAULT_BULK_READ_TIMEOUT,
+)
 from utils.sc_linac.rack import Rack
 from utils.sc_linac.ssa import SSA
 from utils.sc_linac.stepper import StepperTuner
@@ -52,7 +81,6 @@ class Linac:
         self.machine = machine
 
         self.name = f"L{linac_section}B"
-        self.cryomodules: Dict[str, Cryomodule] = {}
         self.vacuum_prefix = f"VGXX:{self.name}:"
 
         self.beamline_vacuum_pvs: List[str] = [
@@ -63,20 +91,33 @@ class Linac:
             for cm in insulating_vacuum_cryomodules
         ]
 
-        for cm_name in linac_utils.LINAC_CM_MAP[linac_section]:
-            self.cryomodules[cm_name] = self.cryomodule_class(
-                cryo_name=cm_name, linac_object=self
-            )
+        # Cryomodules are built the first time they're looked up
+        self.cryomodules: Mapping[str, Cryomodule] = linac_utils.LazyDict(
+            linac_utils.LINAC_CM_MAP[linac_section],
+            lambda cm_name: self.cryomodule_class(cryo_name=cm_name, linac_object=self),
+        )
 
     def __str__(self):
         return self.name
 
+    def pv_attributes(self) -> Dict[str, str]:
+        """
+        @return: dict of {attribute: PV address} for the linac vacuum PVs, in
+                 the same format as SCLinacObject.pv_attributes
+        """
+        return {
+            f"{attr}[{idx}]": address
+            for attr in ["beamline_vacuum_pvs", "insulating_vacuum_pvs"]
+            for idx, address in enumerate(getattr(self, attr))
+        }
+
 
 class Machine:
     """
     Python representation of the entire LCLS II accelerator. This class functions
     as a generator for lower level accelerator objects, as well as a container
-    for generated cryomodule objects
+    for generated cryomodule objects. Cryomodules (and their cavities) are only
+    built when first accessed, so making a Machine is cheap
 
     """
 
@@ -122,23 +163,254 @@ class Machine:
                 )
             )
 
-        non_hl_cavities = []
-        hl_cavities = []
+        cm_linacs: Dict[str, Linac] = {
+            cm_name: linac for linac in self.linacs for cm_name in linac.cryomodules
+        }
+        self.cryomodules: Mapping[str, Cryomodule] = linac_utils.LazyDict(
+            cm_linacs, lambda cm_name: cm_linacs[cm_name].cryomodules[cm_name]
+        )
+
+        # PV name -> owning object(s), kept in sync as objects get built
+        self.pv_index: PVIndex = PVIndex(self)
+
+    def _cavities(self, harmonic_linearizers: bool) -> List[Cavity]:
+        return [
+            cavity
+            for cm_name in self.cryomodules
+            if (cm_name in linac_utils.L1BHL) == harmonic_linearizers
+            for cavity in self.cryomodules[cm_name].cavities.values()
+        ]
+
+    @cached_property
+    def non_hl_cavities(self) -> List[Cavity]:
+        return self._cavities(harmonic_linearizers=False)
+
+    @cached_property
+    def hl_cavities(self) -> List[Cavity]:
+        return self._cavities(harmonic_linearizers=True)
+
+    @cached_property
+    def all_cavities(self) -> List[Cavity]:
+        return self.non_hl_cavities + self.hl_cavities
+
+    # TODO handle hitting end of list
+    @cached_property
+    def non_hl_iterator(self) -> Iterator[Cavity]:
+        return iter(self.non_hl_cavities)
+
+    @cached_property
+    def hl_iterator(self) -> Iterator[Cavity]:
+        return iter(self.hl_cavities)
+
+    @cached_property
+    def all_iterator(self) -> Iterator[Cavity]:
+        return iter(self.all_cavities)
+
+    def linac_objects(
+        self,
+        scope: Iterable[str] = linac_utils.CAVITY_LEVEL_SCOPE,
+        cavities: Optional[Iterable[Cavity]] = None,
+    ) -> Iterator[linac_utils.SCLinacObject]:
+        """
+        @param scope: which cavity level objects to include, any of "cavity",
+                      "ssa", "stepper_tuner", and "piezo"
+        @param cavities: cavities to pull objects from, all cavities if None
+        @return: generator of the requested objects
+        """
+        scope = set(scope)
+        unknown = scope - set(linac_utils.CAVITY_LEVEL_SCOPE)
+        if unknown:
+            raise ValueError(f"Unknown scope {unknown}")
+
+        for cavity in self.all_cavities if cavities is None else cavities:
+            if "cavity" in scope:
+                yield cavity
+            if "ssa" in scope:
+                yield cavity.ssa
+            if "stepper_tuner" in scope:
+                yield cavity.stepper_tuner
+            if "piezo" in scope:
+                yield cavity.piezo
+
+    def run_parallel(
+        self,
+        fn: Callable[[Cavity], Any],
+        cavities: Optional[Iterable[Cavity]] = None,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        resource_limits: Optional[Dict[str, int]] = None,
+        timeout: Optional[float] = None,
+        progress_callback: Optional[Callable[[Cavity, int, int], None]] = None,
+    ) -> ParallelReport:
+        """
+        Runs fn on every cavity concurrently while respecting shared hardware,
+        i.e. resource_limits={"per_cm": 2, "shared_ssa": 1} keeps two HL
+        cavities sharing an SSA from being driven at the same time
+        @param fn: procedure to run, called with the cavity
+        @param cavities: cavities to run on, all cavities if None
+        @return: ParallelReport with every result and error
+        (see utils.sc_linac.parallel.ParallelRunner for the other parameters)
+        """
+        return run_parallel(
+            fn,
+            self.all_cavities if cavities is None else cavities,
+            max_concurrency=max_concurrency,
+            resource_limits=resource_limits,
+            timeout=timeout,
+            progress_callback=progress_callback,
+        )
+
+    def magnets(
+        self,
+        magnet_type: Union[str, Iterable[str]] = linac_utils.MAGNET_TYPES,
+        cryomodules: Optional[Iterable[str]] = None,
+    ) -> MagnetGroup:
+        """
+        @param magnet_type: "QUAD", "XCOR", "YCOR", or any combination of them
+        @param cryomodules: cryomodule names to include, every cryomodule if
+                            None (HLs have no magnets and are skipped)
+        @return: MagnetGroup for bulk degauss, trim, set_bdes, etc.
+        """
+        magnet_types = [magnet_type] if isinstance(magnet_type, str) else magnet_type
+        for name in magnet_types:
+            if name not in linac_utils.MAGNET_TYPES:
+                raise ValueError(f"Unknown magnet type {name}")
+
+        if cryomodules is None:
+            cryomodules = linac_utils.ALL_CRYOMODULES_NO_HL
+
+        return MagnetGroup(
+            getattr(self.cryomodules[cm_name], name.lower())
+            for cm_name in cryomodules
+            if not self.cryomodules[cm_name].is_harmonic_linearizer
+            for name in magnet_types
+        )
+
+    def enable_pv_cache(self, max_age: float = DEFAULT_PV_CACHE_MAX_AGE):
+        """
+        Opts every cavity, SSA, stepper, and piezo into the monitor backed PV
+        cache for their frequently polled status PVs. Should be called before
+        those PVs are first used since existing PV objects are kept as is
+        @param max_age: seconds a monitored value can be reused before falling
+                        back to a real get
+        """
+        for linac_object in self.linac_objects():
+            linac_object.pv_cache_max_age = max_age
+
+    def connect(
+        self,
+        suffixes: Optional[Iterable[str]] = None,
+        scope: Iterable[str] = linac_utils.CAVITY_LEVEL_SCOPE,
+        cavities: Optional[Iterable[Cavity]] = None,
+        timeout: float = DEFAULT_BULK_CONNECTION_TIMEOUT,
+    ) -> ConnectionReport:
+        """
+        Creates the requested PV objects up front and connects them all at
+        once so that the first pass through the machine doesn't pay for
+        thousands of serial connections
+        @param suffixes: PV suffixes to connect i.e. ["ADES", "AACTMEAN"], all
+                         known PVs if None
+        @param scope: which cavity level objects to connect (see linac_objects)
+        @param cavities: cavities to connect, all cavities if None
+        @param timeout: total seconds to wait for the connections
+        @return: ConnectionReport listing connected and timed out PVs
+        """
+        suffixes = None if suffixes is None else list(suffixes)
+        pv_objs = []
+        for linac_object in self.linac_objects(scope=scope, cavities=cavities):
+            pv_objs.extend(linac_object.create_pv_objs(suffixes))
+
+        print(f"Connecting {len(pv_objs)} PVs")
+        report = connect_pvs(pv_objs, timeout=timeout)
+        print(report)
+        if report.timed_out:
+            print(f"Timed out connecting to {report.timed_out}")
+
+        return report
 
-        self.cryomodules: Dict[str, Cryomodule] = {}
-        for linac in self.linacs:
-            for cm_name, cm_obj in linac.cryomodules.items():
-                self.cryomodules[cm_name] = cm_obj
-                for cav_ob in cm_obj.cavities.values():
-                    if cm_obj.is_harmonic_linearizer:
-                        hl_cavities.append(cav_ob)
-                    else:
-                        non_hl_cavities.append(cav_ob)
+    def snapshot(
+        self,
+        fields: Iterable[str],
+        cavities: Optional[Iterable[Cavity]] = None,
+        timeout: float = DEFAULT_BULK_READ_TIMEOUT,
+    ) -> np.ndarray:
+        """
+        Reads every requested field for the selected cavities in one batch so
+        that filtering (e.g. online, on, and in SELA) can be done with array
+        masks instead of one network call per cavity per field
+        @param fields: numeric PV attribute stems on the cavity, i.e. "aact",
+                       "ades", "rf_mode", "rf_state", "hw_mode", "detune_best".
+                       Objects belonging to the cavity can be reached with a
+                       dot, i.e. "ssa.status" or "stepper_tuner.motor_moving"
+        @param cavities: cavities to read, all cavities if None
+        @param timeout: total seconds to wait for all the values
+        @return: structured array with one row per cavity (in the order
+                 given) with "cryomodule" and "cavity" columns plus a value,
+                 {field}_severity, and {field}_timestamp column per field.
+                 Values that couldn't be read are NaN with INVALID severity
+        """
+        fields = list(fields)
+        cavities = self.all_cavities if cavities is None else list(cavities)
 
-        # TODO handle hitting end of list
-        self.non_hl_iterator = iter(non_hl_cavities)
-        self.hl_iterator = iter(hl_cavities)
-        self.all_iterator = iter(non_hl_cavities + hl_cavities)
+        dtype = [("cryomodule", "U2"), ("cavity", "i4")]
+        for field in fields:
+            dtype += [
+                (field, "f8"),
+                (f"{field}_severity", "i4"),
+                (f"{field}_timestamp", "f8"),
+            ]
+        snapshot = np.zeros(len(cavities), dtype=dtype)
+        snapshot["cryomodule"] = [cavity.cryomodule.name for cavity in cavities]
+        snapshot["cavity"] = [cavity.number for cavity in cavities]
+
+        pv_objs: List[PV] = [
+            cavity_field_pv_obj(cavity, field)
+            for cavity in cavities
+            for field in fields
+        ]
+        readings = read_pvs(pv_objs, timeout=timeout)
+
+        for idx, reading in enumerate(readings):
+            row, column = divmod(idx, len(fields))
+            field = fields[column]
+            try:
+                value = float(reading["value"])
+                severity = reading.get("severity", 0)
+                timestamp = reading.get("timestamp", np.nan)
+            except (TypeError, ValueError):
+                value, severity, timestamp = np.nan, EPICS_INVALID_VAL, np.nan
+
+            snapshot[field][row] = value
+            snapshot[f"{field}_severity"][row] = severity
+            snapshot[f"{field}_timestamp"][row] = timestamp
+
+        return snapshot
+
+
+def cavity_field_pv_obj(cavity: Cavity, field: str) -> PV:
+    """
+    @param cavity: cavity the field belongs to
+    @param field: PV attribute stem, optionally prefixed by the attribute
+                  name of a cavity's component, i.e. "ades" or "ssa.status"
+    @return: the (lazily created) PV object for that field
+    """
+    linac_object = cavity
+    *components, name = field.split(".")
+    for component in components:
+        linac_object = getattr(linac_object, component)
+    return linac_object.lazy_pv_obj(name)
+
+
+@lru_cache(maxsize=None)
+def get_machine() -> Machine:
+    """
+    @return: the shared default Machine, built on first call
+    """
+    return Machine()
 
 
-MACHINE = Machine()
+def __getattr__(name):
+    # Keeps "from utils.sc_linac.linac import MACHINE" working without
+    # building anything at import time
+    if name == "MACHINE":
+        return get_machine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
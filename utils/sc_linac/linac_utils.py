@@ -1,8 +1,14 @@
 from abc import ABC, abstractmethod
-from typing import Dict
+from collections.abc import Mapping
+from typing import Dict, List, Optional, Iterable, Tuple, Callable, Any
 
+from lcls_tools.common.controls.pyepics.utils import PV
 from numpy import polyfit
 
+from utils.sc_linac.async_pv import AsyncPV
+from utils.sc_linac.cached_pv import CachedPV
+from utils.sc_linac.pv_field import PVField
+
 # Global list of superconducting linac objects
 L0B = ["01"]
 L1B = ["02", "03"]
@@ -54,18 +60,22 @@ ALL_CRYOMODULES_NO_HL = L0B + L1B + L2B + L3B
 CHARACTERIZATION_CRASHED_VALUE = 0
 CHARACTERIZATION_RUNNING_VALUE = 2
 CALIBRATION_COMPLETE_VALUE = 1
+# Seconds for a freshly started characterization to report running
+CHARACTERIZATION_START_TIMEOUT = 2
 
 SSA_STATUS_ON_VALUE = 3
 SSA_STATUS_FAULTED_VALUE = 1
 SSA_STATUS_OFF_VALUE = 2
 SSA_STATUS_RESETTING_FAULTS_VALUE = 4
 SSA_STATUS_FAULT_RESET_FAILED_VALUE = 7
+SSA_FAULTED_VALUES = [SSA_STATUS_FAULTED_VALUE, SSA_STATUS_FAULT_RESET_FAILED_VALUE]
 SSA_SLOPE_LOWER_LIMIT = 0.3
 SSA_SLOPE_UPPER_LIMIT = 2.0
 SSA_RESULT_GOOD_STATUS_VALUE = 0
 SSA_FWD_PWR_LOWER_LIMIT = 3000
 SSA_CALIBRATION_RUNNING_VALUE = 2
 SSA_CALIBRATION_CRASHED_VALUE = 0
+SSA_RESET_TIMEOUT = 90
 
 HL_SSA_MAP = {1: 1, 2: 2, 3: 3, 4: 4, 5: 1, 6: 2, 7: 3, 8: 4}
 HL_SSA_SHARED_PVS = [
@@ -111,6 +121,11 @@ DEFAULT_STEPPER_MAX_STEPS = 1000000
 DEFAULT_STEPPER_SPEED = 20000
 MAX_STEPPER_SPEED = 60000
 STEPPER_ON_LIMIT_SWITCH_VALUE = 1
+# Seconds for the motor to report moving after a move command
+STEPPER_START_MOVING_TIMEOUT = 5
+# Rough seconds each move command adds on top of the motion itself (command,
+# motor start and stop), used for move time estimates
+STEPPER_MOVE_OVERHEAD = 1
 
 # these values are based on the list of enum states found by probing {magnet_type}:L{x}B:{cm}85:CTRL
 MAGNET_RESET_VALUE = 10
@@ -118,6 +133,12 @@ MAGNET_ON_VALUE = 11
 MAGNET_OFF_VALUE = 12
 MAGNET_DEGAUSS_VALUE = 13
 MAGNET_TRIM_VALUE = 1
+# CTRL goes back to Ready once a command is done
+MAGNET_READY_VALUE = 0
+MAGNET_TYPES = ("QUAD", "XCOR", "YCOR")
+# Seconds to wait for bulk magnet commands to finish
+MAGNET_DEGAUSS_TIMEOUT = 120
+MAGNET_COMMAND_TIMEOUT = 30
 
 PIEZO_ENABLE_VALUE = 1
 PIEZO_DISABLE_VALUE = 0
@@ -143,6 +164,32 @@ TUNE_CONFIG_COLD_VALUE = 1
 TUNE_CONFIG_PARKED_VALUE = 2
 TUNE_CONFIG_OTHER_VALUE = 3
 
+# Learned per cavity Hz/step models, one JSON file per cryomodule
+TUNER_MODEL_DIR = "data/tuner_models"
+
+# Last chirp range that gave a valid detune, one JSON file per cryomodule
+CHIRP_RANGE_DIR = "data/chirp_ranges"
+DEFAULT_CHIRP_RANGE = 50000
+MAX_CHIRP_RANGE = 400000
+
+# Headroom over the detune (or DF_COLD) when picking a chirp range
+CHIRP_RANGE_MARGIN = 1.5
+
+# How long to wait for the detune to become valid after changing the range
+CHIRP_RANGE_SETTLE_TIMEOUT = 2
+
+# SQLite record of every characterization and SSA calibration result
+CALIBRATION_LEDGER_PATH = "data/calibration_ledger.db"
+
+# Stage results of the last setup run, one JSON file per cryomodule
+SETUP_CHECKPOINT_DIR = "data/setup_checkpoints"
+
+# Detune (Hz) that tuning to resonance stops within, also the max detune for
+# a cavity to count as on resonance when deciding whether setup needs to tune it
+RESONANCE_TOLERANCE = 50
+HL_RESONANCE_TOLERANCE = 500
+SETUP_AMPLITUDE_TOLERANCE = 0.01
+
 HW_MODE_ONLINE_VALUE = 0
 HW_MODE_MAINTENANCE_VALUE = 1
 HW_MODE_OFFLINE_VALUE = 2
@@ -154,9 +201,61 @@ INTERLOCK_RESET_ATTEMPTS = 5
 # this value is based on historical data, when the decarads were on, but not seeing any FE from a cavity
 DECARAD_BACKGROUND_READING_AVG = 0.8
 DECARAD_BACKGROUND_READING_RAW = 8
+# Raw dose rate updates kept per decarad head for rolling window statistics
+DECARAD_HISTORY_SIZE = 4096
 
 CRYO_NAME_MAP: Dict[str, str] = {"H1": "HL01", "H2": "HL02"}
 
+CAVITY_LEVEL_SCOPE = ("cavity", "ssa", "stepper_tuner", "piezo")
+
+
+class LazyDict(Mapping):
+    """
+    Read only dict with a fixed set of keys whose values are only built the
+    first time they're looked up. Used for the cryomodule and cavity
+    containers so that a process touching one cavity doesn't have to build
+    the whole machine. Iterating keys or checking membership never builds
+    anything, values() and items() build everything
+    """
+
+    # Incremented every time any LazyDict builds a value so that caches over
+    # the object tree (i.e. PVIndex) can cheaply tell if anything is new
+    build_count: int = 0
+
+    def __init__(self, keys: Iterable, factory: Callable[[Any], Any]):
+        """
+        @param keys: every key this dict will ever have
+        @param factory: called with a key to build its value on first access
+        """
+        self._keys: Dict[Any, None] = dict.fromkeys(keys)
+        self._factory: Callable[[Any], Any] = factory
+        self._values: Dict[Any, Any] = {}
+
+    def __getitem__(self, key):
+        if key not in self._values:
+            if key not in self._keys:
+                raise KeyError(key)
+            self._values[key] = self._factory(key)
+            LazyDict.build_count += 1
+        return self._values[key]
+
+    def __contains__(self, key):
+        return key in self._keys
+
+    def __iter__(self):
+        return iter(self._keys)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __repr__(self):
+        return f"{type(self).__name__}({list(self._keys)})"
+
+    @property
+    def built(self) -> Dict:
+        """Only the values that have been built so far, in build order"""
+        return dict(self._values)
+
 
 class SCLinacObject(ABC, object):
     """
@@ -164,6 +263,19 @@ class SCLinacObject(ABC, object):
     accelerator (linacs, cryomodules, racks, cavities, SSAs, and tuners)
     """
 
+    # Stems of the PVs (i.e. "rf_state" for self.rf_state_pv) that get checked
+    # often enough to benefit from the monitor backed cache. PVs declared with
+    # PVField(cached=True) don't need to be listed here
+    cached_pv_names: Tuple[str, ...] = ()
+
+    # Filled in by PVField as classes are defined, {stem: PVField}
+    pv_field_registry: Dict[str, PVField] = {}
+
+    # Seconds a monitored value can be reused before falling back to a real
+    # get. None (the default) means the cache is off and every get goes out
+    # over the network
+    pv_cache_max_age: Optional[float] = None
+
     @property
     @abstractmethod
     def pv_prefix(self):
@@ -172,6 +284,133 @@ class SCLinacObject(ABC, object):
     def pv_addr(self, suffix: str):
         return self.pv_prefix + suffix
 
+    @classmethod
+    def pv_fields(cls) -> Dict[str, PVField]:
+        """
+        @return: every PV declared on this class with PVField, {stem: PVField}
+        """
+        return dict(cls.pv_field_registry)
+
+    def pv_addresses(self, writable_only: bool = False) -> Dict[str, str]:
+        """
+        @param writable_only: only include PVs declared writable
+        @return: {stem: PV address} for every PVField on this object
+        """
+        return {
+            stem: getattr(self, f"{stem}_pv")
+            for stem, field in self.pv_field_registry.items()
+            if field.writable or not writable_only
+        }
+
+    def pv_attributes(self) -> Dict[str, str]:
+        """
+        Every PV address this object knows about, declared PVFields as well as
+        address strings stored on the instance (*_pv) and lists of them (*_pvs)
+        @return: dict of {attribute: PV address}, list entries show up as
+                 i.e. "vacuum_pvs[0]"
+        """
+        attributes: Dict[str, str] = {
+            f"{stem}_pv": getattr(self, f"{stem}_pv") for stem in self.pv_field_registry
+        }
+        for attr, value in vars(self).items():
+            if attr.endswith("_pv") and isinstance(value, str):
+                attributes[attr] = value
+            elif attr.endswith("_pvs") and isinstance(value, list):
+                for idx, address in enumerate(value):
+                    if isinstance(address, str):
+                        attributes[f"{attr}[{idx}]"] = address
+        return attributes
+
+    def pv_obj_attributes(self) -> Dict[str, str]:
+        """
+        Finds every lazily generated PV object on this instance, both declared
+        PVFields and PVs following the naming convention used throughout
+        sc_linac (self.ades_pv holds the address, self._ades_pv_obj holds the
+        PV object once it's been made)
+        @return: dict of {PV object attribute name: PV address}
+        """
+        attributes: Dict[str, str] = {
+            field.obj_attr: getattr(self, f"{stem}_pv")
+            for stem, field in self.pv_field_registry.items()
+        }
+        for attr in list(vars(self)):
+            if not (attr.startswith("_") and attr.endswith("_pv_obj")):
+                continue
+            # _ades_pv_obj -> ades_pv
+            address = getattr(self, attr[1:-4], None)
+            if isinstance(address, str):
+                attributes[attr] = address
+        return attributes
+
+    def make_pv_obj(self, name: str) -> PV:
+        """
+        @param name: PV attribute stem i.e. "ades" for self.ades_pv
+        @return: a new PV object for that address, which is monitor backed if
+                 the PV is in cached_pv_names and the cache is enabled
+        """
+        address: str = getattr(self, f"{name}_pv")
+        field: Optional[PVField] = self.pv_field_registry.get(name)
+        cached = field.cached if field else name in self.cached_pv_names
+        if self.pv_cache_max_age is not None and cached:
+            return CachedPV(address, max_age=self.pv_cache_max_age)
+        return PV(address)
+
+    def lazy_pv_obj(self, name: str) -> PV:
+        """
+        @param name: PV attribute stem i.e. "ades" for self.ades_pv
+        @return: the PV object for that attribute, created if it doesn't exist
+        """
+        address = getattr(self, f"{name}_pv", None)
+        if not isinstance(address, str):
+            raise AttributeError(f"{self} has no PV named {name}")
+        field: Optional[PVField] = self.pv_field_registry.get(name)
+        attr = field.obj_attr if field else f"_{name}_pv_obj"
+        pv_obj = getattr(self, attr, None)
+        if not pv_obj:
+            pv_obj = self.make_pv_obj(name)
+            setattr(self, attr, pv_obj)
+        return pv_obj
+
+    def async_pv(self, name: str) -> AsyncPV:
+        """
+        @param name: PV attribute stem i.e. "ades" for self.ades_pv
+        @return: the caproto backed AsyncPV for that attribute, created the
+                 first time it's requested and reused after that
+        """
+        table: Dict[str, AsyncPV] = self.__dict__.setdefault("_async_pv_table", {})
+        if name not in table:
+            address = getattr(self, f"{name}_pv", None)
+            if not isinstance(address, str):
+                raise AttributeError(f"{self} has no PV named {name}")
+            table[name] = AsyncPV(address)
+        return table[name]
+
+    def create_pv_objs(self, suffixes: Optional[Iterable[str]] = None) -> List[PV]:
+        """
+        Creates (but does not wait on) any PV objects that haven't been made yet
+        so that they can be connected in bulk
+        @param suffixes: only create PVs whose address is pv_addr(suffix) for
+                         one of these suffixes. All PVs if None
+        @return: list of every matching PV object, new or pre-existing
+        """
+        addresses = (
+            None if suffixes is None else {self.pv_addr(suffix) for suffix in suffixes}
+        )
+        field_stems: Dict[str, str] = {
+            field.obj_attr: stem for stem, field in self.pv_field_registry.items()
+        }
+        pv_objs: List[PV] = []
+        for attr, address in self.pv_obj_attributes().items():
+            if addresses is not None and address not in addresses:
+                continue
+            pv_obj = getattr(self, attr)
+            if not pv_obj:
+                # _ades_pv_obj -> ades
+                pv_obj = self.make_pv_obj(field_stems.get(attr, attr[1:-7]))
+                setattr(self, attr, pv_obj)
+            pv_objs.append(pv_obj)
+        return pv_objs
+
 
 def stepper_tol_factor(num_steps) -> float:
     """
@@ -307,3 +546,21 @@ class CavityFaultError(Exception):
 
 class CavityHWModeError(Exception):
     pass
+
+
+class SetupStageError(Exception):
+    """
+    Exception thrown when a setup pipeline stage's pre or postcondition
+    doesn't hold
+    """
+
+    pass
+
+
+class ParallelExecutionError(Exception):
+    """
+    Exception thrown when one or more cavities failed during a parallel run,
+    the ParallelReport is passed along as the first argument
+    """
+
+    pass
@@ -1,8 +1,12 @@
-from typing import Optional, TYPE_CHECKING
+from typing import Iterable, Iterator, List, Optional, Sequence, TYPE_CHECKING
 
+import numpy as np
 from lcls_tools.common.controls.pyepics.utils import PV
 
 from utils.sc_linac import linac_utils
+from utils.sc_linac.pv_batch import read_pvs
+from utils.sc_linac.pv_field import PVField
+from utils.sc_linac.wait_utils import wait_until
 
 if TYPE_CHECKING:
     from cryomodule import Cryomodule
@@ -15,6 +19,15 @@ class Magnet(linac_utils.SCLinacObject):
 
     """
 
+    bdes_pv = PVField("BDES", writable=True)
+    control_pv = PVField("CTRL", writable=True)
+    interlock_pv = PVField("INTLKSUMY")
+    ps_status_pv = PVField("STATE")
+    bact_pv = PVField("BACT")
+    iact_pv = PVField("IACT")
+    # changing IDES immediately perturbs
+    ides_pv = PVField("IDES", writable=True)
+
     def __init__(self, magnet_type: str, cryomodule: "Cryomodule"):
         """
         @param magnet_type: One of QUAD, XCOR, or YCOR
@@ -26,20 +39,6 @@ class Magnet(linac_utils.SCLinacObject):
         self.name = magnet_type
         self.cryomodule: "Cryomodule" = cryomodule
 
-        self.bdes_pv: str = self.pv_addr("BDES")
-        self._bdes_pv_obj: Optional[PV] = None
-
-        self.control_pv: str = self.pv_addr("CTRL")
-        self._control_pv_obj: Optional[PV] = None
-
-        self.interlock_pv: str = self.pv_addr("INTLKSUMY")
-        self.ps_status_pv: str = self.pv_addr("STATE")
-        self.bact_pv: str = self.pv_addr("BACT")
-        self.iact_pv: str = self.pv_addr("IACT")
-
-        # changing IDES immediately perturbs
-        self.ides_pv: str = self.pv_addr("IDES")
-
     @property
     def pv_prefix(self):
         return self._pv_prefix
@@ -51,14 +50,18 @@ class Magnet(linac_utils.SCLinacObject):
         return self._control_pv_obj
 
     @property
-    def bdes(self):
+    def bdes_pv_obj(self) -> PV:
         if not self._bdes_pv_obj:
             self._bdes_pv_obj = PV(self.bdes_pv)
-        return self._bdes_pv_obj.get()
+        return self._bdes_pv_obj
+
+    @property
+    def bdes(self):
+        return self.bdes_pv_obj.get()
 
     @bdes.setter
     def bdes(self, value):
-        self._bdes_pv_obj.put(value)
+        self.bdes_pv_obj.put(value)
         self.control_pv_obj.put(linac_utils.MAGNET_TRIM_VALUE)
 
     def reset(self):
@@ -75,3 +78,113 @@ class Magnet(linac_utils.SCLinacObject):
 
     def trim(self):
         self.control_pv_obj.put(linac_utils.MAGNET_TRIM_VALUE)
+
+
+class MagnetGroup:
+    """
+    Any number of magnets that can be commanded together. Every command is
+    sent to all of the magnets without waiting on completion, then their
+    control readbacks are watched together until they all go back to Ready
+    """
+
+    def __init__(self, magnets: Iterable[Magnet]):
+        self.magnets: List[Magnet] = list(magnets)
+
+    def __iter__(self) -> Iterator[Magnet]:
+        return iter(self.magnets)
+
+    def __len__(self):
+        return len(self.magnets)
+
+    def ctrl_values(self) -> List[Optional[float]]:
+        """
+        @return: every magnet's CTRL readback from one batch of gets, None
+                 for magnets that couldn't be read
+        """
+        readings = read_pvs([magnet.control_pv_obj for magnet in self.magnets])
+        return [reading["value"] if reading else None for reading in readings]
+
+    def all_ready(self) -> bool:
+        return all(
+            value == linac_utils.MAGNET_READY_VALUE for value in self.ctrl_values()
+        )
+
+    def status_table(self) -> np.ndarray:
+        """
+        @return: structured array with one row per magnet (in order) with
+                 "cryomodule", "magnet", "done" (CTRL back to Ready), "ctrl",
+                 "bdes", and "bact" columns. Values that couldn't be read
+                 are NaN
+        """
+        columns = ["ctrl", "bdes", "bact"]
+        table = np.zeros(
+            len(self.magnets),
+            dtype=[("cryomodule", "U2"), ("magnet", "U4"), ("done", "?")]
+            + [(column, "f8") for column in columns],
+        )
+        table["cryomodule"] = [magnet.cryomodule.name for magnet in self.magnets]
+        table["magnet"] = [magnet.name for magnet in self.magnets]
+
+        pv_objs: List[PV] = [
+            magnet.lazy_pv_obj("control" if column == "ctrl" else column)
+            for magnet in self.magnets
+            for column in columns
+        ]
+        for idx, reading in enumerate(read_pvs(pv_objs)):
+            row, column = divmod(idx, len(columns))
+            value = reading["value"] if reading else None
+            table[columns[column]][row] = np.nan if value is None else value
+
+        table["done"] = table["ctrl"] == linac_utils.MAGNET_READY_VALUE
+        return table
+
+    def command(self, value: int, timeout: float) -> np.ndarray:
+        """
+        @param value: CTRL enum value i.e. MAGNET_DEGAUSS_VALUE
+        @param timeout: seconds to wait for every magnet to be Ready again
+        @return: status table, see status_table
+        """
+        for magnet in self.magnets:
+            magnet.control_pv_obj.put(value, wait=False)
+
+        wait_until(
+            self.all_ready,
+            timeout=timeout,
+            wake_on=[magnet.control_pv_obj for magnet in self.magnets],
+        )
+
+        table = self.status_table()
+        print(f"{table['done'].sum()}/{len(self.magnets)} magnets done")
+        return table
+
+    def degauss(self, timeout: float = linac_utils.MAGNET_DEGAUSS_TIMEOUT):
+        return self.command(linac_utils.MAGNET_DEGAUSS_VALUE, timeout)
+
+    def trim(self, timeout: float = linac_utils.MAGNET_COMMAND_TIMEOUT):
+        return self.command(linac_utils.MAGNET_TRIM_VALUE, timeout)
+
+    def reset(self, timeout: float = linac_utils.MAGNET_COMMAND_TIMEOUT):
+        return self.command(linac_utils.MAGNET_RESET_VALUE, timeout)
+
+    def turn_on(self, timeout: float = linac_utils.MAGNET_COMMAND_TIMEOUT):
+        return self.command(linac_utils.MAGNET_ON_VALUE, timeout)
+
+    def turn_off(self, timeout: float = linac_utils.MAGNET_COMMAND_TIMEOUT):
+        return self.command(linac_utils.MAGNET_OFF_VALUE, timeout)
+
+    def set_bdes(
+        self,
+        values: Sequence[float],
+        timeout: float = linac_utils.MAGNET_COMMAND_TIMEOUT,
+    ) -> np.ndarray:
+        """
+        @param values: BDES for each magnet, in the group's order
+        @return: status table after trimming to the new BDES values
+        """
+        if len(values) != len(self.magnets):
+            raise ValueError(
+                f"Got {len(values)} BDES values for {len(self.magnets)} magnets"
+            )
+        for magnet, value in zip(self.magnets, values):
+            magnet.bdes_pv_obj.put(value, wait=False)
+        return self.trim(timeout)
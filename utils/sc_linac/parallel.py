@@ -0,0 +1,219 @@
+import dataclasses
+import time
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Hashable,
+    Iterable,
+    List,
+    Optional,
+    Tuple,
+    TYPE_CHECKING,
+)
+
+from utils.sc_linac import linac_utils
+
+if TYPE_CHECKING:
+    from cavity import Cavity
+
+DEFAULT_MAX_CONCURRENCY = 8
+
+
+def ssa_resource_key(cavity: "Cavity") -> Tuple[str, int]:
+    """
+    HL cavities 5-8 are powered by the same physical SSAs as 1-4
+    """
+    if cavity.cryomodule.is_harmonic_linearizer:
+        return cavity.cryomodule.name, linac_utils.HL_SSA_MAP[cavity.number]
+    return cavity.cryomodule.name, cavity.number
+
+
+# Names usable in resource_limits, each mapping a cavity to the piece of
+# hardware it shares with other cavities
+RESOURCE_KEY_FUNCS: Dict[str, Callable[["Cavity"], Hashable]] = {
+    "per_linac": lambda cavity: cavity.linac.name,
+    "per_cm": lambda cavity: cavity.cryomodule.name,
+    "per_rack": lambda cavity: (cavity.cryomodule.name, cavity.rack.rack_name),
+    "shared_ssa": ssa_resource_key,
+}
+
+
+@dataclasses.dataclass
+class ParallelReport:
+    results: Dict["Cavity", Any] = dataclasses.field(default_factory=dict)
+    errors: Dict["Cavity", Exception] = dataclasses.field(default_factory=dict)
+    timed_out: List["Cavity"] = dataclasses.field(default_factory=list)
+
+    @property
+    def all_succeeded(self) -> bool:
+        return not self.errors
+
+    def __str__(self):
+        total = len(self.results) + len(self.errors)
+        message = f"{len(self.results)}/{total} cavities succeeded"
+        for cavity, error in self.errors.items():
+            message += f"\n{cavity}: {error!r}"
+        return message
+
+    def raise_for_errors(self):
+        if self.errors:
+            raise linac_utils.ParallelExecutionError(self)
+
+
+class ParallelRunner:
+    """
+    Runs a per cavity procedure on a thread pool without ever running two
+    procedures at once that would fight over shared hardware. Cavities are
+    started in the order given as soon as a worker and all of their resources
+    are free, so the ordering still matters for e.g. ramping upstream first
+    """
+
+    def __init__(
+        self,
+        fn: Callable[["Cavity"], Any],
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        resource_limits: Optional[Dict[str, int]] = None,
+        timeout: Optional[float] = None,
+        progress_callback: Optional[Callable[["Cavity", int, int], None]] = None,
+    ):
+        """
+        @param fn: called with each cavity, its return value ends up in
+                   ParallelReport.results
+        @param max_concurrency: max number of cavities running at once
+        @param resource_limits: max concurrent cavities per shared resource,
+                                keys from RESOURCE_KEY_FUNCS i.e.
+                                {"per_cm": 2, "shared_ssa": 1}
+        @param timeout: seconds a single cavity is allowed before it's
+                        reported as timed out and asked to abort (threads
+                        can't be killed, so its resources stay held until
+                        fn actually returns)
+        @param progress_callback: called with (cavity, completed, total) every
+                                  time a cavity finishes
+        """
+        resource_limits = resource_limits or {}
+        for name, limit in resource_limits.items():
+            if name not in RESOURCE_KEY_FUNCS:
+                raise ValueError(f"Unknown resource {name}")
+            if limit < 1:
+                raise ValueError(f"Limit for {name} needs to be at least 1")
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency needs to be at least 1")
+
+        self.fn = fn
+        self.max_concurrency: int = max_concurrency
+        self.resource_limits: Dict[str, int] = resource_limits
+        self.timeout: Optional[float] = timeout
+        self.progress_callback = progress_callback
+
+        self._usage: Counter = Counter()
+        self._running: Dict[Future, Tuple["Cavity", List[Tuple], float]] = {}
+
+    def resource_keys(self, cavity: "Cavity") -> List[Tuple[str, Hashable]]:
+        return [
+            (name, RESOURCE_KEY_FUNCS[name](cavity)) for name in self.resource_limits
+        ]
+
+    def _available(self, keys: List[Tuple[str, Hashable]]) -> bool:
+        return all(self._usage[key] < self.resource_limits[key[0]] for key in keys)
+
+    def _start_ready(self, executor: ThreadPoolExecutor, pending: List["Cavity"]):
+        for cavity in list(pending):
+            if len(self._running) >= self.max_concurrency:
+                return
+            keys = self.resource_keys(cavity)
+            if self._available(keys):
+                self._usage.update(keys)
+                future = executor.submit(self.fn, cavity)
+                self._running[future] = (cavity, keys, time.monotonic())
+                pending.remove(cavity)
+
+    def _wait_time(self, report: ParallelReport) -> Optional[float]:
+        """
+        @return: seconds until the next running cavity times out, None if
+                 there's nothing left to time out
+        """
+        if self.timeout is None:
+            return None
+        now = time.monotonic()
+        deadlines = [
+            start + self.timeout - now
+            for cavity, _, start in self._running.values()
+            if cavity not in report.timed_out
+        ]
+        return max(min(deadlines), 0) if deadlines else None
+
+    def _check_timeouts(self, report: ParallelReport):
+        if self.timeout is None:
+            return
+        now = time.monotonic()
+        for cavity, _, start in self._running.values():
+            if now - start > self.timeout and cavity not in report.timed_out:
+                print(f"{cavity} took longer than {self.timeout}s, requesting abort")
+                report.timed_out.append(cavity)
+                cavity.request_abort()
+
+    def _finish(self, future: Future, report: ParallelReport, total: int):
+        cavity, keys, _ = self._running.pop(future)
+        self._usage.subtract(keys)
+
+        if cavity in report.timed_out:
+            # fn returned without ever calling check_abort, the abort was only
+            # meant for this run and would otherwise hit whatever the cavity
+            # does next
+            cavity.abort_flag = False
+            report.errors[cavity] = TimeoutError(
+                f"{cavity} took longer than {self.timeout}s"
+            )
+        elif future.exception():
+            report.errors[cavity] = future.exception()
+        else:
+            report.results[cavity] = future.result()
+
+        if self.progress_callback:
+            self.progress_callback(
+                cavity, len(report.results) + len(report.errors), total
+            )
+
+    def run(self, cavities: Iterable["Cavity"]) -> ParallelReport:
+        pending: List["Cavity"] = list(cavities)
+        total = len(pending)
+        report = ParallelReport()
+
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+            while pending or self._running:
+                self._start_ready(executor, pending)
+                done, _ = wait(
+                    self._running,
+                    timeout=self._wait_time(report),
+                    return_when=FIRST_COMPLETED,
+                )
+                for future in done:
+                    self._finish(future, report, total)
+                self._check_timeouts(report)
+
+        return report
+
+
+def run_parallel(
+    fn: Callable[["Cavity"], Any],
+    cavities: Iterable["Cavity"],
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    resource_limits: Optional[Dict[str, int]] = None,
+    timeout: Optional[float] = None,
+    progress_callback: Optional[Callable[["Cavity", int, int], None]] = None,
+) -> ParallelReport:
+    """
+    See ParallelRunner for the parameters
+    @return: ParallelReport with every cavity's result or error, call
+             raise_for_errors on it to turn failures into an exception
+    """
+    return ParallelRunner(
+        fn,
+        max_concurrency=max_concurrency,
+        resource_limits=resource_limits,
+        timeout=timeout,
+        progress_callback=progress_callback,
+    ).run(cavities)
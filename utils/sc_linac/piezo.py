@@ -1,9 +1,11 @@
+import asyncio
 import time
-from typing import Optional, TYPE_CHECKING
+from typing import TYPE_CHECKING
 
 from lcls_tools.common.controls.pyepics.utils import PV
 
 from utils.sc_linac import linac_utils
+from utils.sc_linac.pv_field import PVField
 
 if TYPE_CHECKING:
     from cavity import Cavity
@@ -16,6 +18,16 @@ class Piezo(linac_utils.SCLinacObject):
 
     """
 
+    enable_pv = PVField("ENABLE", writable=True)
+    enable_stat_pv = PVField("ENABLESTAT")
+    feedback_control_pv = PVField("MODECTRL", writable=True)
+    feedback_stat_pv = PVField("MODESTAT")
+    feedback_setpoint_pv = PVField("INTEG_SP", writable=True)
+    dc_setpoint_pv = PVField("DAC_SP", writable=True)
+    bias_voltage_pv = PVField("BIAS", writable=True)
+    voltage_pv = PVField("V")
+    hz_per_v_pv = PVField("SCALE")
+
     def __init__(self, cavity: "Cavity"):
         """
         @param cavity: The cavity object tuned by this piezo
@@ -24,33 +36,6 @@ class Piezo(linac_utils.SCLinacObject):
         self.cavity: "Cavity" = cavity
         self._pv_prefix: str = self.cavity.pv_addr("PZT:")
 
-        self.enable_pv: str = self.pv_addr("ENABLE")
-        self._enable_pv_obj: Optional[PV] = None
-
-        self.enable_stat_pv: str = self.pv_addr("ENABLESTAT")
-        self._enable_stat_pv_obj: Optional[PV] = None
-
-        self.feedback_control_pv: str = self.pv_addr("MODECTRL")
-        self._feedback_control_pv_obj: Optional[PV] = None
-
-        self.feedback_stat_pv: str = self.pv_addr("MODESTAT")
-        self._feedback_stat_pv_obj: Optional[PV] = None
-
-        self.feedback_setpoint_pv: str = self.pv_addr("INTEG_SP")
-        self._feedback_setpoint_pv_obj: Optional[PV] = None
-
-        self.dc_setpoint_pv: str = self.pv_addr("DAC_SP")
-        self._dc_setpoint_pv_obj: Optional[PV] = None
-
-        self.bias_voltage_pv: str = self.pv_addr("BIAS")
-        self._bias_voltage_pv_obj: Optional[PV] = None
-
-        self.voltage_pv: str = self.pv_addr("V")
-        self._voltage_pv_obj: Optional[PV] = None
-
-        self.hz_per_v_pv: str = self.pv_addr("SCALE")
-        self._hz_per_v_pv_obj: Optional[PV] = None
-
     def __str__(self):
         return self.cavity.__str__() + " Piezo"
 
@@ -160,6 +145,19 @@ class Piezo(linac_utils.SCLinacObject):
             self.enable_pv_obj.put(linac_utils.PIEZO_ENABLE_VALUE)
             time.sleep(2)
 
+    async def aenable(self):
+        await self.async_pv("bias_voltage").put(25)
+        enable_pv = self.async_pv("enable")
+        while (
+            await self.async_pv("enable_stat").get() != linac_utils.PIEZO_ENABLE_VALUE
+        ):
+            await self.cavity.acheck_abort()
+            print(f"{self} not enabled, trying to enable")
+            await enable_pv.put(linac_utils.PIEZO_DISABLE_VALUE)
+            await asyncio.sleep(2)
+            await enable_pv.put(linac_utils.PIEZO_ENABLE_VALUE)
+            await asyncio.sleep(2)
+
     def enable_feedback(self):
         self.enable()
         while self.in_manual:
@@ -170,6 +168,10 @@ class Piezo(linac_utils.SCLinacObject):
             self.set_to_feedback()
             time.sleep(2)
 
+    async def aenable_feedback(self):
+        await self.aenable()
+        await self._aset_feedback_mode(linac_utils.PIEZO_FEEDBACK_VALUE)
+
     def disable_feedback(self):
         self.enable()
         while not self.in_manual:
@@ -179,3 +181,29 @@ class Piezo(linac_utils.SCLinacObject):
             time.sleep(2)
             self.set_to_manual()
             time.sleep(2)
+
+    async def adisable_feedback(self):
+        await self.aenable()
+        await self._aset_feedback_mode(linac_utils.PIEZO_MANUAL_VALUE)
+
+    async def _aset_feedback_mode(self, mode: int):
+        """
+        Toggles the feedback control away from and back to mode until the
+        status says that's the mode we're in
+        @param mode: PIEZO_FEEDBACK_VALUE or PIEZO_MANUAL_VALUE
+        """
+        other_mode = (
+            linac_utils.PIEZO_MANUAL_VALUE
+            if mode == linac_utils.PIEZO_FEEDBACK_VALUE
+            else linac_utils.PIEZO_FEEDBACK_VALUE
+        )
+        feedback_control_pv = self.async_pv("feedback_control")
+        while (
+            await self.async_pv("feedback_stat").get() == linac_utils.PIEZO_MANUAL_VALUE
+        ) != (mode == linac_utils.PIEZO_MANUAL_VALUE):
+            await self.cavity.acheck_abort()
+            print(f"{self} feedback mode wrong, trying to change it")
+            await feedback_control_pv.put(other_mode)
+            await asyncio.sleep(2)
+            await feedback_control_pv.put(mode)
+            await asyncio.sleep(2)
@@ -0,0 +1,160 @@
+import dataclasses
+import time
+from typing import Callable, Dict, List, Optional
+
+from utils.sc_linac import linac_utils
+from utils.sc_linac.cavity_data import load_cavity_data, save_cavity_data
+
+STAGE_SKIPPED = "skipped"
+STAGE_DONE = "done"
+STAGE_FAILED = "failed"
+
+
+@dataclasses.dataclass
+class Stage:
+    name: str
+    run: Callable[[], None]
+    # Live check of whether the stage's result already holds, in which case
+    # it's skipped. Stages without one fall back to the checkpoint
+    postcondition: Optional[Callable[[], bool]] = None
+    # For stages whose postcondition can't always be measured (i.e. detune
+    # with RF off): if the checkpoint says the stage got done in the
+    # unfinished previous run, this confirms its result still holds
+    resume_check: Optional[Callable[[], bool]] = None
+    # Live check that has to hold before the stage can run
+    precondition: Optional[Callable[[], bool]] = None
+    # Whether to fail the stage if its postcondition doesn't hold right after
+    # it ran. Off for stages whose results take a while to show up in PVs
+    verify: bool = False
+
+
+@dataclasses.dataclass
+class StageResult:
+    name: str
+    status: str
+    duration: float = 0
+    error: Optional[str] = None
+
+
+class SetupPipeline:
+    """
+    Runs setup as a sequence of stages, skipping stages whose postconditions
+    already hold so that a rerun after a failure or abort resumes from the
+    stage that didn't finish. Each run's stage results and durations are
+    saved as a checkpoint, which also covers stages that have no live
+    postcondition or one that can't be measured at the time (see
+    Stage.resume_check)
+    """
+
+    def __init__(
+        self,
+        stages: List[Stage],
+        checkpoint_file: Optional[str] = None,
+        checkpoint_key: Optional[str] = None,
+        abort_check: Optional[Callable[[], None]] = None,
+    ):
+        """
+        @param stages: stages in the order they need to run
+        @param checkpoint_file: JSON file to keep the checkpoint in, no
+                                checkpoint if None
+        @param checkpoint_key: key within checkpoint_file i.e. cavity number
+        @param abort_check: called before every stage, expected to raise if the
+                            pipeline should stop (e.g. Cavity.check_abort)
+        """
+        self.stages: List[Stage] = stages
+        self.checkpoint_file: Optional[str] = checkpoint_file
+        self.checkpoint_key: Optional[str] = checkpoint_key
+        self.abort_check = abort_check
+        self.results: List[StageResult] = []
+
+    def load_checkpoint(self) -> Dict:
+        if not self.checkpoint_file:
+            return {}
+        return load_cavity_data(self.checkpoint_file, self.checkpoint_key) or {}
+
+    def save_checkpoint(self, finished: bool):
+        if self.checkpoint_file:
+            save_cavity_data(
+                self.checkpoint_file,
+                self.checkpoint_key,
+                {
+                    "timestamp": time.time(),
+                    "finished": finished,
+                    "stages": [dataclasses.asdict(result) for result in self.results],
+                },
+            )
+
+    @staticmethod
+    def completed_stages(checkpoint: Dict) -> List[str]:
+        """
+        @return: stages that got done in an unfinished previous run, nothing
+                 is carried over once a run makes it all the way through
+        """
+        if checkpoint.get("finished", True):
+            return []
+        return [
+            stage["name"]
+            for stage in checkpoint.get("stages", [])
+            if stage["status"] != STAGE_FAILED
+        ]
+
+    def should_skip(self, stage: Stage, completed: List[str]) -> bool:
+        if stage.postcondition and stage.postcondition():
+            return True
+        if stage.name not in completed:
+            return False
+        if stage.resume_check:
+            return stage.resume_check()
+        return stage.postcondition is None
+
+    def run_stage(self, stage: Stage):
+        if stage.precondition and not stage.precondition():
+            raise linac_utils.SetupStageError(f"{stage.name} precondition not met")
+
+        stage.run()
+
+        if stage.verify and not stage.postcondition():
+            raise linac_utils.SetupStageError(
+                f"{stage.name} postcondition not met after running"
+            )
+
+    def run(self) -> List[StageResult]:
+        """
+        @return: a StageResult for every stage that was reached, the exception
+                 from a failed stage is re-raised after it's checkpointed
+        """
+        self.results = []
+        completed = self.completed_stages(self.load_checkpoint())
+        finished = False
+
+        try:
+            for stage in self.stages:
+                if self.abort_check:
+                    self.abort_check()
+
+                if self.should_skip(stage, completed):
+                    print(f"{stage.name} already done, skipping")
+                    self.results.append(StageResult(stage.name, STAGE_SKIPPED))
+                    continue
+
+                start = time.monotonic()
+                try:
+                    self.run_stage(stage)
+                except Exception as e:
+                    self.results.append(
+                        StageResult(
+                            stage.name, STAGE_FAILED, time.monotonic() - start, str(e)
+                        )
+                    )
+                    raise
+
+                duration = time.monotonic() - start
+                print(f"{stage.name} took {duration:.1f}s")
+                self.results.append(StageResult(stage.name, STAGE_DONE, duration))
+
+            finished = True
+
+        finally:
+            self.save_checkpoint(finished)
+
+        return self.results
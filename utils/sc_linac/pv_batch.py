@@ -0,0 +1,106 @@
+import dataclasses
+import time
+from typing import Any, List, Optional, Dict, Tuple
+
+from epics import ca
+from lcls_tools.common.controls.pyepics.utils import PV
+
+DEFAULT_BULK_CONNECTION_TIMEOUT = 5
+DEFAULT_BULK_READ_TIMEOUT = 2
+
+
+@dataclasses.dataclass
+class ConnectionReport:
+    connected: List[str] = dataclasses.field(default_factory=list)
+    timed_out: List[str] = dataclasses.field(default_factory=list)
+
+    @property
+    def all_connected(self) -> bool:
+        return not self.timed_out
+
+    def __str__(self):
+        total = len(self.connected) + len(self.timed_out)
+        return f"{len(self.connected)}/{total} PVs connected"
+
+
+def connect_pvs(
+    pv_objs: List[PV], timeout: float = DEFAULT_BULK_CONNECTION_TIMEOUT
+) -> ConnectionReport:
+    """
+    Waits on a group of already created PV objects against one shared deadline
+    instead of paying a full connection round trip per PV
+    @param pv_objs: PV objects to connect (creating a PV object only queues its
+                    connection request, it doesn't block)
+    @param timeout: total seconds to wait for the whole group
+    @return: ConnectionReport of which PVs connected and which timed out
+    """
+    report = ConnectionReport()
+
+    # Send every queued search request at once
+    ca.flush_io()
+
+    deadline = time.monotonic() + timeout
+    for pv_obj in pv_objs:
+        remaining = max(deadline - time.monotonic(), 0)
+        if pv_obj.connected or pv_obj.wait_for_connection(timeout=remaining):
+            report.connected.append(pv_obj.pvname)
+        else:
+            report.timed_out.append(pv_obj.pvname)
+
+    return report
+
+
+def read_pvs(
+    pv_objs: List[PV],
+    timeout: float = DEFAULT_BULK_READ_TIMEOUT,
+    connection_timeout: float = DEFAULT_BULK_CONNECTION_TIMEOUT,
+) -> List[Optional[Dict]]:
+    """
+    Reads a group of PVs with one batch of get requests (the same approach as
+    epics.caget_many, but reusing our existing PV objects and their channels)
+    @param pv_objs: PV objects to read
+    @param timeout: total seconds to wait for all the values to come back
+    @param connection_timeout: total seconds to wait for unconnected PVs
+    @return: list of metadata dicts (value, severity, timestamp, etc.) in the
+             same order as pv_objs, None for any PV that could not be read
+    """
+    connect_pvs(
+        [pv_obj for pv_obj in pv_objs if not pv_obj.connected], connection_timeout
+    )
+
+    for pv_obj in pv_objs:
+        if pv_obj.connected:
+            ca.get_with_metadata(pv_obj.chid, ftype=pv_obj.ftype, wait=False)
+
+    # Send every get request at once
+    ca.poll()
+
+    readings: List[Optional[Dict]] = []
+    deadline = time.monotonic() + timeout
+    for pv_obj in pv_objs:
+        if not pv_obj.connected:
+            readings.append(None)
+            continue
+        remaining = max(deadline - time.monotonic(), 0)
+        readings.append(
+            ca.get_complete_with_metadata(
+                pv_obj.chid, ftype=pv_obj.ftype, timeout=remaining
+            )
+        )
+
+    return readings
+
+
+def write_pvs(writes: List[Tuple[PV, Any]]):
+    """
+    Puts to a group of PVs without waiting on each one to complete, then
+    sends all of the requests at once
+    @param writes: (PV object, value) pairs, written in order
+    """
+    if not writes:
+        return
+
+    for pv_obj, value in writes:
+        pv_obj.put(value, wait=False)
+
+    ca.flush_io()
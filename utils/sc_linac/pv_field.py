@@ -0,0 +1,101 @@
+from typing import Optional, Dict, TYPE_CHECKING
+
+from lcls_tools.common.controls.pyepics.utils import PV
+
+from utils.sc_linac.instrumentation import instrument
+
+if TYPE_CHECKING:
+    from utils.sc_linac.linac_utils import SCLinacObject
+
+# Instance attribute holding the PV objects that have been created so far
+PV_OBJ_TABLE_ATTR = "_pv_obj_table"
+
+
+class PVField:
+    """
+    Declares a PV on an SCLinacObject class instead of building an address
+    string and an empty PV object attribute in every instance's __init__:
+
+        class Cavity(SCLinacObject):
+            ades_pv = PVField("ADES", writable=True)
+
+    cavity.ades_pv returns the address (built from cavity.pv_addr on access,
+    so it's never stored), and a companion cavity._ades_pv_obj attribute reads
+    and writes that PV's object in the instance's PV object table. That table
+    only holds PVs that have actually been created, and the class keeps a
+    registry of its fields so that its PVs can be enumerated for bulk
+    connection, snapshots, or simulation
+    """
+
+    def __init__(
+        self,
+        suffix: str,
+        writable: bool = False,
+        cached: bool = False,
+        obj_attr: Optional[str] = None,
+    ):
+        """
+        @param suffix: PV suffix passed to the owner's pv_addr i.e. "ADES"
+        @param writable: whether we put to this PV (metadata for enumeration)
+        @param cached: whether this PV should be monitor backed when the
+                       owner's PV cache is enabled (see SCLinacObject.make_pv_obj)
+        @param obj_attr: PV object attribute name if it doesn't follow the
+                         _{stem}_pv_obj convention
+        """
+        self.suffix: str = suffix
+        self.writable: bool = writable
+        self.cached: bool = cached
+        self.obj_attr: Optional[str] = obj_attr
+        self.stem: Optional[str] = None
+
+    def __set_name__(self, owner, name: str):
+        if not name.endswith("_pv"):
+            raise AttributeError(f"PVField attribute {name} needs to end with _pv")
+
+        # ades_pv -> ades
+        self.stem = name[:-3]
+        if self.obj_attr is None:
+            self.obj_attr = f"_{self.stem}_pv_obj"
+        setattr(owner, self.obj_attr, PVObjSlot(self.stem))
+
+        # Copy the parent registry so subclass fields don't leak upwards
+        if "pv_field_registry" not in owner.__dict__:
+            owner.pv_field_registry = dict(getattr(owner, "pv_field_registry", {}))
+        owner.pv_field_registry[self.stem] = self
+
+    def __get__(self, instance: Optional["SCLinacObject"], owner):
+        if instance is None:
+            return self
+        return self.address(instance)
+
+    def __repr__(self):
+        return (
+            f"PVField({self.suffix!r}, writable={self.writable}, cached={self.cached})"
+        )
+
+    def address(self, instance: "SCLinacObject") -> str:
+        return instance.pv_addr(self.suffix)
+
+
+class PVObjSlot:
+    """
+    Companion descriptor PVField installs for the PV object attribute, keeps
+    code (and tests) that read or assign self._ades_pv_obj working unchanged
+    """
+
+    def __init__(self, stem: str):
+        self.stem: str = stem
+
+    def __get__(self, instance, owner) -> Optional[PV]:
+        if instance is None:
+            return self
+        table: Dict[str, PV] = instance.__dict__.get(PV_OBJ_TABLE_ATTR, {})
+        return table.get(self.stem)
+
+    def __set__(self, instance, value: Optional[PV]):
+        table: Dict[str, PV] = instance.__dict__.setdefault(PV_OBJ_TABLE_ATTR, {})
+        if value is None:
+            table.pop(self.stem, None)
+        else:
+            field: PVField = type(instance).pv_field_registry[self.stem]
+            table[self.stem] = instrument(value, type(instance).__name__, field.suffix)
@@ -0,0 +1,141 @@
+from bisect import bisect_left
+from typing import Any, Dict, List, NamedTuple, Optional, Set, TYPE_CHECKING
+
+from utils.sc_linac.linac_utils import LazyDict
+
+if TYPE_CHECKING:
+    from utils.sc_linac.linac import Machine
+
+
+class PVIndexEntry(NamedTuple):
+    pv_name: str
+    # The object owning the PV i.e. a Cavity or SSA
+    obj: Any
+    # Attribute on obj holding the address i.e. "ades_pv" or "vacuum_pvs[0]"
+    attribute: str
+    # One of "linac", "cryomodule", "magnet", "rack", or CAVITY_LEVEL_SCOPE
+    level: str
+
+
+class PVIndex:
+    """
+    Reverse lookup from PV name to the machine object(s) that own it. Some PVs
+    have more than one owner (HL SSAs share on/off/reset PVs, cryomodule
+    vacuum PVs are also linac vacuum PVs), so lookups return lists.
+
+    The index only covers objects that have been built and catches up with
+    the lazily built parts of the machine on the next query after anything
+    new gets built
+    """
+
+    def __init__(self, machine: "Machine"):
+        self.machine: "Machine" = machine
+        self._entries: Dict[str, List[PVIndexEntry]] = {}
+        self._indexed: Set[int] = set()
+        self._synced_build_count: Optional[int] = None
+
+        # Sorted PV names (and reversed PV names) for prefix and suffix
+        # queries, rebuilt on the first query after new entries get added
+        self._sorted_names: Optional[List[str]] = None
+        self._sorted_reversed_names: Optional[List[str]] = None
+
+    def __len__(self):
+        self.sync()
+        return len(self._entries)
+
+    def __contains__(self, pv_name: str):
+        self.sync()
+        return pv_name in self._entries
+
+    def lookup(self, pv_name: str) -> List[PVIndexEntry]:
+        """
+        @param pv_name: full PV address
+        @return: every entry for that PV, empty if it isn't known
+        """
+        self.sync()
+        return list(self._entries.get(pv_name, []))
+
+    def with_prefix(self, prefix: str) -> List[PVIndexEntry]:
+        """
+        @param prefix: i.e. a cavity's pv_prefix to get all of its PVs
+        @return: every entry whose PV name starts with prefix
+        """
+        self.sync()
+        if self._sorted_names is None:
+            self._sorted_names = sorted(self._entries)
+
+        entries: List[PVIndexEntry] = []
+        for idx in range(
+            bisect_left(self._sorted_names, prefix), len(self._sorted_names)
+        ):
+            pv_name = self._sorted_names[idx]
+            if not pv_name.startswith(prefix):
+                break
+            entries.extend(self._entries[pv_name])
+        return entries
+
+    def with_suffix(self, suffix: str) -> List[PVIndexEntry]:
+        """
+        @param suffix: i.e. ":ADES" to get every cavity's ADES
+        @return: every entry whose PV name ends with suffix
+        """
+        self.sync()
+        if self._sorted_reversed_names is None:
+            self._sorted_reversed_names = sorted(
+                pv_name[::-1] for pv_name in self._entries
+            )
+
+        reversed_suffix = suffix[::-1]
+        entries: List[PVIndexEntry] = []
+        for idx in range(
+            bisect_left(self._sorted_reversed_names, reversed_suffix),
+            len(self._sorted_reversed_names),
+        ):
+            reversed_name = self._sorted_reversed_names[idx]
+            if not reversed_name.startswith(reversed_suffix):
+                break
+            entries.extend(self._entries[reversed_name[::-1]])
+        return entries
+
+    def sync(self):
+        """
+        Indexes any machine objects that have been built since the last sync.
+        Cheap when nothing new has been built
+        """
+        if self._synced_build_count == LazyDict.build_count:
+            return
+        self._synced_build_count = LazyDict.build_count
+
+        for linac in self.machine.linacs:
+            self.add_object(linac, "linac")
+            for cryomodule in linac.cryomodules.built.values():
+                self.add_object(cryomodule, "cryomodule")
+                for magnet_name in ["quad", "xcor", "ycor"]:
+                    magnet = getattr(cryomodule, magnet_name, None)
+                    if magnet:
+                        self.add_object(magnet, "magnet")
+                for rack in [cryomodule.rack_a, cryomodule.rack_b]:
+                    self.add_object(rack, "rack")
+                    for cavity in rack.cavities.built.values():
+                        self.add_object(cavity, "cavity")
+                        self.add_object(cavity.ssa, "ssa")
+                        self.add_object(cavity.stepper_tuner, "stepper_tuner")
+                        self.add_object(cavity.piezo, "piezo")
+
+    def add_object(self, obj, level: str):
+        """
+        Adds every PV from obj.pv_attributes() unless obj was already indexed
+        @param obj: any object with a pv_attributes method
+        @param level: see PVIndexEntry.level
+        """
+        if id(obj) in self._indexed:
+            return
+        self._indexed.add(id(obj))
+
+        for attribute, pv_name in obj.pv_attributes().items():
+            self._entries.setdefault(pv_name, []).append(
+                PVIndexEntry(pv_name, obj, attribute, level)
+            )
+
+        self._sorted_names = None
+        self._sorted_reversed_names = None
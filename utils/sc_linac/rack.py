@@ -1,6 +1,8 @@
-from typing import Type, Dict, TYPE_CHECKING
+from typing import Type, Mapping, TYPE_CHECKING
 
-from utils.sc_linac.linac_utils import SCLinacObject
+from utils.sc_linac import interlocks
+from utils.sc_linac.linac_utils import SCLinacObject, LazyDict
+from utils.sc_linac.parallel import ParallelReport
 
 if TYPE_CHECKING:
     from cavity import Cavity
@@ -34,31 +36,42 @@ class Rack(SCLinacObject):
         self.stepper_class = self.cryomodule.stepper_class
         self.piezo_class = self.cryomodule.piezo_class
 
-        self.cavities: Dict[int, "Cavity"] = {}
         self._pv_prefix = self.cryomodule.pv_addr(
             "RACK{RACK}:".format(RACK=self.rack_name)
         )
 
         if rack_name == "A":
             # rack A always has cavities 1 - 4
-            for cavityNum in range(1, 5):
-                self.cavities[cavityNum] = self.cavity_class(
-                    cavity_num=cavityNum, rack_object=self
-                )
+            cavity_nums = range(1, 5)
 
         elif rack_name == "B":
             # rack B always has cavities 5 - 8
-            for cavityNum in range(5, 9):
-                self.cavities[cavityNum] = self.cavity_class(
-                    cavity_num=cavityNum, rack_object=self
-                )
+            cavity_nums = range(5, 9)
 
         else:
             raise Exception(f"Bad rack name {rack_name}")
 
+        # Cavities are built the first time they're looked up
+        self.cavities: Mapping[int, "Cavity"] = LazyDict(
+            cavity_nums,
+            lambda cavity_num: self.cavity_class(
+                cavity_num=cavity_num, rack_object=self
+            ),
+        )
+
     @property
     def pv_prefix(self):
         return self._pv_prefix
 
+    def reset_interlocks(
+        self, wait: float = interlocks.DEFAULT_INTERLOCK_RESET_WAIT
+    ) -> ParallelReport:
+        """
+        Resets every cavity's interlocks together, see
+        utils.sc_linac.interlocks.reset_interlocks
+        @return: ParallelReport with each cavity's result
+        """
+        return interlocks.reset_interlocks(self.cavities.values(), wait=wait)
+
     def __str__(self):
         return f"{self.cryomodule} Rack {self.rack_name}"
@@ -0,0 +1,185 @@
+import dataclasses
+import time
+from typing import Iterable, List, Optional, TYPE_CHECKING
+
+from lcls_tools.common.controls.pyepics.utils import EPICS_INVALID_VAL, PVInvalidError
+
+from utils.sc_linac import linac_utils
+from utils.sc_linac.parallel import ParallelReport
+
+if TYPE_CHECKING:
+    from cavity import Cavity
+
+# Max ADES puts per second across every cavity being ramped
+DEFAULT_RAMP_MAX_PUT_RATE = 50
+
+# Min seconds between two steps on the same cavity, to avoid tripping
+# sensitive interlocks
+DEFAULT_RAMP_STEP_PERIOD = 0.1
+
+
+@dataclasses.dataclass
+class RampRequest:
+    cavity: "Cavity"
+    target: float
+    step_size: float
+
+    # Last ADES we put, kept locally instead of being read back every step
+    setpoint: Optional[float] = None
+    next_step: float = 0
+    # Set from the quench latch monitor callback
+    error: Optional[Exception] = None
+    _callback_index: Optional[int] = None
+
+    @property
+    def done(self) -> bool:
+        return self.setpoint == self.target
+
+    def next_setpoint(self) -> float:
+        if self.setpoint <= self.target - self.step_size:
+            return self.setpoint + self.step_size
+        return self.target
+
+
+class RampEngine:
+    """
+    Walks any number of cavities to their target amplitudes from a single
+    thread. Each cavity is stepped no faster than step_period (same as
+    Cavity.walk_amp) and the puts are interleaved across cavities under one
+    global rate limit, so a whole cryomodule or linac takes about as long as
+    its slowest cavity. Quench latches are watched with monitors rather than
+    polled before every step
+    """
+
+    def __init__(
+        self,
+        requests: Iterable[RampRequest] = (),
+        max_put_rate: float = DEFAULT_RAMP_MAX_PUT_RATE,
+        step_period: float = DEFAULT_RAMP_STEP_PERIOD,
+    ):
+        """
+        @param requests: cavities to ramp, more can be added with add
+        @param max_put_rate: max ADES puts per second across all cavities
+        @param step_period: min seconds between steps on a single cavity
+        """
+        if max_put_rate <= 0:
+            raise ValueError("max_put_rate needs to be positive")
+        self.requests: List[RampRequest] = list(requests)
+        self.put_interval: float = 1 / max_put_rate
+        self.step_period: float = step_period
+
+    def add(self, cavity: "Cavity", target: float, step_size: float):
+        self.requests.append(RampRequest(cavity, target, step_size))
+
+    @staticmethod
+    def _watch_quench(request: RampRequest):
+        def on_update(value=None, severity=None, **kwargs):
+            if severity == EPICS_INVALID_VAL:
+                request.error = PVInvalidError(
+                    f"{request.cavity} quench latch PV invalid"
+                )
+            elif value == 1:
+                request.error = linac_utils.QuenchError(
+                    f"{request.cavity} quench detected, aborting RF ramp"
+                )
+
+        quench_latch_pv_obj = request.cavity.lazy_pv_obj("quench_latch")
+        request._callback_index = quench_latch_pv_obj.add_callback(on_update)
+
+    @staticmethod
+    def _unwatch_quench(request: RampRequest):
+        if request._callback_index is not None:
+            request.cavity.lazy_pv_obj("quench_latch").remove_callback(
+                request._callback_index
+            )
+            request._callback_index = None
+
+    def _start(self, request: RampRequest):
+        """
+        Reads the starting amplitude and checks the quench latch once, after
+        that both are tracked locally
+        """
+        request.setpoint = request.cavity.ades
+        print(f"walking {request.cavity} to {request.target} from {request.setpoint}")
+        if request.cavity.is_quenched:
+            raise linac_utils.QuenchError(
+                f"{request.cavity} quench detected, aborting RF ramp"
+            )
+        self._watch_quench(request)
+
+    def _step(self, request: RampRequest):
+        request.cavity.check_abort()
+        if request.error:
+            raise request.error
+        request.setpoint = request.next_setpoint()
+        request.cavity.ades = request.setpoint
+        request.next_step = time.monotonic() + self.step_period
+
+    def _finish(
+        self,
+        request: RampRequest,
+        report: ParallelReport,
+        error: Optional[Exception] = None,
+    ):
+        self._unwatch_quench(request)
+        if error:
+            report.errors[request.cavity] = error
+        else:
+            print(f"{request.cavity} at {request.target} MV")
+            report.results[request.cavity] = request.target
+
+    def run(self) -> ParallelReport:
+        """
+        @return: ParallelReport with each cavity's final amplitude, or the
+                 error that stopped it (other cavities keep ramping)
+        """
+        report = ParallelReport()
+        active: List[RampRequest] = []
+        next_put = time.monotonic()
+
+        try:
+            for request in self.requests:
+                try:
+                    self._start(request)
+                    active.append(request)
+                except Exception as e:
+                    self._finish(request, report, e)
+
+            while active:
+                request = min(active, key=lambda r: r.next_step)
+                if request.done:
+                    active.remove(request)
+                    self._finish(request, report)
+                    continue
+
+                wait_time = max(request.next_step, next_put) - time.monotonic()
+                if wait_time > 0:
+                    time.sleep(wait_time)
+
+                try:
+                    self._step(request)
+                except Exception as e:
+                    active.remove(request)
+                    self._finish(request, report, e)
+                next_put = time.monotonic() + self.put_interval
+
+        finally:
+            for request in active:
+                self._unwatch_quench(request)
+
+        return report
+
+
+def ramp_to_acon(
+    cavities: Iterable["Cavity"],
+    step_size: float = 0.1,
+    max_put_rate: float = DEFAULT_RAMP_MAX_PUT_RATE,
+) -> ParallelReport:
+    """
+    Brings every cavity to its ACON at once, i.e. after a trip
+    @return: see RampEngine.run
+    """
+    engine = RampEngine(max_put_rate=max_put_rate)
+    for cavity in cavities:
+        engine.add(cavity, cavity.acon, step_size)
+    return engine.run()
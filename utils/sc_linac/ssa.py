@@ -1,10 +1,19 @@
+import asyncio
 import time
 from datetime import datetime
-from typing import Optional, TYPE_CHECKING
+from typing import Dict, Iterable, Optional, TYPE_CHECKING
 
 from lcls_tools.common.controls.pyepics.utils import PV
 
 from utils.sc_linac import linac_utils
+from utils.sc_linac.calibration_ledger import SSA_CALIBRATION
+from utils.sc_linac.parallel import (
+    DEFAULT_MAX_CONCURRENCY,
+    ParallelReport,
+    run_parallel,
+)
+from utils.sc_linac.pv_field import PVField
+from utils.sc_linac.wait_utils import wait_until
 
 if TYPE_CHECKING:
     from cavity import Cavity
@@ -17,6 +26,20 @@ class SSA(linac_utils.SCLinacObject):
 
     """
 
+    # pv_addr takes care of the HL shared PVs
+    status_pv = PVField("StatusMsg", cached=True)
+    turn_on_pv = PVField("PowerOn", writable=True)
+    turn_off_pv = PVField("PowerOff", writable=True)
+    reset_pv = PVField("FaultReset", writable=True)
+    calibration_start_pv = PVField("CALSTRT", writable=True)
+    calibration_status_pv = PVField("CALSTS", cached=True)
+    cal_result_status_pv = PVField("CALSTAT")
+    current_slope_pv = PVField("SLOPE")
+    measured_slope_pv = PVField("SLOPE_NEW")
+    drive_max_setpoint_pv = PVField("DRV_MAX_REQ", writable=True)
+    saved_drive_max_pv = PVField("DRV_MAX_SAVE")
+    max_fwd_pwr_pv = PVField("CALPWR")
+
     def __init__(self, cavity: "Cavity"):
         """
         @param cavity: the cavity object powered by this SSA
@@ -45,45 +68,8 @@ class SSA(linac_utils.SCLinacObject):
             self.ps_volt_setpoint2_pv: str = self.hl_prefix + "PSVoltSetpt2"
             self._ps_volt_setpoint2_pv_obj: Optional[PV] = None
 
-            self.status_pv: str = self.hl_prefix + "StatusMsg"
-            self.turn_on_pv: str = self.hl_prefix + "PowerOn"
-            self.turn_off_pv: str = self.hl_prefix + "PowerOff"
-            self.reset_pv: str = self.hl_prefix + "FaultReset"
-
         else:
             self.fwd_power_lower_limit = 3000
-            self.status_pv: str = self.pv_addr("StatusMsg")
-            self.turn_on_pv: str = self.pv_addr("PowerOn")
-            self.turn_off_pv: str = self.pv_addr("PowerOff")
-            self.reset_pv: str = self.pv_addr("FaultReset")
-
-        self._status_pv_obj: Optional[PV] = None
-        self._turn_on_pv_obj: Optional[PV] = None
-        self._turn_off_pv_obj: Optional[PV] = None
-        self._reset_pv_obj: Optional[PV] = None
-
-        self.calibration_start_pv: str = self.pv_addr("CALSTRT")
-        self._calibration_start_pv_obj: Optional[PV] = None
-
-        self.calibration_status_pv: str = self.pv_addr("CALSTS")
-        self._calibration_status_pv_obj: Optional[PV] = None
-
-        self.cal_result_status_pv: str = self.pv_addr("CALSTAT")
-        self._cal_result_status_pv_obj: Optional[PV] = None
-
-        self.current_slope_pv: str = self.pv_addr("SLOPE")
-
-        self.measured_slope_pv: str = self.pv_addr("SLOPE_NEW")
-        self._measured_slope_pv_obj: Optional[PV] = None
-
-        self.drive_max_setpoint_pv: str = self.pv_addr("DRV_MAX_REQ")
-        self._drive_max_setpoint_pv_obj: Optional[PV] = None
-
-        self.saved_drive_max_pv: str = self.pv_addr("DRV_MAX_SAVE")
-        self._saved_drive_max_pv_obj: Optional[PV] = None
-
-        self.max_fwd_pwr_pv: str = self.pv_addr("CALPWR")
-        self._max_fwd_pwr_pv_obj: Optional[PV] = None
 
     def __str__(self):
         return f"{self.cavity} SSA"
@@ -108,10 +94,14 @@ class SSA(linac_utils.SCLinacObject):
             return self.pv_prefix + suffix
 
     @property
-    def status_message(self):
+    def status_pv_obj(self) -> PV:
         if not self._status_pv_obj:
-            self._status_pv_obj = PV(self.status_pv)
-        return self._status_pv_obj.get()
+            self._status_pv_obj = self.make_pv_obj("status")
+        return self._status_pv_obj
+
+    @property
+    def status_message(self):
+        return self.status_pv_obj.get()
 
     @property
     def is_on(self) -> bool:
@@ -123,10 +113,7 @@ class SSA(linac_utils.SCLinacObject):
 
     @property
     def is_faulted(self) -> bool:
-        return self.status_message in [
-            linac_utils.SSA_STATUS_FAULTED_VALUE,
-            linac_utils.SSA_STATUS_FAULT_RESET_FAILED_VALUE,
-        ]
+        return self.status_message in linac_utils.SSA_FAULTED_VALUES
 
     @property
     def max_fwd_pwr(self):
@@ -151,12 +138,19 @@ class SSA(linac_utils.SCLinacObject):
             self._drive_max_setpoint_pv_obj = PV(self.drive_max_setpoint_pv)
         self._drive_max_setpoint_pv_obj.put(value)
 
-    def calibrate(self, drive_max, attempt=0):
+    def calibrate(self, drive_max, attempt=0, force=False):
         """
         @param drive_max: drive max to use for SSA calibration
         @param attempt: recursively incremented upon calibration failure
+        @param force: calibrate even if the cavity's calibration policy says
+                      the last calibration is still good i.e. when an operator
+                      explicitly asked for one
         @return: None
         """
+        if not force and self.calibration_fresh:
+            print(f"{self} last calibration is recent and still in use, skipping")
+            return
+
         print(f"Trying {self} calibration with drive max {drive_max}")
         if drive_max < 0.4:
             raise linac_utils.SSACalibrationError(f"Requested {self} drive max too low")
@@ -173,7 +167,43 @@ class SSA(linac_utils.SCLinacObject):
             linac_utils.SSACalibrationError,
         ) as e:
             if attempt < 3:
-                self.calibrate(drive_max - 0.01, attempt + 1)
+                self.calibrate(drive_max - 0.01, attempt + 1, force=force)
+            else:
+                raise linac_utils.SSACalibrationError(e)
+
+    async def acalibrate(self, drive_max, attempt=0, force=False):
+        """
+        Async version of calibrate
+        @param drive_max: drive max to use for SSA calibration
+        @param attempt: recursively incremented upon calibration failure
+        @param force: calibrate even if the last calibration is still good
+        @return: None
+        """
+        if not force and self.cavity.calibration_policy:
+            current_slope = await self.async_pv("current_slope").get()
+            if self.cavity.calibration_fresh(
+                SSA_CALIBRATION, lambda: {"ssa_slope": current_slope}
+            ):
+                print(f"{self} last calibration is recent and still in use, skipping")
+                return
+
+        print(f"Trying {self} calibration with drive max {drive_max}")
+        if drive_max < 0.4:
+            raise linac_utils.SSACalibrationError(f"Requested {self} drive max too low")
+
+        print(f"Setting {self} max drive")
+        await self.async_pv("drive_max_setpoint").put(drive_max)
+
+        try:
+            await self.cavity.acheck_abort()
+            await self.arun_calibration()
+
+        except (
+            linac_utils.SSACalibrationToleranceError,
+            linac_utils.SSACalibrationError,
+        ) as e:
+            if attempt < 3:
+                await self.acalibrate(drive_max - 0.01, attempt + 1, force=force)
             else:
                 raise linac_utils.SSACalibrationError(e)
 
@@ -204,10 +234,12 @@ class SSA(linac_utils.SCLinacObject):
             print(f"Turning {self} on")
             self.turn_on_pv_obj.put(1)
 
-            while not self.is_on:
-                self.cavity.check_abort()
-                print(f"waiting for {self} to turn on")
-                time.sleep(1)
+            print(f"waiting for {self} to turn on")
+            wait_until(
+                lambda: self.is_on,
+                abort_check=self.cavity.check_abort,
+                wake_on=[self.status_pv_obj],
+            )
 
         if self.cavity.cryomodule.is_harmonic_linearizer:
             self.ps_volt_setpoint2_pv_obj.put(linac_utils.HL_SSA_PS_SETPOINT)
@@ -215,6 +247,26 @@ class SSA(linac_utils.SCLinacObject):
 
         print(f"{self} on")
 
+    async def aturn_on(self):
+        status_pv = self.async_pv("status")
+        if await status_pv.get() != linac_utils.SSA_STATUS_ON_VALUE:
+            await self.areset()
+
+            print(f"Turning {self} on")
+            await self.async_pv("turn_on").put(1)
+
+            print(f"waiting for {self} to turn on")
+            await status_pv.wait_until(
+                lambda status: status == linac_utils.SSA_STATUS_ON_VALUE,
+                abort_check=self.cavity.acheck_abort,
+            )
+
+        if self.cavity.cryomodule.is_harmonic_linearizer:
+            await self.async_pv("ps_volt_setpoint2").put(linac_utils.HL_SSA_PS_SETPOINT)
+            await self.async_pv("ps_volt_setpoint1").put(linac_utils.HL_SSA_PS_SETPOINT)
+
+        print(f"{self} on")
+
     @property
     def turn_off_pv_obj(self) -> PV:
         if not self._turn_off_pv_obj:
@@ -226,10 +278,26 @@ class SSA(linac_utils.SCLinacObject):
             print(f"Turning {self} off")
             self.turn_off_pv_obj.put(1)
 
-            while self.is_on:
-                self.cavity.check_abort()
-                print(f"waiting for {self} to turn off")
-                time.sleep(1)
+            print(f"waiting for {self} to turn off")
+            wait_until(
+                lambda: not self.is_on,
+                abort_check=self.cavity.check_abort,
+                wake_on=[self.status_pv_obj],
+            )
+
+        print(f"{self} off")
+
+    async def aturn_off(self):
+        status_pv = self.async_pv("status")
+        if await status_pv.get() == linac_utils.SSA_STATUS_ON_VALUE:
+            print(f"Turning {self} off")
+            await self.async_pv("turn_off").put(1)
+
+            print(f"waiting for {self} to turn off")
+            await status_pv.wait_until(
+                lambda status: status != linac_utils.SSA_STATUS_ON_VALUE,
+                abort_check=self.cavity.acheck_abort,
+            )
 
         print(f"{self} off")
 
@@ -260,19 +328,50 @@ class SSA(linac_utils.SCLinacObject):
 
         print(f"{self} reset")
 
-    def wait_while_resetting(self):
-        start = datetime.now()
-        while self.is_resetting:
-            self.cavity.check_abort()
-            print(
-                f"{datetime.now().replace(microsecond=0)} Waiting for {self} to finish resetting"
-            )
-            time.sleep(5)
-            if (datetime.now() - start).total_seconds() >= 90:
+    async def areset(self):
+        status_pv = self.async_pv("status")
+        reset_attempt = 0
+        while await status_pv.get() in linac_utils.SSA_FAULTED_VALUES:
+            await self.cavity.acheck_abort()
+            print(f"Resetting {self}...")
+            await self.async_pv("reset").put(1)
+
+            print(f"Waiting for {self} to finish resetting")
+            if not await status_pv.wait_until(
+                lambda status: status != linac_utils.SSA_STATUS_RESETTING_FAULTS_VALUE,
+                timeout=linac_utils.SSA_RESET_TIMEOUT,
+                abort_check=self.cavity.acheck_abort,
+            ):
                 raise linac_utils.SSAFaultError(
                     f"{self} took too long to reset, inspect and try again"
                 )
 
+            if (
+                await status_pv.get() in linac_utils.SSA_FAULTED_VALUES
+                and reset_attempt >= linac_utils.INTERLOCK_RESET_ATTEMPTS
+            ):
+                raise linac_utils.SSAFaultError(
+                    f"{self} failed to reset {linac_utils.INTERLOCK_RESET_ATTEMPTS}x"
+                )
+
+            reset_attempt += 1
+
+        print(f"{self} reset")
+
+    def wait_while_resetting(self):
+        print(
+            f"{datetime.now().replace(microsecond=0)} Waiting for {self} to finish resetting"
+        )
+        if not wait_until(
+            lambda: not self.is_resetting,
+            timeout=linac_utils.SSA_RESET_TIMEOUT,
+            abort_check=self.cavity.check_abort,
+            wake_on=[self.status_pv_obj],
+        ):
+            raise linac_utils.SSAFaultError(
+                f"{self} took too long to reset, inspect and try again"
+            )
+
     def start_calibration(self):
         if not self._calibration_start_pv_obj:
             self._calibration_start_pv_obj = PV(self.calibration_start_pv)
@@ -281,7 +380,7 @@ class SSA(linac_utils.SCLinacObject):
     @property
     def calibration_status(self):
         if not self._calibration_status_pv_obj:
-            self._calibration_status_pv_obj = PV(self.calibration_status_pv)
+            self._calibration_status_pv_obj = self.make_pv_obj("calibration_status")
         return self._calibration_status_pv_obj.get()
 
     @property
@@ -323,9 +422,12 @@ class SSA(linac_utils.SCLinacObject):
         self.start_calibration()
         time.sleep(2)
 
-        while self.calibration_running:
-            print(f"waiting for {self} calibration to stop running", datetime.now())
-            time.sleep(1)
+        print(f"waiting for {self} calibration to stop running", datetime.now())
+        wait_until(
+            lambda: not self.calibration_running,
+            abort_check=self.cavity.check_abort,
+            wake_on=[self.lazy_pv_obj("calibration_status")],
+        )
         time.sleep(2)
 
         if self.calibration_crashed:
@@ -346,10 +448,83 @@ class SSA(linac_utils.SCLinacObject):
 
         print(f"Pushing SSA calibration results for {self.cavity}")
         self.cavity.push_ssa_slope()
+        self.cavity.record_calibration(
+            SSA_CALIBRATION,
+            {"ssa_slope": self.measured_slope, "max_fwd_pwr": self.max_fwd_pwr},
+        )
 
         if save_slope:
             self.cavity.save_ssa_slope()
 
+    async def arun_calibration(self, save_slope: bool = False):
+        """
+        Async version of run_calibration
+        @param save_slope: Whether to update the saved slope PV with the newly
+                           calculated value or not
+        @return: None
+        """
+
+        await self.areset()
+        await self.aturn_on()
+
+        await self.cavity.areset_interlocks()
+
+        print(f"Starting {self} calibration")
+        await self.async_pv("calibration_start").put(1)
+        await asyncio.sleep(2)
+
+        print(f"waiting for {self} calibration to stop running", datetime.now())
+        calibration_status_pv = self.async_pv("calibration_status")
+        await calibration_status_pv.wait_until(
+            lambda status: status != linac_utils.SSA_CALIBRATION_RUNNING_VALUE,
+            abort_check=self.cavity.acheck_abort,
+        )
+        await asyncio.sleep(2)
+
+        if (
+            await calibration_status_pv.get()
+            == linac_utils.SSA_CALIBRATION_CRASHED_VALUE
+        ):
+            raise linac_utils.SSACalibrationError(f"{self} calibration crashed")
+
+        if (
+            await self.async_pv("cal_result_status").get()
+            != linac_utils.SSA_RESULT_GOOD_STATUS_VALUE
+        ):
+            raise linac_utils.SSACalibrationError(f"{self} calibration result not good")
+
+        max_fwd_pwr = await self.async_pv("max_fwd_pwr").get()
+        if max_fwd_pwr < self.fwd_power_lower_limit:
+            raise linac_utils.SSACalibrationToleranceError(
+                f"{self.cavity} SSA forward power too low"
+            )
+
+        measured_slope = await self.async_pv("measured_slope").get()
+        if not (
+            linac_utils.SSA_SLOPE_LOWER_LIMIT
+            < measured_slope
+            < linac_utils.SSA_SLOPE_UPPER_LIMIT
+        ):
+            raise linac_utils.SSACalibrationToleranceError(
+                f"{self.cavity} SSA Slope out of tolerance"
+            )
+
+        print(f"Pushing SSA calibration results for {self.cavity}")
+        await self.cavity.async_pv("push_ssa_slope").put(1)
+        self.cavity.record_calibration(
+            SSA_CALIBRATION, {"ssa_slope": measured_slope, "max_fwd_pwr": max_fwd_pwr}
+        )
+
+        if save_slope:
+            await self.cavity.async_pv("save_ssa_slope").put(1)
+
+    @property
+    def calibration_fresh(self) -> bool:
+        return self.cavity.calibration_fresh(
+            SSA_CALIBRATION,
+            lambda: {"ssa_slope": self.lazy_pv_obj("current_slope").get()},
+        )
+
     @property
     def measured_slope(self):
         if not self._measured_slope_pv_obj:
@@ -363,3 +538,33 @@ class SSA(linac_utils.SCLinacObject):
             < self.measured_slope
             < linac_utils.SSA_SLOPE_UPPER_LIMIT
         )
+
+
+def calibrate_ssas(
+    cavities: Iterable["Cavity"], max_concurrency: int = DEFAULT_MAX_CONCURRENCY
+) -> ParallelReport:
+    """
+    Calibrates every cavity's SSA at once. HL cavities that share an SSA
+    (see HL_SSA_MAP) are still calibrated one after the other
+    @param cavities: cavities whose SSAs to calibrate, they get turned off first
+    @param max_concurrency: max number of calibrations running at once
+    @return: ParallelReport with each cavity's slope and forward power, or
+             the error for SSAs that failed or stayed out of tolerance
+    """
+
+    def calibrate(cavity: "Cavity") -> Dict[str, float]:
+        cavity.turn_off()
+        cavity.ssa.calibrate(cavity.ssa.drive_max)
+        return {
+            "ssa_slope": cavity.ssa.lazy_pv_obj("current_slope").get(),
+            "max_fwd_pwr": cavity.ssa.max_fwd_pwr,
+        }
+
+    report = run_parallel(
+        calibrate,
+        cavities,
+        max_concurrency=max_concurrency,
+        resource_limits={"shared_ssa": 1},
+    )
+    print(report)
+    return report
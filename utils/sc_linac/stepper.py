@@ -1,16 +1,62 @@
-import time
+import dataclasses
+import math
 from datetime import datetime
-from typing import Optional, TYPE_CHECKING
+from typing import Callable, List, Optional, TYPE_CHECKING
 
 from lcls_tools.common.controls.pyepics.utils import PV
 from numpy import sign
 
 from utils.sc_linac import linac_utils
+from utils.sc_linac.pv_field import PVField
+from utils.sc_linac.wait_utils import wait_until
 
 if TYPE_CHECKING:
     from cavity import Cavity
 
 
+@dataclasses.dataclass
+class MovePlan:
+    """
+    Chunk schedule for a stepper move, worked out before anything moves so
+    that the chunks can be issued back to back and the whole move timed
+    """
+
+    num_steps: int
+    max_steps: int
+    speed: int
+    # Signed steps for each move command, filled in from the fields above
+    chunks: List[int] = dataclasses.field(init=False)
+
+    def __post_init__(self):
+        self.max_steps = abs(self.max_steps)
+        self.speed = min(abs(self.speed), linac_utils.MAX_STEPPER_SPEED)
+        if not self.max_steps or not self.speed:
+            raise ValueError("max_steps and speed need to be nonzero")
+
+        full_chunks, last_chunk = divmod(abs(self.num_steps), self.max_steps)
+        direction = -1 if self.num_steps < 0 else 1
+        self.chunks = [direction * self.max_steps] * full_chunks
+        if last_chunk or not self.chunks:
+            self.chunks.append(direction * last_chunk)
+
+    @property
+    def total_steps(self) -> int:
+        return abs(self.num_steps)
+
+    def expected_duration(self, steps_done: int = 0) -> float:
+        """
+        @param steps_done: steps already moved, for a remaining time estimate
+        @return: seconds the rest of the move should take at the planned
+                 speed, including the overhead of every remaining move command
+        """
+        remaining = max(self.total_steps - abs(steps_done), 0)
+        remaining_chunks = math.ceil(remaining / self.max_steps)
+        return (
+            remaining / self.speed
+            + remaining_chunks * linac_utils.STEPPER_MOVE_OVERHEAD
+        )
+
+
 class StepperTuner(linac_utils.SCLinacObject):
     """
     Python representation of LCLS II stepper tuners. This class provides wrappers
@@ -18,6 +64,25 @@ class StepperTuner(linac_utils.SCLinacObject):
     status, and retrieving stored movement parameters
     """
 
+    move_pos_pv = PVField("MOV_REQ_POS", writable=True)
+    move_neg_pv = PVField("MOV_REQ_NEG", writable=True)
+    abort_pv = PVField("ABORT_REQ", writable=True)
+    step_des_pv = PVField("NSTEPS", writable=True)
+    max_steps_pv = PVField("NSTEPS.DRVH", writable=True)
+    speed_pv = PVField("VELO", writable=True)
+    step_tot_pv = PVField("REG_TOTABS")
+    step_signed_pv = PVField("REG_TOTSGN")
+    reset_tot_pv = PVField("TOTABS_RESET", writable=True)
+    reset_signed_pv = PVField("TOTSGN_RESET", writable=True)
+    steps_cold_landing_pv = PVField("NSTEPS_COLD")
+    push_signed_cold_pv = PVField("PUSH_NSTEPS_COLD.PROC", writable=True)
+    push_signed_park_pv = PVField("PUSH_NSTEPS_PARK.PROC", writable=True)
+    motor_moving_pv = PVField("STAT_MOV", cached=True)
+    motor_done_pv = PVField("STAT_DONE")
+    limit_switch_a_pv = PVField("STAT_LIMA")
+    limit_switch_b_pv = PVField("STAT_LIMB")
+    hz_per_microstep_pv = PVField("SCALE")
+
     def __init__(self, cavity: "Cavity"):
         """
         @param cavity: the cavity object tuned by this stepper
@@ -26,49 +91,6 @@ class StepperTuner(linac_utils.SCLinacObject):
         self.cavity: "Cavity" = cavity
         self._pv_prefix: str = self.cavity.pv_addr("STEP:")
 
-        self.move_pos_pv: str = self.pv_addr("MOV_REQ_POS")
-        self._move_pos_pv_obj: Optional[PV] = None
-
-        self.move_neg_pv: str = self.pv_addr("MOV_REQ_NEG")
-        self._move_neg_pv_obj: Optional[PV] = None
-
-        self.abort_pv: str = self.pv_addr("ABORT_REQ")
-        self._abort_pv_obj: Optional[PV] = None
-
-        self.step_des_pv: str = self.pv_addr("NSTEPS")
-        self._step_des_pv_obj: Optional[PV] = None
-
-        self.max_steps_pv: str = self.pv_addr("NSTEPS.DRVH")
-        self._max_steps_pv_obj: Optional[PV] = None
-
-        self.speed_pv: str = self.pv_addr("VELO")
-        self._speed_pv_obj: Optional[PV] = None
-
-        self.step_tot_pv: str = self.pv_addr("REG_TOTABS")
-        self.step_signed_pv: str = self.pv_addr("REG_TOTSGN")
-        self.reset_tot_pv: str = self.pv_addr("TOTABS_RESET")
-
-        self.reset_signed_pv: str = self.pv_addr("TOTSGN_RESET")
-        self._reset_signed_pv_obj: Optional[PV] = None
-
-        self.steps_cold_landing_pv: str = self.pv_addr("NSTEPS_COLD")
-        self.push_signed_cold_pv: str = self.pv_addr("PUSH_NSTEPS_COLD.PROC")
-        self.push_signed_park_pv: str = self.pv_addr("PUSH_NSTEPS_PARK.PROC")
-
-        self.motor_moving_pv: str = self.pv_addr("STAT_MOV")
-        self._motor_moving_pv_obj: Optional[PV] = None
-
-        self.motor_done_pv: str = self.pv_addr("STAT_DONE")
-
-        self.limit_switch_a_pv: str = self.pv_addr("STAT_LIMA")
-        self._limit_switch_a_pv_obj: Optional[PV] = None
-
-        self.limit_switch_b_pv: str = self.pv_addr("STAT_LIMB")
-        self._limit_switch_b_pv_obj: Optional[PV] = None
-
-        self.hz_per_microstep_pv: str = self.pv_addr("SCALE")
-        self._hz_per_microstep_pv_obj: Optional[PV] = None
-
         self.abort_flag: bool = False
 
     def __str__(self):
@@ -100,6 +122,13 @@ class StepperTuner(linac_utils.SCLinacObject):
             self.abort_flag = False
             raise linac_utils.StepperAbortError(f"Abort requested for {self}")
 
+    async def acheck_abort(self):
+        await self.cavity.acheck_abort()
+        if self.abort_flag:
+            await self.async_pv("abort").put(1)
+            self.abort_flag = False
+            raise linac_utils.StepperAbortError(f"Abort requested for {self}")
+
     def abort(self):
         if not self._abort_pv_obj:
             self._abort_pv_obj = PV(self.abort_pv)
@@ -130,10 +159,22 @@ class StepperTuner(linac_utils.SCLinacObject):
         self.step_des_pv_obj.put(value)
 
     @property
-    def motor_moving(self) -> bool:
+    def motor_moving_pv_obj(self) -> PV:
         if not self._motor_moving_pv_obj:
-            self._motor_moving_pv_obj = PV(self.motor_moving_pv)
-        return self._motor_moving_pv_obj.get() == 1
+            self._motor_moving_pv_obj = self.make_pv_obj("motor_moving")
+        return self._motor_moving_pv_obj
+
+    @property
+    def motor_moving(self) -> bool:
+        return self.motor_moving_pv_obj.get() == 1
+
+    @property
+    def step_signed_pv_obj(self) -> PV:
+        return self.lazy_pv_obj("step_signed")
+
+    @property
+    def step_signed(self) -> int:
+        return self.step_signed_pv_obj.get()
 
     def reset_signed_steps(self):
         if not self._reset_signed_pv_obj:
@@ -193,6 +234,41 @@ class StepperTuner(linac_utils.SCLinacObject):
         self.max_steps = linac_utils.DEFAULT_STEPPER_MAX_STEPS
         self.speed = linac_utils.DEFAULT_STEPPER_SPEED
 
+    def plan_move(
+        self,
+        num_steps: int,
+        max_steps: int = linac_utils.DEFAULT_STEPPER_MAX_STEPS,
+        speed: int = linac_utils.DEFAULT_STEPPER_SPEED,
+    ) -> MovePlan:
+        plan = MovePlan(num_steps, max_steps, speed)
+        print(
+            f"{self.cavity} moving {num_steps} steps in {len(plan.chunks)}"
+            f" chunk(s) of up to {plan.max_steps}, expected to take"
+            f" {plan.expected_duration():.0f}s"
+        )
+        return plan
+
+    def report_progress(
+        self,
+        plan: MovePlan,
+        start_steps: int,
+        callback: Optional[Callable[[int, int, float], None]] = None,
+    ):
+        """
+        @param plan: the move in progress
+        @param start_steps: REG_TOTSGN when the move started
+        @param callback: called with steps moved, total steps and seconds
+                         remaining, printed if None
+        """
+        steps_done = min(abs(self.step_signed - start_steps), plan.total_steps)
+        eta = plan.expected_duration(steps_done)
+        if callback:
+            callback(steps_done, plan.total_steps, eta)
+        else:
+            print(
+                f"{self} moved {steps_done}/{plan.total_steps} steps, ~{eta:.0f}s left"
+            )
+
     def move(
         self,
         num_steps: int,
@@ -200,49 +276,60 @@ class StepperTuner(linac_utils.SCLinacObject):
         speed: int = linac_utils.DEFAULT_STEPPER_SPEED,
         change_limits: bool = True,
         check_detune: bool = True,
+        progress_callback: Optional[Callable[[int, int, float], None]] = None,
     ):
         """
+        Moves in chunks of at most max_steps, planned up front so that the
+        limits are only set once and each chunk is issued as soon as the
+        previous one is done
         :param num_steps: positive for increasing cavity length, negative for decreasing
         :param max_steps: the maximum number of steps allowed at once
         :param speed: the speed of the motor in steps/second
         :param change_limits: whether to change the speed and steps
         :param check_detune: whether to check for valid detune after each move
+        :param progress_callback: called with steps moved, total steps and an
+                                  ETA in seconds while moving, progress is
+                                  only printed between chunks if None
         :return: None
         """
 
         self.check_abort()
-        max_steps = abs(max_steps)
+        # the plan also makes sure that we don't use a negative maximum or
+        # exceed the speed limit as defined by the tuner experts
+        plan = self.plan_move(num_steps, max_steps, speed)
 
         if change_limits:
-            # on the off chance that someone tries to write a negative maximum
-            self.max_steps = max_steps
-
-            # make sure that we don't exceed the speed limit as defined by the tuner experts
-            self.speed = (
-                speed
-                if speed < linac_utils.MAX_STEPPER_SPEED
-                else linac_utils.MAX_STEPPER_SPEED
+            self.max_steps = plan.max_steps
+            self.speed = plan.speed
+
+        start_steps = self.step_signed
+        step_des = None
+
+        def on_poll():
+            if progress_callback:
+                self.report_progress(plan, start_steps, progress_callback)
+
+        remaining = num_steps
+        for chunk in plan.chunks:
+            # all but the last chunk are the same size, so NSTEPS rarely changes
+            if abs(chunk) != step_des:
+                step_des = abs(chunk)
+                self.step_des = step_des
+            self.issue_move_command(
+                remaining, check_detune=check_detune, on_poll=on_poll
             )
+            remaining -= chunk
+            if remaining:
+                self.report_progress(plan, start_steps, progress_callback)
 
-        if abs(num_steps) <= max_steps:
-            print(f"{self.cavity} {abs(num_steps)} steps <= {max_steps} max")
-            self.step_des = abs(num_steps)
-            self.issue_move_command(num_steps, check_detune=check_detune)
-            self.restore_defaults()
-        else:
-            print(f"{self.cavity} {abs(num_steps)} steps > {max_steps} max")
-            self.step_des = max_steps
-            self.issue_move_command(num_steps, check_detune=check_detune)
-            print(f"{self.cavity} moving {num_steps - (sign(num_steps) * max_steps)}")
-            self.move(
-                num_steps - (sign(num_steps) * max_steps),
-                max_steps,
-                speed,
-                change_limits=False,
-                check_detune=check_detune,
-            )
+        self.restore_defaults()
 
-    def issue_move_command(self, num_steps: int, check_detune: bool = True):
+    def issue_move_command(
+        self,
+        num_steps: int,
+        check_detune: bool = True,
+        on_poll: Optional[Callable[[], None]] = None,
+    ):
         """
         Determine whether to move positive or negative depending on the requested
         number of steps
@@ -250,6 +337,7 @@ class StepperTuner(linac_utils.SCLinacObject):
         @param check_detune: Whether to check for a valid detune during move
                              (this should only be false when we cannot see
                              cavity frequency, i.e. when we are not at 2 K)
+        @param on_poll: called every time the motor is checked while moving
         @return: None
         """
 
@@ -262,15 +350,27 @@ class StepperTuner(linac_utils.SCLinacObject):
         else:
             self.move_negative()
 
-        print(f"Waiting 5s for {self.cavity} motor to start moving")
-        time.sleep(5)
+        print(f"Waiting for {self.cavity} motor to start moving")
+        wait_until(
+            lambda: self.motor_moving,
+            timeout=linac_utils.STEPPER_START_MOVING_TIMEOUT,
+            abort_check=self.check_abort,
+            wake_on=[self.motor_moving_pv_obj],
+        )
 
-        while self.motor_moving:
+        def check_move():
             self.check_abort()
             if check_detune:
                 self.cavity.check_detune()
-            print(f"{self} motor still moving, waiting 5s", datetime.now())
-            time.sleep(5)
+            if on_poll:
+                on_poll()
+
+        print(f"{self} motor moving, waiting for it to stop", datetime.now())
+        wait_until(
+            lambda: not self.motor_moving,
+            abort_check=check_move,
+            wake_on=[self.motor_moving_pv_obj],
+        )
 
         print(f"{self} motor done moving")
 
@@ -279,3 +379,79 @@ class StepperTuner(linac_utils.SCLinacObject):
             raise linac_utils.StepperError(
                 f"{self.cavity} stepper motor on limit switch"
             )
+
+    async def amove(
+        self,
+        num_steps: int,
+        max_steps: int = linac_utils.DEFAULT_STEPPER_MAX_STEPS,
+        speed: int = linac_utils.DEFAULT_STEPPER_SPEED,
+        change_limits: bool = True,
+        check_detune: bool = True,
+    ):
+        """
+        Async version of move, running the same MovePlan
+        """
+        await self.acheck_abort()
+        plan = self.plan_move(num_steps, max_steps, speed)
+
+        if change_limits:
+            await self.async_pv("max_steps").put(plan.max_steps)
+            await self.async_pv("speed").put(plan.speed)
+
+        step_des_pv = self.async_pv("step_des")
+        step_des = None
+        for chunk in plan.chunks:
+            if abs(chunk) != step_des:
+                step_des = abs(chunk)
+                await step_des_pv.put(step_des)
+            await self.aissue_move_command(num_steps, check_detune=check_detune)
+            num_steps -= chunk
+            if num_steps:
+                print(f"{self.cavity} {num_steps} steps left")
+
+        await self.async_pv("max_steps").put(linac_utils.DEFAULT_STEPPER_MAX_STEPS)
+        await self.async_pv("speed").put(linac_utils.DEFAULT_STEPPER_SPEED)
+
+    async def aissue_move_command(self, num_steps: int, check_detune: bool = True):
+        """
+        Async version of issue_move_command
+        @param num_steps: Signed number of steps to move the stepper
+        @param check_detune: Whether to check for a valid detune during move
+        @return: None
+        """
+
+        # this is necessary because the tuners for the HLs move the other direction
+        if self.cavity.cryomodule.is_harmonic_linearizer:
+            num_steps *= -1
+
+        await self.async_pv("move_pos" if sign(num_steps) == 1 else "move_neg").put(1)
+
+        motor_moving_pv = self.async_pv("motor_moving")
+        print(f"Waiting for {self.cavity} motor to start moving")
+        await motor_moving_pv.wait_until(
+            lambda moving: moving == 1,
+            timeout=linac_utils.STEPPER_START_MOVING_TIMEOUT,
+            abort_check=self.acheck_abort,
+        )
+
+        async def check_move():
+            await self.acheck_abort()
+            if check_detune:
+                await self.cavity.acheck_detune()
+
+        print(f"{self} motor moving, waiting for it to stop", datetime.now())
+        await motor_moving_pv.wait_until(
+            lambda moving: moving != 1, abort_check=check_move
+        )
+
+        print(f"{self} motor done moving")
+
+        # the motor can be done moving for good OR bad reasons
+        for limit_switch in ["limit_switch_a", "limit_switch_b"]:
+            if (
+                await self.async_pv(limit_switch).get()
+                == linac_utils.STEPPER_ON_LIMIT_SWITCH_VALUE
+            ):
+                raise linac_utils.StepperError(
+                    f"{self.cavity} stepper motor on limit switch"
+                )
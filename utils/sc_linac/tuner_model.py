@@ -0,0 +1,118 @@
+import dataclasses
+from typing import Dict, Optional
+
+from numpy import sign
+
+from utils.sc_linac.cavity_data import load_cavity_data, save_cavity_data
+
+# Weight given to each new observation when updating the estimates
+TUNER_MODEL_SMOOTHING = 0.5
+
+# Detune changes smaller than this are within the detune noise and aren't
+# used to update the Hz/step estimate
+TUNER_MODEL_MIN_CHANGE_HZ = 5
+
+# Fraction of the predicted move we make, the first move (without any learned
+# Hz/step) is more conservative to avoid overshooting into a backlash reversal
+TUNER_MODEL_GAIN = 0.95
+TUNER_MODEL_UNLEARNED_GAIN = 0.9
+
+
+@dataclasses.dataclass
+class TunerModel:
+    """
+    Online estimate of how many Hz one stepper microstep actually moves a
+    cavity, learned separately for each direction from observed (steps,
+    change in detune) pairs, plus the number of microsteps lost to backlash
+    when the motor reverses direction
+    """
+
+    hz_per_step_positive: Optional[float] = None
+    hz_per_step_negative: Optional[float] = None
+    backlash_steps: float = 0
+    last_direction: int = 0
+    samples: int = 0
+
+    def hz_per_step(self, direction: int) -> Optional[float]:
+        return self.hz_per_step_positive if direction > 0 else self.hz_per_step_negative
+
+    def best_estimate(self, direction: int, default_hz_per_step: float) -> float:
+        """
+        @return: learned Hz/step for direction, falling back to the other
+                 direction's (a better guess than nominal) and then nominal
+        """
+        return (
+            self.hz_per_step(direction)
+            or self.hz_per_step(-direction)
+            or default_hz_per_step
+        )
+
+    def plan(self, delta_hz: float, default_hz_per_step: float) -> int:
+        """
+        @param delta_hz: detune left to correct
+        @param default_hz_per_step: nominal Hz/microstep (the SCALE PV) to
+                                    use until the direction has been learned
+        @return: signed number of microsteps to move
+        """
+        direction = 1 if delta_hz > 0 else -1
+        gain = TUNER_MODEL_GAIN if self.samples else TUNER_MODEL_UNLEARNED_GAIN
+        steps = (
+            gain * abs(delta_hz) / self.best_estimate(direction, default_hz_per_step)
+        )
+
+        if self.last_direction and direction != self.last_direction:
+            steps += self.backlash_steps
+
+        return int(direction * steps)
+
+    def update(self, steps: int, corrected_hz: float, default_hz_per_step: float):
+        """
+        @param steps: signed microsteps that were just moved
+        @param corrected_hz: detune before the move minus detune after it
+        @param default_hz_per_step: nominal Hz/microstep, used to estimate
+                                    backlash before the direction is learned
+        """
+        direction = int(sign(steps))
+        if not direction:
+            return
+
+        reversed_direction = self.last_direction and direction != self.last_direction
+        self.last_direction = direction
+        moved_hz = corrected_hz * direction
+
+        if reversed_direction:
+            # Any shortfall on a reversal is treated as backlash
+            hz_per_step = self.best_estimate(direction, default_hz_per_step)
+            lost = max(abs(steps) - max(moved_hz, 0) / hz_per_step, 0)
+            self.backlash_steps = self._smooth(self.backlash_steps, lost)
+            return
+
+        if moved_hz < TUNER_MODEL_MIN_CHANGE_HZ:
+            return
+
+        sample = moved_hz / abs(steps)
+        if direction > 0:
+            self.hz_per_step_positive = self._smooth(self.hz_per_step_positive, sample)
+        else:
+            self.hz_per_step_negative = self._smooth(self.hz_per_step_negative, sample)
+        self.samples += 1
+
+    @staticmethod
+    def _smooth(current: Optional[float], sample: float) -> float:
+        if current is None:
+            return sample
+        return (1 - TUNER_MODEL_SMOOTHING) * current + TUNER_MODEL_SMOOTHING * sample
+
+
+def load_tuner_model(filepath: str, key: str) -> TunerModel:
+    """
+    @param filepath: JSON file holding {key: model fields} for a cryomodule
+    @param key: cavity identifier within the file
+    @return: the saved model, or a fresh one if there isn't one
+    """
+    data: Optional[Dict] = load_cavity_data(filepath, key)
+    return TunerModel(**data) if data else TunerModel()
+
+
+def save_tuner_model(filepath: str, key: str, model: TunerModel):
+    save_cavity_data(filepath, key, dataclasses.asdict(model))
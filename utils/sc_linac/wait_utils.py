@@ -0,0 +1,88 @@
+import threading
+import time
+from typing import Any, Callable, Iterable, Optional, Union
+
+from lcls_tools.common.controls.pyepics.utils import PV
+
+# Upper bound on how long we go without re-checking the condition (and the
+# abort flag) when no monitor update arrives
+DEFAULT_WAIT_POLL_PERIOD = 1
+
+
+def updated_since(pv_obj: PV, timestamp: Optional[float]) -> bool:
+    """
+    @param pv_obj: monitored PV object
+    @param timestamp: the PV's timestamp before whatever it should react to
+                      (i.e. a write to a setting that feeds it)
+    @return: whether a monitor update newer than timestamp has come in
+    """
+    if pv_obj.timestamp is None:
+        return False
+    return timestamp is None or pv_obj.timestamp > timestamp
+
+
+def wait_until(
+    pv_or_predicate: Union[PV, Callable[[], bool]],
+    condition: Optional[Callable[[Any], bool]] = None,
+    timeout: Optional[float] = None,
+    abort_check: Optional[Callable[[], None]] = None,
+    wake_on: Iterable[PV] = (),
+    poll_period: float = DEFAULT_WAIT_POLL_PERIOD,
+) -> bool:
+    """
+    Blocks until a condition holds, waking up as soon as a monitor update comes
+    in on any of the relevant PVs instead of sleeping a fixed amount between checks
+    @param pv_or_predicate: either a PV, in which case condition is called with
+                            its value, or a no argument callable returning a bool
+    @param condition: callable taking the PV value, required when passing a PV
+    @param timeout: seconds to wait before giving up, None to wait forever
+    @param abort_check: called after every failed check, expected to raise if
+                        the wait should be abandoned (e.g. Cavity.check_abort)
+    @param wake_on: extra PVs whose updates should trigger a re-check (useful
+                    with a predicate that reads PVs through properties)
+    @param poll_period: max seconds between checks when no update comes in
+    @return: True if the condition was met, False if it timed out
+    """
+    wake_on = list(wake_on)
+    if condition is not None:
+        pv_obj: PV = pv_or_predicate
+        wake_on.append(pv_obj)
+
+        def predicate() -> bool:
+            return condition(pv_obj.get())
+
+    else:
+        predicate = pv_or_predicate
+
+    updated = threading.Event()
+
+    def wake(**kwargs):
+        updated.set()
+
+    callbacks = [(pv_obj, pv_obj.add_callback(wake)) for pv_obj in wake_on]
+    start = time.monotonic()
+
+    try:
+        while True:
+            # Clear before checking so an update that lands mid-check still
+            # wakes the next wait
+            updated.clear()
+
+            if predicate():
+                return True
+
+            if abort_check:
+                abort_check()
+
+            wait_time = poll_period
+            if timeout is not None:
+                remaining = timeout - (time.monotonic() - start)
+                if remaining <= 0:
+                    return False
+                wait_time = min(wait_time, remaining)
+
+            updated.wait(wait_time)
+
+    finally:
+        for pv_obj, index in callbacks:
+            pv_obj.remove_callback(index)
@@ -1,6 +1,6 @@
 from asyncio import get_event_loop
 
-from caproto import ChannelEnum, ChannelFloat, ChannelInteger
+from caproto import ChannelEnum, ChannelFloat, ChannelInteger, ChannelString
 from caproto.server import (
     ioc_arg_parser,
     run,
@@ -43,6 +43,17 @@ class SCLinacPhysicsService(Service):
         self["PHYS:SYS0:1:SC_SEL_PHAS_OPT_HEARTBEAT"] = ChannelInteger(value=0)
         self["PHYS:SYS0:1:SC_CAV_QNCH_RESET_HEARTBEAT"] = ChannelInteger(value=0)
         self["PHYS:SYS0:1:SC_CAV_FAULT_HEARTBEAT"] = ChannelInteger(value=0)
+        for suffix in [
+            "CYCLE_TIME",
+            "CYCLE_P50",
+            "CYCLE_P95",
+            "CYCLE_MAX",
+            "EVAL_RATE",
+        ]:
+            self[f"PHYS:SYS0:1:SC_CAV_FAULT_{suffix}"] = ChannelFloat(value=0.0)
+        self["PHYS:SYS0:1:SC_CAV_FAULT_DISCONNECTED"] = ChannelInteger(value=0)
+        self["PHYS:SYS0:1:SC_CAV_FAULT_SLOWEST_CAV"] = ChannelString(value="")
+        self["PHYS:SYS0:1:SC_CAV_FAULT_SLOWEST_FAULT"] = ChannelString(value="")
 
         self["ALRM:SYS0:SC_CAV_FAULT:ALHBERR"] = ChannelEnum(
             enum_strings=("RUNNING", "NOT_RUNNING", "INVALID"), value=0